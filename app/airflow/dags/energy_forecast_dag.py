@@ -10,6 +10,17 @@ default_args = {
     "retry_delay": timedelta(minutes=10),
 }
 
+SMARD_SERIES = ("load", "wind", "solar")
+QUANTILES = range(5, 100, 5)    # q05 to q95, one training task each
+
+# Stages after the fetches go through pipeline/cache.py, which skips a stage when
+# its code and input files are byte-identical to its last successful run; the
+# per-quantile training tasks skip on their registry key.
+
+# Pools (created by airflow-init):
+#   airflow pools set ingestion 4 "Concurrent source downloads"
+#   airflow pools set training 2 "Concurrent quantile model fits"
+
 with DAG(
     dag_id="energy_forecast",
     default_args=default_args,
@@ -20,31 +31,47 @@ with DAG(
     max_active_runs=1,
 ) as dag:
 
+    # Off the critical path: nothing before load_features needs the schema.
     migrate = BashOperator(
         task_id="migrate",
         # or `psql -f db/migrations.sql` depending on your setup
         bash_command="cd /app && python db/migrations.py"
     )
 
-    fetch_smard = BashOperator(
+    # Source fetches are independent HTTP downloads writing separate files, so
+    # they run side by side (bounded by the "ingestion" pool).
+    fetch_smard = BashOperator.partial(
         task_id="fetch_smard",
-        bash_command="cd /app && python ingestion/fetch_smard.py --start {{ ds }} --end {{ next_ds }}"
+        pool="ingestion",
+    ).expand(bash_command=[
+        f"cd /app && python ingestion/fetch_smard.py --series {s} --start {{{{ ds }}}} --end {{{{ next_ds }}}}"
+        for s in SMARD_SERIES
+    ])
+
+    # Skipped (exit 99) when no token is configured; build_features then uses OPSD prices.
+    fetch_entsoe = BashOperator(
+        task_id="fetch_entsoe",
+        pool="ingestion",
+        bash_command='[ -n "$ENTSOE_TOKEN" ] || { echo "ENTSOE_TOKEN not set"; exit 99; }; '
+                     "cd /app && python ingestion/fetch_entsoe.py",
     )
 
-    # add ENTSO-E fetch if you like (token comes from env)
-    # fetch_entsoe = BashOperator(
-    #     task_id="fetch_entsoe",
-    #     bash_command="cd /app && python ingestion/fetch_entsoe.py"
-    # )
+    # The OPSD bootstrap is a large static file; refresh it at most weekly.
+    fetch_opsd = BashOperator(
+        task_id="fetch_opsd",
+        pool="ingestion",
+        bash_command="cd /app && python ingestion/fetch_opsd.py --max-age-days 7"
+    )
 
     build_features = BashOperator(
         task_id="build_features",
-        bash_command="cd /app && python features/build_features.py"
+        bash_command="cd /app && python pipeline/cache.py run build",
+        trigger_rule="none_failed",
     )
 
     load_features = BashOperator(
         task_id="load_features",
-        bash_command="cd /app && python db/load_features_to_pg.py"
+        bash_command="cd /app && python pipeline/cache.py run load"
     )
 
     dq_count = SQLExecuteQueryOperator(
@@ -71,19 +98,39 @@ with DAG(
         """
     )
 
-    train_quantiles = BashOperator(
-        task_id="train_quantiles",
-        bash_command="cd /app && python models/train_quantiles_full.py"
+    # One mapped task instance per quantile; the "training" pool caps how many
+    # fit at once (each XGBoost fit already uses all cores it is given).
+    train_quantile = BashOperator.partial(
+        task_id="train_quantile",
+        pool="training",
+    ).expand(bash_command=[
+        f"cd /app && python models/train_quantiles_full.py --quantile {q}" for q in QUANTILES
+    ])
+
+    train_finalize = BashOperator(
+        task_id="train_finalize",
+        bash_command="cd /app && python models/train_quantiles_full.py --finalize"
     )
 
     forecast_fan = BashOperator(
         task_id="forecast_fan",
-        bash_command="cd /app && python models/predict_fan.py"
+        bash_command="cd /app && python pipeline/cache.py run forecast"
+    )
+    conformal = BashOperator(
+        task_id="conformal",
+        bash_command="cd /app && python pipeline/cache.py run conformal"
+    )
+    evaluate = BashOperator(
+        task_id="evaluate",
+        bash_command="cd /app && python pipeline/cache.py run evaluate"
     )
     save_predictions = BashOperator(
         task_id="save_predictions",
-        bash_command="cd /app && python db/save_predictions.py"
+        bash_command="cd /app && python pipeline/cache.py run save"
     )
 
-fetch_smard >> build_features >> migrate >> load_features >> [
-    dq_count, dq_no_dupes] >> train_quantiles >> forecast_fan >> save_predictions
+[fetch_smard, fetch_entsoe, fetch_opsd] >> build_features
+build_features >> train_quantile >> train_finalize >> conformal >> forecast_fan
+[build_features, migrate] >> load_features >> [dq_count, dq_no_dupes]
+[forecast_fan, dq_count, dq_no_dupes] >> save_predictions
+train_finalize >> evaluate
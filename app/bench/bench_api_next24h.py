@@ -0,0 +1,91 @@
+# bench/bench_api_next24h.py
+"""Load test for GET /predictions/next24h against a running API.
+
+    python bench/bench_api_next24h.py --url http://localhost:8000 [--etag] [--procs 4]
+
+With --etag every request after the first sends If-None-Match (dashboard
+polling pattern), so the server should answer 304 from memory.
+"""
+from __future__ import annotations
+from collections import Counter
+from multiprocessing import Pool
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+
+async def _fetch(reader, writer, request: bytes) -> tuple[int, dict]:
+    writer.write(request)
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = {k.lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:] if l)}
+    n = int(headers.get("content-length", 0))
+    if n:
+        await reader.readexactly(n)
+    return int(lines[0].split()[1]), headers
+
+
+async def _client(url, duration, concurrency, use_etag):
+    # raw keep-alive HTTP/1.1 so the client's own overhead stays small next to the server's
+    u = urlsplit(url)
+    host, port = u.hostname, u.port or 80
+    base = f"GET /predictions/next24h HTTP/1.1\r\nHost: {host}\r\n"
+    reader, writer = await asyncio.open_connection(host, port)
+    status, headers = await _fetch(reader, writer, (base + "\r\n").encode())
+    writer.close()
+    if status != 200:
+        raise SystemExit(f"{url} answered {status}")
+    extra = f"If-None-Match: {headers['etag']}\r\n" if use_etag else ""
+    request = (base + extra + "\r\n").encode()
+    codes, lat = Counter(), []
+    stop = time.perf_counter() + duration
+
+    async def worker():
+        reader, writer = await asyncio.open_connection(host, port)
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            status, _ = await _fetch(reader, writer, request)
+            lat.append(time.perf_counter() - t0)
+            codes[status] += 1
+        writer.close()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return codes, lat
+
+
+def _run(args_tuple):
+    codes, lat = asyncio.run(_client(*args_tuple))
+    return dict(codes), lat
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--concurrency", type=int, default=32, help="In-flight requests per process")
+    ap.add_argument("--procs", type=int, default=2, help="Client processes (one client core saturates early)")
+    ap.add_argument("--etag", action="store_true")
+    args = ap.parse_args()
+
+    job = (args.url, args.duration, args.concurrency, args.etag)
+    with Pool(args.procs) as p:
+        results = p.map(_run, [job] * args.procs)
+    codes, lat = Counter(), []
+    for c, l in results:
+        codes.update(c)
+        lat += l
+    lat.sort()
+    n = len(lat)
+    print(json.dumps({
+        "requests": n,
+        "rps": round(n / args.duration, 1),
+        "status": dict(codes),
+        "p50_ms": round(1000 * lat[n // 2], 2) if n else None,
+        "p99_ms": round(1000 * lat[int(n * 0.99)], 2) if n else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
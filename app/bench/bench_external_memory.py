@@ -0,0 +1,83 @@
+# bench/bench_external_memory.py
+"""Peak RSS / wall time: in-memory XGBRegressor fit vs. external-memory DataIter.
+
+Each mode runs in its own subprocess so ru_maxrss is not shared between them.
+    python bench/bench_external_memory.py --years 5
+"""
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import xgboost as xgb
+
+from bench.synthetic import write_features
+from models import data_iter
+from models.train_baseline import PARAMS, TARGET
+
+
+def run_in_memory(single: Path):
+    df = pd.read_parquet(single)
+    for c in df.select_dtypes(include=["bool"]).columns:
+        df[c] = df[c].astype(int)
+    df = df.select_dtypes(include=["number"]).dropna()
+    X = df.drop(columns=[TARGET]).astype(float)
+    y = df[TARGET].astype(float)
+    xgb.XGBRegressor(**PARAMS).fit(X, y)
+
+
+def run_external(parts: Path, batch_rows: int):
+    dataset = data_iter.open_dataset(parts)
+    feats = data_iter.feature_columns(dataset, TARGET)
+    data_iter.train_external(PARAMS, dataset, feats, batch_rows=batch_rows)
+
+
+def peak_rss_mb() -> float:
+    # VmHWM belongs to this exec'd image; ru_maxrss can carry the parent's peak across fork+exec.
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode: str, path: str, batch_rows: int):
+    t0 = time.perf_counter()
+    if mode == "in_memory":
+        run_in_memory(Path(path))
+    else:
+        run_external(Path(path), batch_rows)
+    wall = time.perf_counter() - t0
+    print(json.dumps({"mode": mode, "wall_s": round(wall, 3), "peak_rss_mb": round(peak_rss_mb(), 1)}))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--years", type=float, default=5)
+    ap.add_argument("--batch-rows", type=int, default=50_000)
+    ap.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        return child(*args.child, args.batch_rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        single, parts = write_features(Path(tmp), years=args.years)
+        results = []
+        for mode, path in [("in_memory", single), ("external_memory", parts)]:
+            out = subprocess.run(
+                [sys.executable, "-m", "bench.bench_external_memory", "--child", mode, str(path),
+                 "--batch-rows", str(args.batch_rows)],
+                check=True, capture_output=True, text=True)
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    print(json.dumps({"years": args.years, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# bench/bench_forecast.py
+"""24-step recursive forecast: legacy DataFrame loop vs models/forecaster.py.
+
+The legacy path is the pre-vectorisation predict_next_24h loop (per-step
+.loc writes, backwards .dropna() scans, three single-row predict calls),
+kept here as the reference for both timing and numerical agreement.
+    python bench/bench_forecast.py [--dir models/artifacts]
+"""
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from bench.synthetic import make_features
+from models import bundle, forecaster
+
+TARGET = "price_eur_mwh"
+QS = (10, 50, 90)
+
+
+def legacy_forecast(hist: pd.DataFrame, models: dict, features: list[str]) -> pd.DataFrame:
+    last_ts = hist.index.max()
+    start_future = last_ts + pd.Timedelta(hours=1)
+    future_idx = pd.date_range(start_future, periods=24, freq="1h", tz="UTC")
+    cal = forecaster.calendar_frame(start_future, 24)
+    fut = pd.DataFrame(index=future_idx)
+    for col in ["hour", "dow", "is_weekend", "is_holiday_de"]:
+        if col in hist.columns:
+            fut[col] = cal[col]
+    last28 = hist.loc[hist.index >= hist.index.max() - pd.Timedelta(days=28)]
+    prof = last28.copy()
+    prof.index = prof.index.tz_convert("Europe/Berlin")
+    hour_mean = prof.groupby(prof.index.hour)[["load_mw", "wind_mw", "solar_mw"]].mean()
+    for ts in future_idx:
+        h = ts.tz_convert("Europe/Berlin").hour
+        for c in ["load_mw", "wind_mw", "solar_mw"]:
+            if c in hist.columns and h in hour_mean.index:
+                fut.loc[ts, c] = hour_mean.loc[h, c]
+    den = fut.get("load_mw", pd.Series(index=fut.index)).replace(0, np.nan)
+    fut["renewables_share"] = (fut.get("wind_mw", 0).fillna(0) + fut.get("solar_mw", 0).fillna(0)) / den
+    work = pd.concat([hist.copy(), fut], axis=0).sort_index()
+
+    def set_lags_rollings(ts):
+        for col in [TARGET, "load_mw"]:
+            for lag in (1, 24, 48, 168):
+                work.loc[ts, f"{col}_lag{lag}"] = work[col].get(ts - pd.Timedelta(hours=lag), np.nan)
+            for w in (24, 168):
+                last = work[col].loc[:ts - pd.Timedelta(hours=1)].tail(w)
+                work.loc[ts, f"{col}_roll{w}_mean"] = last.mean() if len(last) > 0 else np.nan
+
+    rows = []
+    for ts in future_idx:
+        set_lags_rollings(ts)
+        for c in ["hour", "dow", "is_weekend", "is_holiday_de", "renewables_share", "load_mw", "wind_mw", "solar_mw"]:
+            if c in work.columns and pd.isna(work.loc[ts, c]):
+                prev = work[c].loc[:ts].dropna()
+                work.loc[ts, c] = prev.iloc[-1] if not prev.empty else 0.0
+        X_row = work.loc[[ts]].reindex(columns=features).astype(float)
+        y = {q: float(models[q].predict(X_row)[0]) for q in QS}
+        work.loc[ts, TARGET] = y[50]
+        rows.append({"ts_utc": ts, **{f"q{q}": y[q] for q in QS}})
+    return pd.DataFrame(rows).set_index("ts_utc")
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return out, min(times)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dir", default="models/artifacts")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    hist = make_features(years=0.5)
+    for c in hist.select_dtypes(include=["bool"]).columns:
+        hist[c] = hist[c].astype(int)
+    features = [c for c in hist.columns if c != TARGET]
+
+    legacy_models = {}
+    for q in QS:
+        m = xgb.XGBRegressor()
+        m.load_model((Path(args.dir) / f"xgb_q{q}.json").as_posix())
+        legacy_models[q] = m
+    models = bundle.Bundle({q: m.get_booster() for q, m in legacy_models.items()}, features, {})
+
+    old, t_old = best_of(lambda: legacy_forecast(hist, legacy_models, features), args.repeat)
+    ctx = forecaster.make_context(hist)
+    new, t_new = best_of(lambda: forecaster.forecast(models, features, ctx)[0], args.repeat * 10)
+    _, t_ctx = best_of(lambda: forecaster.make_context(hist), args.repeat)
+
+    print(json.dumps({
+        "legacy_ms": round(1000 * t_old, 1),
+        "vectorized_ms": round(1000 * t_new, 2),
+        "vectorized_with_context_ms": round(1000 * (t_new + t_ctx), 2),
+        "max_abs_diff_eur_mwh": float(np.max(np.abs(old.to_numpy() - new))),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
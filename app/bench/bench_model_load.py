@@ -0,0 +1,63 @@
+# bench/bench_model_load.py
+"""Cold start of the fan prediction path: 19 JSON files vs one bundle.
+
+    python bench/bench_model_load.py [--dir models/artifacts]
+"""
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+import xgboost as xgb
+
+from models import bundle
+
+QUANTILES = list(range(5, 100, 5))
+
+
+def load_json(src: Path):
+    models = {}
+    for q in QUANTILES:
+        m = xgb.XGBRegressor()
+        m.load_model((src / f"xgb_q{q}.json").as_posix())
+        models[q] = m
+    return models
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dir", default="models/artifacts")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    src = Path(args.dir)
+
+    json_models = load_json(src)
+    n_feat = json_models[50].get_booster().num_features()
+    x = np.random.default_rng(0).normal(size=(1, n_feat)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = bundle.write_bundle(Path(tmp) / bundle.BUNDLE_FILE,
+                                   {q: m.get_booster() for q, m in json_models.items()},
+                                   json_models[50].get_booster().feature_names or [])
+        res = {"n_models": len(QUANTILES), "bundle_mb": round(path.stat().st_size / 2**20, 2)}
+        t_json, t_bundle = [], []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            ms = load_json(src)
+            [m.predict(x) for m in ms.values()]
+            t_json.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            b = bundle.load_bundle(path)
+            b.predict(x)
+            t_bundle.append(time.perf_counter() - t0)
+        res["json_cold_start_ms"] = round(1000 * min(t_json), 1)
+        res["bundle_cold_start_ms"] = round(1000 * min(t_bundle), 1)
+    print(json.dumps(res, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# bench/bench_serve.py
+"""Single-row scoring under concurrency: one predict per request vs micro-batching.
+
+    python bench/bench_serve.py [--clients 1 8 64] [--workers N]
+
+In-process (no HTTP), so the numbers isolate queueing + model time.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from models import bundle
+from serve.batcher import MicroBatcher
+
+QUANTILES = list(range(5, 100, 5))
+
+
+async def _load(submit, n_feat, clients, duration):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(clients, 1, n_feat)).astype(np.float32)
+    done, lat = 0, []
+    stop = time.perf_counter() + duration
+
+    async def client(i):
+        nonlocal done
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            await submit(x[i])
+            lat.append(time.perf_counter() - t0)
+            done += 1
+
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    lat = np.array(lat) * 1000
+    return {"rps": round(done / duration, 1),
+            "p50_ms": round(float(np.percentile(lat, 50)), 2),
+            "p99_ms": round(float(np.percentile(lat, 99)), 2)}
+
+
+async def run(models, clients, duration, workers, max_wait_ms):
+    n_feat = len(models.features) or next(iter(models.boosters.values())).num_features()
+
+    async def unbatched(x):
+        return await asyncio.to_thread(models.predict, x)
+
+    res = {"unbatched": await _load(unbatched, n_feat, clients, duration)}
+    mb = MicroBatcher(models.predict, max_wait_ms=max_wait_ms, workers=workers)
+    await mb.start()
+    res["batched"] = await _load(mb.submit, n_feat, clients, duration)
+    s = mb.stats.summary()
+    res["batched"]["mean_batch_requests"] = round(s["requests"] / max(s["batches"], 1), 1)
+    await mb.stop()
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 8, 64])
+    ap.add_argument("--duration", type=float, default=3.0)
+    ap.add_argument("--workers", type=int, default=None, help="Batch workers (default: cores)")
+    ap.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = ap.parse_args()
+
+    models = bundle.load_quantiles(QUANTILES, nthread=1)
+    out = {c: asyncio.run(run(models, c, args.duration, args.workers, args.max_wait_ms))
+           for c in args.clients}
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+# bench/suite.py
+"""End-to-end benchmark of the pipeline scripts on synthetic multi-year data.
+
+For each zone a scratch tree gets deterministic raw data (bench/synthetic.py),
+then every stage runs there as its own `python script.py`, as in the DAG.
+Wall time, CPU time and peak RSS come from the child's rusage; rows and
+bytes come from its telemetry row (pipeline/telemetry.py). Results go to
+models/artifacts/bench/<label>-<time>.json and are compared with the stored
+baseline for the same dataset label (bench/baseline.json). A stage slower or
+bigger than baseline by more than the tolerance is a regression (exit 1).
+
+DB stages (migrate, load_features, save_predictions) need --db. They run
+against a scratch database (epfd_bench, created and dropped) on the
+POSTGRES_* server, e.g. the compose `postgres` service.
+
+    python -m bench.suite --years 1 [--freq 15min] [--zones 2] [--db] [--repeat 3]
+    python -m bench.suite --years 5 --save-baseline        # after an intended change
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.synthetic import ZONES, write_raw
+
+APP = Path(__file__).resolve().parents[1]
+OUT = Path("models/artifacts/bench")
+BASELINE = APP / "bench" / "baseline.json"
+BENCH_DB = "epfd_bench"
+
+
+@dataclass(frozen=True)
+class Stage:
+    script: str
+    args: tuple[str, ...] = ()
+    db: bool = False
+
+
+STAGES = {
+    "build_features": Stage("features/build_features.py"),
+    "migrate": Stage("db/migrations.py", db=True),
+    "load_features": Stage("db/load_features_to_pg.py", db=True),
+    "train_baseline": Stage("models/train_baseline.py", ("--force",)),
+    "train_quantiles_full": Stage("models/train_quantiles_full.py", ("--force",)),
+    "conformal": Stage("models/conformal.py", ("--rebuild",)),
+    "predict_next_24h": Stage("models/predict_next_24h.py"),
+    "predict_fan": Stage("models/predict_fan.py"),
+    "save_predictions": Stage("db/save_predictions.py", db=True),
+    "train_direct": Stage("models/train_direct.py", ("--force", "--stride", "4")),
+}
+DEFAULT = tuple(s for s in STAGES if s != "train_direct")      # direct: 24x the quantile fits
+
+
+def pg_admin(sql: str) -> None:
+    """Run one statement on the server's maintenance database (autocommit)."""
+    import psycopg2
+    conn = psycopg2.connect(host=os.getenv("POSTGRES_HOST", "epfd-postgres"), dbname="postgres",
+                            user=os.getenv("POSTGRES_USER", "epfd"),
+                            password=os.getenv("POSTGRES_PASSWORD", "epfd"), connect_timeout=5)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(sql)
+    conn.close()
+
+
+def run_stage(name: str, work: Path, env: dict, log) -> dict:
+    """One subprocess; wall from the parent, CPU and peak RSS from the child's rusage."""
+    st = STAGES[name]
+    metrics = work / "models" / "artifacts" / "pipeline_metrics.jsonl"
+    seen = metrics.stat().st_size if metrics.exists() else 0
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, str(APP / st.script), *st.args], cwd=work, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+    _, status, ru = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    out = {"wall_s": round(time.perf_counter() - t0, 4),
+           "cpu_s": round(ru.ru_utime + ru.ru_stime, 4),
+           "peak_rss_mb": round(ru.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+           "ok": proc.returncode == 0}
+    if metrics.exists() and metrics.stat().st_size > seen:
+        with open(metrics) as f:
+            f.seek(seen)
+            row = json.loads(f.read().splitlines()[-1])
+        out.update({"stage_wall_s": round(row["wall_s"], 4), "rows_in": row["rows_in"],
+                    "rows_out": row["rows_out"], "bytes_read": row["bytes_read"],
+                    "bytes_written": row["bytes_written"]})
+    return out
+
+
+def best(samples: list[dict]) -> dict:
+    """Fastest wall / CPU and largest RSS over repeats; the samples are kept."""
+    out = dict(samples[0])
+    for k in ("wall_s", "cpu_s", "stage_wall_s"):
+        if k in out:
+            out[k] = min(s[k] for s in samples)
+    out["peak_rss_mb"] = max(s["peak_rss_mb"] for s in samples)
+    out["ok"] = all(s["ok"] for s in samples)
+    out["samples"] = [s["wall_s"] for s in samples]
+    return out
+
+
+def run_zone(zone: int, args, stages, root: Path, db: str | None) -> dict:
+    work = root / ZONES[zone]
+    t0 = time.perf_counter()
+    rows = write_raw(work, args.years, args.seed, args.freq, zone)
+    print(f"[{ZONES[zone]}] synthetic raw: {sum(rows.values()):,} rows "
+          f"in {time.perf_counter() - t0:.1f}s")
+    env = {**os.environ, "PYTHONPATH": str(APP), "EPFD_TELEMETRY": "file",
+           "PIPELINE_RUN_ID": f"bench-{ZONES[zone]}-{os.getpid()}"}
+    if db:
+        env["POSTGRES_DB"] = db
+    if args.profile:
+        env.update(EPFD_PROFILE=args.profile, EPFD_PROFILE_DIR=str(work / "profiles"))
+    (work / "logs").mkdir(exist_ok=True)
+    results = {}
+    for name in stages:
+        if STAGES[name].db and not db:
+            results[name] = {"skipped": "no --db"}
+            continue
+        with open(work / "logs" / f"{name}.log", "a") as log:
+            r = best([run_stage(name, work, env, log) for _ in range(args.repeat)])
+        results[name] = r
+        print(f"[{ZONES[zone]}] {name:<22} {r['wall_s']:8.2f}s wall {r['cpu_s']:8.2f}s cpu "
+              f"{r['peak_rss_mb']:8.0f} MB" + ("" if r["ok"] else f"  FAILED (see {log.name})"))
+        if not r["ok"]:
+            break           # later stages need this one's outputs
+    return {"raw_rows": rows, "stages": results}
+
+
+def label(args) -> str:
+    return f"{args.years:g}y-{args.freq}-{args.zones}z"
+
+
+def environment() -> dict:
+    import numpy, pandas, xgboost
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP,
+                             capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        sha = None
+    return {"git": sha, "python": platform.python_version(), "machine": platform.machine(),
+            "host": platform.node(), "cpus": os.cpu_count(), "pandas": pandas.__version__,
+            "numpy": numpy.__version__, "xgboost": xgboost.__version__}
+
+
+def compare(result: dict, base: dict, tol: float, min_s: float, min_mb: float) -> list[dict]:
+    """Stages slower (wall) or bigger (peak RSS) than baseline by more than tol, ignoring tiny deltas."""
+    regressions = []
+    for zone, zr in result["zones"].items():
+        for name, r in zr["stages"].items():
+            b = base.get("zones", {}).get(zone, {}).get("stages", {}).get(name)
+            if not b or "wall_s" not in b or "wall_s" not in r:
+                continue
+            for key, floor in (("wall_s", min_s), ("peak_rss_mb", min_mb)):
+                delta = r[key] - b[key]
+                r.setdefault("vs_baseline", {})[key] = round(r[key] / b[key], 3) if b[key] else None
+                if delta > floor and r[key] > b[key] * (1 + tol):
+                    regressions.append({"zone": zone, "stage": name, "metric": key,
+                                        "baseline": b[key], "now": r[key]})
+    return regressions
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--years", type=float, default=1, help="History span (1, 5, 20, ...)")
+    ap.add_argument("--freq", default="1h", help="Raw resolution: 1h or 15min")
+    ap.add_argument("--zones", type=int, default=1, choices=range(1, len(ZONES) + 1))
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--stages", default=",".join(DEFAULT), help=f"Comma list from: {', '.join(STAGES)}")
+    ap.add_argument("--repeat", type=int, default=1, help="Runs per stage; best wall time is kept")
+    ap.add_argument("--db", action="store_true", help=f"Run DB stages in a scratch {BENCH_DB} database")
+    ap.add_argument("--profile", default=None, help="EPFD_PROFILE modes for every stage (e.g. mem)")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline for its label")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown / growth")
+    ap.add_argument("--min-seconds", type=float, default=0.5, help="Ignore wall-time deltas below this")
+    ap.add_argument("--min-mb", type=float, default=32, help="Ignore peak-RSS deltas below this")
+    ap.add_argument("--keep", action="store_true", help="Keep the scratch trees (logs, outputs)")
+    ap.add_argument("--out", default=None)
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise SystemExit(f"Unknown stages {unknown}; have {list(STAGES)}")
+    db = None
+    if args.db and any(STAGES[s].db for s in stages):
+        try:
+            pg_admin(f"DROP DATABASE IF EXISTS {BENCH_DB}")
+            pg_admin(f"CREATE DATABASE {BENCH_DB}")
+        except Exception as e:
+            raise SystemExit(f"--db: cannot create {BENCH_DB} on POSTGRES_HOST: {e}")
+        db = BENCH_DB
+    root = Path(tempfile.mkdtemp(prefix="epfd-bench-"))
+    started = datetime.now(timezone.utc)
+    try:
+        zones = {}
+        for z in range(args.zones):
+            zones[ZONES[z]] = run_zone(z, args, stages, root, db)
+            if db and z + 1 < args.zones:        # each zone loads into an empty database
+                pg_admin(f"DROP DATABASE IF EXISTS {BENCH_DB}")
+                pg_admin(f"CREATE DATABASE {BENCH_DB}")
+    finally:
+        if db:
+            pg_admin(f"DROP DATABASE IF EXISTS {BENCH_DB}")
+        if args.keep:
+            print("Scratch trees kept in", root)
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    result = {"label": label(args), "started_at": started.isoformat(),
+              "dataset": {"years": args.years, "freq": args.freq, "zones": args.zones, "seed": args.seed},
+              "stages": stages, "repeat": args.repeat, "environment": environment(), "zones": zones}
+    base_path = Path(args.baseline)
+    baselines = json.loads(base_path.read_text()) if base_path.exists() else {}
+    base = baselines.get(result["label"])
+    regressions = compare(result, base, args.tolerance, args.min_seconds, args.min_mb) if base else []
+    result["baseline"] = base and {"git": base["environment"].get("git"), "started_at": base["started_at"]}
+    result["regressions"] = regressions
+
+    out = Path(args.out) if args.out else OUT / f"{result['label']}-{started:%Y%m%dT%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+    print("Saved:", out)
+    failed = [f"{z}/{n}" for z, zr in zones.items() for n, r in zr["stages"].items() if r.get("ok") is False]
+    if args.save_baseline:
+        if failed:
+            raise SystemExit(f"Not saving a baseline with failed stages: {', '.join(failed)}")
+        baselines[result["label"]] = {k: v for k, v in result.items() if k not in ("baseline", "regressions")}
+        base_path.write_text(json.dumps(baselines, indent=2) + "\n")
+        print("Saved baseline:", base_path, f"[{result['label']}]")
+    elif base is None:
+        print(f"No baseline for {result['label']} in {base_path}; store one with --save-baseline.")
+    for r in regressions:
+        print(f"REGRESSION {r['zone']}/{r['stage']} {r['metric']}: {r['baseline']} -> {r['now']}")
+    if failed:
+        raise SystemExit(f"Failed stages: {', '.join(failed)}")
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
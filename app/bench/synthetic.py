@@ -0,0 +1,82 @@
+# bench/synthetic.py
+from __future__ import annotations
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from features.build_features import add_calendar, add_lags_rollings, write_partitions
+
+
+ZONES = ("DE_LU", "FR", "NL", "AT", "PL", "CZ", "BE", "DK1")    # labels; the shapes are synthetic
+
+
+def make_raw(years: float = 1, seed: int = 0, end="2025-01-01", freq: str = "1h",
+             zone: int = 0) -> pd.DataFrame:
+    """Deterministic price/load/wind/solar with daily + weekly + seasonal shape.
+
+    freq is "1h" or a sub-hourly step such as "15min". Each zone gets its own
+    noise stream, size and daily phase; zone 0 at 1h is the original series.
+    """
+    rng = np.random.default_rng(seed + 1000 * zone)
+    per_h = int(pd.Timedelta("1h") / pd.Timedelta(freq))
+    n = int(years * 365 * 24 * per_h)
+    idx = pd.date_range(end=pd.Timestamp(end, tz="UTC"), periods=n, freq=freq, name="ts_utc")
+    t = np.arange(n) / per_h if per_h > 1 else np.arange(n)      # hours
+    day = 2 * np.pi * (t % 24) / 24 - 0.2 * zone
+    season = 2 * np.pi * t / (365 * 24)
+    scale = 1.0 / (1 + 0.5 * zone)
+    load = scale * (55_000 + 8_000 * np.sin(day - 1.5) - 4_000 * ((t // 24) % 7 >= 5)
+                    + 3_000 * np.cos(season)) + rng.normal(0, 1_500 * scale, n)
+    solar = np.clip(12_000 * scale * np.sin(day - np.pi / 2) * (1 + 0.6 * np.sin(season - np.pi / 2)),
+                    0, None)
+    walk = np.cumsum(rng.normal(0, 600 / np.sqrt(per_h), n)) % 12_000
+    wind = np.clip(scale * (15_000 + 10_000 * np.cos(season) + walk), 0, None)
+    price = 40 + 0.0015 * (load - wind - solar) / scale + rng.normal(0, 8, n)
+    return pd.DataFrame({"price_eur_mwh": price, "load_mw": load,
+                         "wind_mw": wind, "solar_mw": solar}, index=idx)
+
+
+def write_raw(root: Path, years: float = 1, seed: int = 0, freq: str = "1h", zone: int = 0,
+              end="2025-01-01") -> dict[str, int]:
+    """data/raw/ under root in the layout features/build_features.py reads.
+
+    Like production: OPSD (hourly) holds the history, SMARD load/wind/solar
+    and ENTSO-E prices at `freq` cover the last year and overlap it by 90
+    days, so the precedence merge and the hourly resample both do real work.
+    Returns rows per file.
+    """
+    raw_dir = root / "data" / "raw"
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    df = make_raw(years, seed, end, freq, zone).reset_index()
+    recent_from = df["ts_utc"].iloc[-1] - pd.Timedelta(days=min(365, years * 365))
+    hourly = df.set_index("ts_utc").resample("1h").mean().reset_index()
+    opsd = hourly[hourly["ts_utc"] < recent_from + pd.Timedelta(days=90)]
+    recent = df[df["ts_utc"] >= recent_from]
+    files = {"opsd_bootstrap": opsd,
+             "entsoe_day_ahead": recent[["ts_utc", "price_eur_mwh"]],
+             "smard_load": recent[["ts_utc", "load_mw"]],
+             "smard_gen_wind": recent[["ts_utc", "wind_mw"]],
+             "smard_gen_solar": recent[["ts_utc", "solar_mw"]]}
+    for stem, part in files.items():
+        part.to_parquet(raw_dir / f"{stem}.parquet", index=False)
+    return {stem: len(part) for stem, part in files.items()}
+
+
+def make_features(years: float = 1, seed: int = 0, end="2025-01-01") -> pd.DataFrame:
+    """Same feature layout as features/build_features.py, on synthetic raw data."""
+    df = make_raw(years, seed, end)
+    df["renewables_share"] = (df["wind_mw"] + df["solar_mw"]) / df["load_mw"]
+    df = add_calendar(df)
+    for c in ["price_eur_mwh", "load_mw"]:
+        df = add_lags_rollings(df, c)
+    return df.dropna().copy()
+
+
+def write_features(root: Path, years: float = 1, seed: int = 0) -> tuple[Path, Path]:
+    """Write hourly.parquet + hourly_parts/ under root; returns both paths."""
+    root.mkdir(parents=True, exist_ok=True)
+    df = make_features(years, seed)
+    single = root / "hourly.parquet"
+    df.to_parquet(single)
+    write_partitions(df, root / "hourly_parts")
+    return single, root / "hourly_parts"
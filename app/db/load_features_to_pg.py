@@ -5,6 +5,11 @@ import pandas as pd
 import psycopg2
 from psycopg2.extras import execute_values
 
+from db import rollups
+from pipeline import profiling, telemetry
+
+execute_values = profiling.timed("execute_values")(execute_values)
+
 # Config from env (docker-compose .env)
 PG_USER = os.getenv("POSTGRES_USER", "epfd")
 PG_PASS = os.getenv("POSTGRES_PASSWORD", "epfd")
@@ -14,11 +19,14 @@ PG_PORT = int(os.getenv("POSTGRES_PORT", "5432"))
 
 PARQUET_PATH = Path("data/features/hourly.parquet")
 
-def main():
-    if not PARQUET_PATH.exists():
-        raise SystemExit(f"Missing {PARQUET_PATH}. Run features/build_features.py first.")
-
-    df = pd.read_parquet(PARQUET_PATH)
+@telemetry.instrument("load_features_to_pg")
+def main(df=None):
+    """Upsert the feature frame (default: read from PARQUET_PATH)."""
+    if df is None:
+        if not PARQUET_PATH.exists():
+            raise SystemExit(f"Missing {PARQUET_PATH}. Run features/build_features.py first.")
+        df = pd.read_parquet(PARQUET_PATH)
+        telemetry.current().read(PARQUET_PATH)
     required = [
         "price_eur_mwh","load_mw","wind_mw",
         "solar_mw","renewables_share","hour","dow","is_weekend"
@@ -51,7 +59,14 @@ def main():
       renewables_share = EXCLUDED.renewables_share,
       hour = EXCLUDED.hour,
       dow = EXCLUDED.dow,
-      is_weekend = EXCLUDED.is_weekend;
+      is_weekend = EXCLUDED.is_weekend
+    WHERE (energy.features_hourly.price_eur_mwh, energy.features_hourly.load_mw,
+           energy.features_hourly.wind_mw, energy.features_hourly.solar_mw,
+           energy.features_hourly.renewables_share)
+          IS DISTINCT FROM
+          (EXCLUDED.price_eur_mwh, EXCLUDED.load_mw, EXCLUDED.wind_mw,
+           EXCLUDED.solar_mw, EXCLUDED.renewables_share)
+    RETURNING ts_utc;
     '''
 
     conn = psycopg2.connect(
@@ -60,9 +75,14 @@ def main():
     )
     conn.autocommit = True
     with conn.cursor() as cur:
-        execute_values(cur, sql, rows, page_size=10000)
+        # only inserted/changed rows come back, and only their rollup buckets are rebuilt
+        changed = execute_values(cur, sql, rows, page_size=10000, fetch=True)
+        buckets = rollups.refresh(cur, [r[0] for r in changed])
     conn.close()
-    print(f"Upserted {len(rows)} rows into energy.features_hourly.")
+    t = telemetry.current()
+    t.rows_in, t.rows_out = len(rows), len(changed)
+    print(f"Upserted {len(rows)} rows into energy.features_hourly "
+          f"({len(changed)} new or changed, {buckets} rollup buckets refreshed).")
 
 if __name__ == "__main__":
     main()
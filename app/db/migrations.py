@@ -1,7 +1,10 @@
 # db/migrations.py
 import os
+from pathlib import Path
 import psycopg2
 
+from pipeline import telemetry
+
 DB_HOST = os.getenv("POSTGRES_HOST", "epfd-postgres")
 DB_NAME = os.getenv("POSTGRES_DB", "epfd")
 DB_USER = os.getenv("POSTGRES_USER", "epfd")
@@ -36,8 +39,11 @@ ALTER TABLE energy.features_hourly
 -- Helpful index (safe to re-run)
 CREATE INDEX IF NOT EXISTS idx_features_hourly_ts ON energy.features_hourly (ts_utc);
 """
+ROLLUPS = Path(__file__).with_name("rollups.sql")
+PIPELINE_METRICS = Path(__file__).with_name("pipeline_metrics.sql")
 
 
+@telemetry.instrument("migrations")
 def main():
     conn = psycopg2.connect(
         host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS
@@ -45,6 +51,8 @@ def main():
     conn.autocommit = True
     with conn, conn.cursor() as cur:
         cur.execute(DDL)
+        cur.execute(ROLLUPS.read_text())
+        cur.execute(PIPELINE_METRICS.read_text())
     conn.close()
     print("✅ Migrations applied: schema 'energy' and table 'features_hourly' ensured.")
 
@@ -100,3 +100,9 @@ CREATE INDEX IF NOT EXISTS idx_raw_entsoe_ts ON energy.raw_entsoe_day_ahead_pric
 CREATE INDEX IF NOT EXISTS idx_raw_smard_load_ts ON energy.raw_smard_load(ts_utc);
 CREATE INDEX IF NOT EXISTS idx_raw_smard_wind_ts ON energy.raw_smard_gen_wind(ts_utc);
 CREATE INDEX IF NOT EXISTS idx_raw_smard_solar_ts ON energy.raw_smard_gen_solar(ts_utc);
+
+-- Day/week/month rollups and their refresh function
+\ir rollups.sql
+
+-- Per-stage pipeline telemetry
+\ir pipeline_metrics.sql
@@ -0,0 +1,27 @@
+-- db/pipeline_metrics.sql
+-- One row per pipeline stage execution (pipeline/telemetry.py). run_id groups
+-- the stages of one DAG run or CLI invocation. Safe to re-run.
+
+CREATE SCHEMA IF NOT EXISTS energy;
+
+CREATE TABLE IF NOT EXISTS energy.pipeline_metrics (
+    id              BIGSERIAL PRIMARY KEY,
+    run_id          TEXT NOT NULL,
+    stage           TEXT NOT NULL,
+    started_at      TIMESTAMPTZ NOT NULL,
+    wall_s          DOUBLE PRECISION NOT NULL,
+    cpu_s           DOUBLE PRECISION NOT NULL,
+    peak_rss_mb     DOUBLE PRECISION,
+    rows_in         BIGINT,
+    rows_out        BIGINT,
+    bytes_read      BIGINT,
+    bytes_written   BIGINT,
+    ok              BOOLEAN NOT NULL,
+    error           TEXT,
+    host            TEXT,
+    extra           JSONB NOT NULL DEFAULT '{}'::jsonb
+);
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_metrics_stage_started
+    ON energy.pipeline_metrics (stage, started_at);
+CREATE INDEX IF NOT EXISTS idx_pipeline_metrics_run ON energy.pipeline_metrics (run_id);
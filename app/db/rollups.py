@@ -0,0 +1,44 @@
+# db/rollups.py
+"""Refresh the day/week/month rollup tables defined in db/rollups.sql.
+
+Loaders call refresh() with the timestamps they inserted or changed, so only
+the buckets containing them are recomputed. Run directly to rebuild all.
+"""
+import os
+import psycopg2
+
+from pipeline import telemetry
+
+DB = dict(
+    host=os.getenv("POSTGRES_HOST", "epfd-postgres"),
+    dbname=os.getenv("POSTGRES_DB", "epfd"),
+    user=os.getenv("POSTGRES_USER", "epfd"),
+    password=os.getenv("POSTGRES_PASSWORD", "epfd"),
+)
+
+REBUILD_SQL = """
+SELECT energy.refresh_rollups(ARRAY(
+    SELECT ts_utc FROM energy.features_hourly
+    UNION
+    SELECT ts_utc FROM energy.predictions_hourly))
+"""
+
+
+def refresh(cur, ts) -> int:
+    """Recompute the buckets containing `ts`; returns the number of (grain, bucket) pairs."""
+    ts = list(ts)
+    if not ts:
+        return 0
+    cur.execute("SELECT energy.refresh_rollups(%s::timestamptz[])", (ts,))
+    return cur.fetchone()[0]
+
+
+@telemetry.instrument("rollups")
+def main():
+    with psycopg2.connect(**DB) as conn, conn.cursor() as cur:
+        cur.execute(REBUILD_SQL)
+        print(f"Rebuilt {cur.fetchone()[0]} rollup buckets.")
+
+
+if __name__ == "__main__":
+    main()
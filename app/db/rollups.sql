@@ -0,0 +1,137 @@
+-- db/rollups.sql
+-- Day/week/month summaries of energy.features_hourly and of forecast errors
+-- (energy.predictions_hourly vs actual price), plus hour-of-day price profiles
+-- per month. Buckets are Europe/Berlin calendar periods. The tables are
+-- maintained by energy.refresh_rollups(ts[]), which recomputes only the
+-- buckets containing the given timestamps; the loaders call it with the rows
+-- they inserted or changed. Safe to re-run.
+
+CREATE SCHEMA IF NOT EXISTS energy;
+
+CREATE TABLE IF NOT EXISTS energy.features_rollup (
+    grain               TEXT NOT NULL CHECK (grain IN ('day', 'week', 'month')),
+    bucket              DATE NOT NULL,
+    n                   INTEGER NOT NULL,
+    price_avg           DOUBLE PRECISION,
+    price_min           DOUBLE PRECISION,
+    price_max           DOUBLE PRECISION,
+    price_std           DOUBLE PRECISION,
+    load_avg            DOUBLE PRECISION,
+    wind_avg            DOUBLE PRECISION,
+    solar_avg           DOUBLE PRECISION,
+    renewables_avg      DOUBLE PRECISION,
+    renewables_p10      DOUBLE PRECISION,
+    renewables_p90      DOUBLE PRECISION,
+    refreshed_at        TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (grain, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS energy.forecast_error_rollup (
+    grain               TEXT NOT NULL CHECK (grain IN ('day', 'week', 'month')),
+    bucket              DATE NOT NULL,
+    n                   INTEGER NOT NULL,
+    mae_p50             DOUBLE PRECISION,
+    bias_p50            DOUBLE PRECISION,   -- mean(p50 - actual)
+    rmse_p50            DOUBLE PRECISION,
+    coverage_10_90      DOUBLE PRECISION,
+    width_10_90         DOUBLE PRECISION,
+    refreshed_at        TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (grain, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS energy.price_hour_profile (
+    month               DATE NOT NULL,
+    hour                SMALLINT NOT NULL,  -- Europe/Berlin hour of day
+    n                   INTEGER NOT NULL,
+    price_avg           DOUBLE PRECISION,
+    price_p10           DOUBLE PRECISION,
+    price_p90           DOUBLE PRECISION,
+    renewables_avg      DOUBLE PRECISION,
+    refreshed_at        TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (month, hour)
+);
+
+CREATE TABLE IF NOT EXISTS energy.predictions_hourly (
+  ts_utc       TIMESTAMPTZ PRIMARY KEY,
+  y_p50        DOUBLE PRECISION NOT NULL,
+  y_p10        DOUBLE PRECISION,
+  y_p90        DOUBLE PRECISION,
+  created_at   TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Buckets of the given grain that contain any of ts, with their UTC bounds.
+CREATE OR REPLACE FUNCTION energy.rollup_buckets(g TEXT, ts TIMESTAMPTZ[])
+RETURNS TABLE (bucket DATE, lo TIMESTAMPTZ, hi TIMESTAMPTZ)
+LANGUAGE sql STABLE AS $$
+    SELECT b::date,
+           b AT TIME ZONE 'Europe/Berlin',
+           (b + ('1 ' || g)::interval) AT TIME ZONE 'Europe/Berlin'
+    FROM (SELECT DISTINCT date_trunc(g, t AT TIME ZONE 'Europe/Berlin') AS b
+          FROM unnest(ts) AS t) s
+$$;
+
+CREATE OR REPLACE FUNCTION energy.refresh_rollups(ts TIMESTAMPTZ[])
+RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    g TEXT;
+    touched INTEGER := 0;
+    k INTEGER;
+BEGIN
+    FOREACH g IN ARRAY ARRAY['day', 'week', 'month'] LOOP
+        CREATE TEMP TABLE IF NOT EXISTS _rollup_buckets (bucket DATE, lo TIMESTAMPTZ, hi TIMESTAMPTZ)
+            ON COMMIT DROP;
+        TRUNCATE _rollup_buckets;
+        INSERT INTO _rollup_buckets SELECT * FROM energy.rollup_buckets(g, ts);
+        GET DIAGNOSTICS k = ROW_COUNT;
+        touched := touched + k;
+
+        DELETE FROM energy.features_rollup r
+        USING _rollup_buckets b WHERE r.grain = g AND r.bucket = b.bucket;
+        INSERT INTO energy.features_rollup (grain, bucket, n, price_avg, price_min, price_max,
+            price_std, load_avg, wind_avg, solar_avg, renewables_avg, renewables_p10, renewables_p90)
+        SELECT g, b.bucket, count(*),
+               avg(f.price_eur_mwh), min(f.price_eur_mwh), max(f.price_eur_mwh),
+               stddev_samp(f.price_eur_mwh),
+               avg(f.load_mw), avg(f.wind_mw), avg(f.solar_mw), avg(f.renewables_share),
+               percentile_cont(0.1) WITHIN GROUP (ORDER BY f.renewables_share),
+               percentile_cont(0.9) WITHIN GROUP (ORDER BY f.renewables_share)
+        FROM _rollup_buckets b
+        JOIN energy.features_hourly f ON f.ts_utc >= b.lo AND f.ts_utc < b.hi
+        GROUP BY b.bucket;
+
+        DELETE FROM energy.forecast_error_rollup r
+        USING _rollup_buckets b WHERE r.grain = g AND r.bucket = b.bucket;
+        INSERT INTO energy.forecast_error_rollup (grain, bucket, n, mae_p50, bias_p50, rmse_p50,
+            coverage_10_90, width_10_90)
+        SELECT g, b.bucket, count(*),
+               avg(abs(p.y_p50 - f.price_eur_mwh)),
+               avg(p.y_p50 - f.price_eur_mwh),
+               sqrt(avg((p.y_p50 - f.price_eur_mwh) ^ 2)),
+               avg(CASE WHEN f.price_eur_mwh BETWEEN p.y_p10 AND p.y_p90 THEN 1.0 ELSE 0.0 END)
+                   FILTER (WHERE p.y_p10 IS NOT NULL AND p.y_p90 IS NOT NULL),
+               avg(p.y_p90 - p.y_p10)
+        FROM _rollup_buckets b
+        JOIN energy.predictions_hourly p ON p.ts_utc >= b.lo AND p.ts_utc < b.hi
+        JOIN energy.features_hourly f ON f.ts_utc = p.ts_utc
+        WHERE f.price_eur_mwh IS NOT NULL
+        GROUP BY b.bucket;
+
+        IF g = 'month' THEN
+            DELETE FROM energy.price_hour_profile r
+            USING _rollup_buckets b WHERE r.month = b.bucket;
+            INSERT INTO energy.price_hour_profile (month, hour, n, price_avg, price_p10, price_p90,
+                renewables_avg)
+            SELECT b.bucket, extract(hour FROM f.ts_utc AT TIME ZONE 'Europe/Berlin')::smallint,
+                   count(*), avg(f.price_eur_mwh),
+                   percentile_cont(0.1) WITHIN GROUP (ORDER BY f.price_eur_mwh),
+                   percentile_cont(0.9) WITHIN GROUP (ORDER BY f.price_eur_mwh),
+                   avg(f.renewables_share)
+            FROM _rollup_buckets b
+            JOIN energy.features_hourly f ON f.ts_utc >= b.lo AND f.ts_utc < b.hi
+            GROUP BY 1, 2;
+        END IF;
+    END LOOP;
+    RETURN touched;
+END
+$$;
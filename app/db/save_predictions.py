@@ -3,6 +3,11 @@ import os, psycopg2
 from psycopg2.extras import execute_values
 import pandas as pd
 
+from db import rollups
+from pipeline import profiling, telemetry
+
+execute_values = profiling.timed("execute_values")(execute_values)
+
 DB = dict(
     host=os.getenv("POSTGRES_HOST","epfd-postgres"),
     dbname=os.getenv("POSTGRES_DB","epfd"),
@@ -10,18 +15,25 @@ DB = dict(
     password=os.getenv("POSTGRES_PASSWORD","epfd")
 )
 
-def save_fan(csv_path="models/artifacts/predictions_fan.csv"):
-    df = pd.read_csv(csv_path, parse_dates=["ts_utc"])
-    rows = [(r.ts_utc, r.y_p50, r.get("y_p10"), r.get("y_p90")) for r in df.to_dict("records")]
+@telemetry.instrument("save_predictions")
+def save_fan(csv_path="models/artifacts/predictions_fan.csv", df=None):
+    """Upsert the fan forecast; `df` (index ts_utc, q-columns) skips re-reading the CSV."""
+    df = pd.read_csv(csv_path, parse_dates=["ts_utc"]) if df is None else df.reset_index()
+    df = df.rename(columns={"q10": "y_p10", "q50": "y_p50", "q90": "y_p90"})   # fan CSV columns
+    rows = [(r["ts_utc"], r["y_p50"], r.get("y_p10"), r.get("y_p90")) for r in df.to_dict("records")]
     sql = """
     INSERT INTO energy.predictions_hourly (ts_utc, y_p50, y_p10, y_p90)
     VALUES %s
     ON CONFLICT (ts_utc) DO UPDATE
-      SET y_p50=EXCLUDED.y_p50, y_p10=EXCLUDED.y_p10, y_p90=EXCLUDED.y_p90, created_at=now();
+      SET y_p50=EXCLUDED.y_p50, y_p10=EXCLUDED.y_p10, y_p90=EXCLUDED.y_p90, created_at=now()
+    RETURNING ts_utc;
     """
     with psycopg2.connect(**DB) as conn, conn.cursor() as cur:
-        execute_values(cur, sql, rows, page_size=1000)
-    print(f"Saved {len(rows)} rows to energy.predictions_hourly")
+        saved = execute_values(cur, sql, rows, page_size=1000, fetch=True)
+        buckets = rollups.refresh(cur, [r[0] for r in saved])
+    t = telemetry.current()
+    t.rows_in, t.rows_out = len(rows), len(saved)
+    print(f"Saved {len(rows)} rows to energy.predictions_hourly ({buckets} rollup buckets refreshed)")
 
 if __name__ == "__main__":
     save_fan()
@@ -3,21 +3,52 @@ from pathlib import Path
 import pandas as pd
 import numpy as np
 import holidays
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pipeline import profiling, telemetry
 
 RAW = Path("data/raw"); RAW.mkdir(parents=True, exist_ok=True)
 FEA = Path("data/features"); FEA.mkdir(parents=True, exist_ok=True)
-
-def read_parquet(path: Path, cols, ts="ts_utc"):
-    """Read parquet if exists; normalize timestamp column and return [ts]+cols."""
-    if not path.exists():
-        return pd.DataFrame(columns=[ts] + cols)
+PARTS = RAW / "parts"       # PARTS/<source stem>/<YYYY-MM>.parquet, written by pipeline/backfill.py
+LOOKBACK = pd.Timedelta(days=8)     # raw history needed before a window for the 168h lags/rollings
+
+def month_parts(path: Path, window=None) -> list[Path]:
+    """Monthly backfill partitions of a raw source, limited to the months overlapping window."""
+    files = sorted((PARTS / path.stem).glob("*.parquet"))
+    if window is not None:
+        lo, hi = window
+        first = lo.strftime("%Y-%m") if lo is not None else ""
+        last = (hi - pd.Timedelta(microseconds=1)).strftime("%Y-%m") if hi is not None else "9999"
+        files = [f for f in files if first <= f.stem <= last]
+    return files
+
+def _read_one(path: Path, ts: str) -> pd.DataFrame:
     df = pd.read_parquet(path)
+    telemetry.current().read(path, rows=len(df))
     if ts not in df.columns:
         for c in ["timestamp", "time", "datetime", "ts"]:
             if c in df.columns:
                 df = df.rename(columns={c: ts})
                 break
     df[ts] = pd.to_datetime(df[ts], utc=True)
+    return df
+
+def read_parquet(path: Path, cols, ts="ts_utc", window=None):
+    """Read parquet and its monthly partitions if they exist; normalize timestamp column and return [ts]+cols.
+
+    The file itself wins over partitions for the same timestamp. `window`
+    (lo, hi) keeps lo <= ts < hi (either end may be None).
+    """
+    files = month_parts(path, window) + ([path] if path.exists() else [])
+    if not files:
+        return pd.DataFrame(columns=[ts] + cols)
+    df = pd.concat([_read_one(f, ts) for f in files], ignore_index=True)
+    if len(files) > 1:
+        df = df.drop_duplicates(ts, keep="last")
+    if window is not None:
+        lo, hi = window
+        df = df[((df[ts] >= lo) if lo is not None else True) & ((df[ts] < hi) if hi is not None else True)]
     return df[[ts] + [c for c in cols if c in df.columns]]
 
 def add_calendar(df: pd.DataFrame) -> pd.DataFrame:
@@ -36,6 +67,7 @@ def add_calendar(df: pd.DataFrame) -> pd.DataFrame:
     df["is_holiday_de"] = local_norm.isin(holiday_dates)
     return df
 
+@profiling.timed()
 def add_lags_rollings(df: pd.DataFrame, col: str) -> pd.DataFrame:
     # Lags
     for h in [1, 24, 48, 168]:
@@ -45,21 +77,38 @@ def add_lags_rollings(df: pd.DataFrame, col: str) -> pd.DataFrame:
     df[f"{col}_roll168_mean"] = df[col].rolling(168).mean()
     return df
 
-def main():
+def write_partitions(df: pd.DataFrame, root: Path) -> None:
+    """Write hive-style year=/month= partitions (UTC) so trainers can stream them."""
+    part = df.reset_index()
+    part["year"] = part["ts_utc"].dt.year
+    part["month"] = part["ts_utc"].dt.month
+    table = pa.Table.from_pandas(part, preserve_index=False)
+    pq.write_to_dataset(table, root, partition_cols=["year", "month"],
+                        basename_template="part-{i}.parquet",
+                        existing_data_behavior="delete_matching")
+
+def build(start=None, end=None) -> pd.DataFrame:
+    """Merge the raw sources into the hourly feature frame (index ts_utc).
+
+    With start/end (UTC timestamps), only rows in [start, end) are built, from
+    the raw rows LOOKBACK before start onwards.
+    """
+    window = None if start is None and end is None else (
+        start - LOOKBACK if start is not None else None, end)
     # ---------- TARGET: price (ENTSOE primary, fallback to OPSD) ----------
-    entsoe = read_parquet(RAW / "entsoe_day_ahead.parquet", ["price_eur_mwh"])
+    entsoe = read_parquet(RAW / "entsoe_day_ahead.parquet", ["price_eur_mwh"], window=window)
     opsd   = read_parquet(RAW / "opsd_bootstrap.parquet",
-                          ["price_eur_mwh", "load_mw", "wind_mw", "solar_mw"])
+                          ["price_eur_mwh", "load_mw", "wind_mw", "solar_mw"], window=window)
 
     # Merge price (ENTSO-E takes precedence if overlapping)
     price = opsd[["ts_utc", "price_eur_mwh"]].copy()
     if not entsoe.empty:
-        price = pd.concat([price, entsoe]).sort_values("ts_utc").drop_duplicates("ts_utc", keep="last")
+        price = pd.concat([price, entsoe]).sort_values("ts_utc", kind="stable").drop_duplicates("ts_utc", keep="last")
 
     # ---------- DRIVERS: prefer SMARD over OPSD ----------
-    smard_load = read_parquet(RAW / "smard_load.parquet", ["load_mw"])
-    smard_wind = read_parquet(RAW / "smard_gen_wind.parquet", ["wind_mw"])
-    smard_solar = read_parquet(RAW / "smard_gen_solar.parquet", ["solar_mw"])
+    smard_load = read_parquet(RAW / "smard_load.parquet", ["load_mw"], window=window)
+    smard_wind = read_parquet(RAW / "smard_gen_wind.parquet", ["wind_mw"], window=window)
+    smard_solar = read_parquet(RAW / "smard_gen_solar.parquet", ["solar_mw"], window=window)
 
     # Start with OPSD, then overwrite with SMARD where available (by timestamp)
     load  = opsd[["ts_utc", "load_mw"]].copy()
@@ -67,11 +116,11 @@ def main():
     solar = opsd[["ts_utc", "solar_mw"]].copy()
 
     if not smard_load.empty:
-        load = pd.concat([load, smard_load]).sort_values("ts_utc").drop_duplicates("ts_utc", keep="last")
+        load = pd.concat([load, smard_load]).sort_values("ts_utc", kind="stable").drop_duplicates("ts_utc", keep="last")
     if not smard_wind.empty:
-        wind = pd.concat([wind, smard_wind]).sort_values("ts_utc").drop_duplicates("ts_utc", keep="last")
+        wind = pd.concat([wind, smard_wind]).sort_values("ts_utc", kind="stable").drop_duplicates("ts_utc", keep="last")
     if not smard_solar.empty:
-        solar = pd.concat([solar, smard_solar]).sort_values("ts_utc").drop_duplicates("ts_utc", keep="last")
+        solar = pd.concat([solar, smard_solar]).sort_values("ts_utc", kind="stable").drop_duplicates("ts_utc", keep="last")
 
     # ---------- ALIGN + FEATURE ENGINEERING ----------
     df = price.merge(load, on="ts_utc", how="outer") \
@@ -93,13 +142,29 @@ def main():
             df = add_lags_rollings(df, c)
 
     # Final clean: drop rows needed for lags/rollings; ensure numeric dtypes
-    df = df.dropna().copy()
-
+    df = df.dropna()
+    if start is not None:
+        df = df.loc[df.index >= start]
+    if end is not None:
+        df = df.loc[df.index < end]
+    return df.copy()
+
+def write(df: pd.DataFrame) -> None:
     out = FEA / "hourly.parquet"
     df.to_parquet(out)
+    telemetry.current().wrote(out, rows=len(df))
     print("Saved:", out, "rows:", len(df))
+    write_partitions(df, FEA / "hourly_parts")
+    telemetry.current().wrote(FEA / "hourly_parts")
+    print("Saved partitions:", FEA / "hourly_parts")
+
+@telemetry.instrument("build_features")
+def main():
+    df = build()
+    write(df)
     # Optional: quick peek
     print(df.tail(3))
+    return df
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,12 @@
 # ingestion/fetch_entsoe.py
-import os, io
+import argparse, os, io
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import pandas as pd, requests
 import xml.etree.ElementTree as ET
 
+from pipeline import telemetry
+
 RAW = Path("data/raw"); RAW.mkdir(parents=True, exist_ok=True)
 
 API   = "https://web-api.tp.entsoe.eu/api"
@@ -37,15 +39,27 @@ def fetch_window(start_utc: datetime, end_utc: datetime) -> pd.DataFrame:
                 rows.append({"ts_utc": ts_utc, "price_eur_mwh": price, "currency": currency})
     return pd.DataFrame(rows).sort_values("ts_utc").drop_duplicates("ts_utc")
 
-if __name__ == "__main__":
+@telemetry.instrument("fetch_entsoe")
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--start", help="UTC start YYYY-MM-DD (default: --days before --end)")
+    ap.add_argument("--end", help="UTC end YYYY-MM-DD (default: now)")
+    ap.add_argument("--days", type=int, default=30)
+    args = ap.parse_args(argv)
     if not TOKEN:
         raise SystemExit("Set ENTSOE_TOKEN in .env and pass it into the 'py' container.")
-    end   = pd.Timestamp.utcnow().floor("h").to_pydatetime().replace(tzinfo=timezone.utc)
-    start = end - timedelta(days=30)
+    end = (pd.Timestamp(args.end).tz_localize("UTC") if args.end
+           else pd.Timestamp.utcnow().floor("h")).to_pydatetime().replace(tzinfo=timezone.utc)
+    start = (pd.Timestamp(args.start).tz_localize("UTC").to_pydatetime() if args.start
+             else end - timedelta(days=args.days))
     df = fetch_window(start, end)
     out = RAW / "entsoe_day_ahead.parquet"
     if out.exists():
         old = pd.read_parquet(out)
         df = pd.concat([old, df]).sort_values("ts_utc").drop_duplicates("ts_utc", keep="last")
     df.to_parquet(out, index=False)
+    telemetry.current().wrote(out, rows=len(df))
     print("Saved:", out, "rows:", len(df))
+
+if __name__ == "__main__":
+    main()
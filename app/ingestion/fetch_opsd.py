@@ -1,7 +1,11 @@
 # ingestion/fetch_opsd.py
 from pathlib import Path
+import argparse
+import time
 import pandas as pd
 
+from pipeline import telemetry
+
 RAW = Path("data/raw")
 RAW.mkdir(parents=True, exist_ok=True)
 URL = "https://data.open-power-system-data.org/time_series/latest/time_series_60min_singleindex.csv"
@@ -16,7 +20,19 @@ def pick(cols, preferred_list):
     return None
 
 
-def main():
+@telemetry.instrument("fetch_opsd")
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--max-age-days", type=float, default=None,
+                    help="Skip the download if the saved file is younger than this")
+    args = ap.parse_args(argv)
+    path = RAW / "opsd_bootstrap.parquet"
+    if args.max_age_days is not None and path.exists():
+        age = (time.time() - path.stat().st_mtime) / 86400
+        if age < args.max_age_days:
+            print(f"{path} is {age:.1f} days old; not re-downloading.")
+            return
+
     print(
         f"Downloading OPSD time series from:\n  {URL}\n(This may take a moment...)")
     df = pd.read_csv(URL, parse_dates=["utc_timestamp"])
@@ -62,8 +78,8 @@ def main():
         out[c] = pd.to_numeric(out[c], errors="coerce")
 
     out = out.sort_values("ts_utc")
-    path = RAW / "opsd_bootstrap.parquet"
     out.to_parquet(path, index=False)
+    telemetry.current().wrote(path, rows=len(out))
     print("Saved:", path, "rows:", len(out))
 
 
@@ -7,10 +7,13 @@ import pandas as pd
 import requests
 import yaml
 
+from pipeline import profiling, telemetry
+
 RAW = Path("data/raw")
 RAW.mkdir(parents=True, exist_ok=True)
 BASE = "https://www.smard.de/app/chart_data"
 Resolution = Literal["quarterhour", "hour", "day", "week", "month", "year"]
+SERIES = ("load", "wind", "solar")   # one output parquet each; fetched independently
 
 
 def to_utc(ts) -> pd.Timestamp:
@@ -63,13 +66,15 @@ def fetch_one_file(filter_id: int, region: str, resolution: Resolution, ts: int)
     return df[["ts_utc", "value"]]
 
 
+@profiling.timed()
 def fetch_series(filter_id: int, region: str, resolution: Resolution,
                  start=None, end=None) -> pd.DataFrame:
     timestamps = fetch_index(filter_id, region, resolution)
-    # index timestamps are epoch ms; filter by range if provided
+    # index timestamps are epoch ms, each the start of one chunk file; filter by range if provided
     if start is not None:
         start_ms = int(to_utc(start).timestamp() * 1000)   # <-- changed
-        timestamps = [t for t in timestamps if t >= start_ms]
+        covering = max((t for t in timestamps if t <= start_ms), default=None)
+        timestamps = [t for t in timestamps if t >= start_ms or t == covering]
     if end is not None:
         end_ms = int(to_utc(end).timestamp() * 1000)       # <-- changed
         timestamps = [t for t in timestamps if t <= end_ms]
@@ -81,6 +86,11 @@ def fetch_series(filter_id: int, region: str, resolution: Resolution,
         return pd.DataFrame(columns=["ts_utc", "value"])
     out = pd.concat(parts, ignore_index=True).sort_values(
         "ts_utc").drop_duplicates("ts_utc")
+    # chunks overhang the window; keep start <= ts_utc <= end
+    if start is not None:
+        out = out[out["ts_utc"] >= to_utc(start)]
+    if end is not None:
+        out = out[out["ts_utc"] <= to_utc(end)]
     return out
 
 
@@ -95,7 +105,8 @@ def aggregate_to_hourly(df: pd.DataFrame, colname: str) -> pd.DataFrame:
     return g
 
 
-def main():
+@telemetry.instrument("fetch_smard")
+def main(argv=None):
     cfg = load_cfg()
     region = cfg.get("region", "DE")
     resolution_cfg = cfg.get("resolution", "hour")
@@ -110,7 +121,13 @@ def main():
                     help="If set, only fetch roughly last N years")
     ap.add_argument("--save-qh", action="store_true",
                     help="When using quarterhour, also save raw quarter-hour Parquets")
-    args = ap.parse_args()
+    ap.add_argument("--series", default=",".join(SERIES),
+                    help=f"Comma list of {', '.join(SERIES)} (the DAG runs one task per series)")
+    args = ap.parse_args(argv)
+    series = [s.strip() for s in args.series.split(",") if s.strip()]
+    unknown = [s for s in series if s not in SERIES]
+    if unknown:
+        raise SystemExit(f"Unknown series {unknown}; have {list(SERIES)}")
 
     # Resolve time window
     start_ts = pd.Timestamp(args.start).tz_localize(
@@ -124,26 +141,41 @@ def main():
         start_ts = start_ts or approx_start
 
     res: Resolution = "quarterhour" if args.resolution == "quarterhour" else "hour"
-    use_qh = (res == "quarterhour")
 
-    # -------- Load (total consumption)
+    if "load" in series:
+        save_load(ids, region, res, start_ts, end_ts, args.save_qh)
+    if "wind" in series:
+        save_wind(ids, region, res, start_ts, end_ts, args.save_qh)
+    if "solar" in series:
+        save_solar(ids, region, res, start_ts, end_ts, args.save_qh)
+
+
+def save_load(ids, region, res, start_ts, end_ts, save_qh=False, out=None):
+    """Load (total consumption)."""
+    use_qh = (res == "quarterhour")
     load_raw = fetch_series(ids["load_actual"], region, res, start_ts, end_ts)
     if use_qh:
-        if args.save_qh:
+        if save_qh:
             load_raw.rename(columns={"value": "load_mw"}).to_parquet(
                 RAW / "smard_load_qh.parquet", index=False)
         load_df = aggregate_to_hourly(load_raw, "load_mw")
     else:
         load_df = load_raw.rename(columns={"value": "load_mw"})
-    load_df.to_parquet(RAW / "smard_load.parquet", index=False)
-    print("Saved:", RAW / "smard_load.parquet", "rows:", len(load_df))
+    out = out or RAW / "smard_load.parquet"
+    load_df.to_parquet(out, index=False)
+    telemetry.current().wrote(out, rows=len(load_df))
+    print("Saved:", out, "rows:", len(load_df))
+    return load_df
+
 
-    # -------- Wind = onshore + offshore
+def save_wind(ids, region, res, start_ts, end_ts, save_qh=False, out=None):
+    """Wind = onshore + offshore."""
+    use_qh = (res == "quarterhour")
     wind_on_raw = fetch_series(
         ids["wind_onshore"],  region, res, start_ts, end_ts)
     wind_off_raw = fetch_series(
         ids["wind_offshore"], region, res, start_ts, end_ts)
-    if use_qh and args.save_qh:
+    if use_qh and save_qh:
         wind_on_raw.rename(columns={"value": "wind_on_mw"}).to_parquet(
             RAW / "smard_wind_on_qh.parquet", index=False)
         wind_off_raw.rename(columns={"value": "wind_off_mw"}).to_parquet(
@@ -157,18 +189,27 @@ def main():
     wind["wind_mw"] = wind.get("wind_on_mw", 0).fillna(
         0) + wind.get("wind_off_mw", 0).fillna(0)
     wind = wind[["ts_utc", "wind_mw"]]
-    wind.to_parquet(RAW / "smard_gen_wind.parquet", index=False)
-    print("Saved:", RAW / "smard_gen_wind.parquet", "rows:", len(wind))
+    out = out or RAW / "smard_gen_wind.parquet"
+    wind.to_parquet(out, index=False)
+    telemetry.current().wrote(out, rows=len(wind))
+    print("Saved:", out, "rows:", len(wind))
+    return wind
 
-    # -------- Solar PV
+
+def save_solar(ids, region, res, start_ts, end_ts, save_qh=False, out=None):
+    """Solar PV."""
+    use_qh = (res == "quarterhour")
     solar_raw = fetch_series(ids["solar_pv"], region, res, start_ts, end_ts)
-    if use_qh and args.save_qh:
+    if use_qh and save_qh:
         solar_raw.rename(columns={"value": "solar_mw"}).to_parquet(
             RAW / "smard_gen_solar_qh.parquet", index=False)
     solar_df = aggregate_to_hourly(solar_raw, "solar_mw") if use_qh else solar_raw.rename(
         columns={"value": "solar_mw"})
-    solar_df.to_parquet(RAW / "smard_gen_solar.parquet", index=False)
-    print("Saved:", RAW / "smard_gen_solar.parquet", "rows:", len(solar_df))
+    out = out or RAW / "smard_gen_solar.parquet"
+    solar_df.to_parquet(out, index=False)
+    telemetry.current().wrote(out, rows=len(solar_df))
+    print("Saved:", out, "rows:", len(solar_df))
+    return solar_df
 
 
 if __name__ == "__main__":
@@ -0,0 +1,204 @@
+# models/backtest.py
+"""Rolling-origin backtest of the recursive 24h forecaster.
+
+For every issue time t (daily at --issue-hour UTC) the quantile models are
+fit on rows up to t only, the forecaster runs exactly as in production
+from the history up to t, and the 24 forecast hours are scored against
+actuals. With --retrain-every k, issue dates share one fit per k-day block
+(blocks are anchored to the epoch, so a fold's training cutoff does not
+depend on the requested range).
+
+The feature frame is written as .npy and memory-mapped by every worker
+process. A fold only depends on rows up to its issue time, so its cached
+forecast is keyed by (features, params) plus a chained digest of exactly
+those rows: appending new data keeps every earlier fold, and re-runs only
+compute dates that are new. Actuals are joined at scoring time.
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from models import bundle, forecaster, registry, scoring
+from models.train_direct import parse_quantiles
+from models.train_quantiles_full import quantile_params
+
+ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
+FEA = Path("data/features/hourly.parquet")
+TARGET = "price_eur_mwh"
+CACHE = ART / "backtest_cache"
+OUT_JSON = ART / "backtest_rolling.json"
+OUT_PARQUET = ART / "backtest_rolling.parquet"
+HISTORY_DAYS = 35            # covers LOOKBACK and the exog hour profile
+
+_frame = {}                  # per-process memmapped matrix
+
+
+def load_frame() -> pd.DataFrame:
+    df = pd.read_parquet(FEA)
+    if "ts_utc" in df.columns:
+        df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
+        df = df.set_index("ts_utc")
+    df = df.sort_index()
+    for c in df.select_dtypes(include=["bool"]).columns:
+        df[c] = df[c].astype(int)
+    return df.select_dtypes(include=["number"])
+
+
+def write_matrix(df: pd.DataFrame, root: Path) -> Path:
+    """Persist the frame as M.npy (float64) + ts.npy (int64 ns) + columns.json."""
+    root.mkdir(parents=True, exist_ok=True)
+    np.save(root / "M.npy", df.to_numpy(dtype=np.float64))
+    np.save(root / "ts.npy", df.index.as_unit("ns").asi8)
+    (root / "columns.json").write_text(json.dumps(list(df.columns)))
+    return root
+
+
+def prefix_digests(M: np.ndarray, ts: np.ndarray) -> list[str]:
+    """Chained sha256 over rows: entry i identifies rows [0, i]."""
+    h, out = hashlib.sha256(), []
+    for t, row in zip(ts, M):
+        h.update(t.tobytes())
+        h.update(row.tobytes())
+        out.append(h.copy().hexdigest()[:16])
+    return out
+
+
+def _open(root: str):
+    if _frame.get("root") != root:
+        r = Path(root)
+        _frame.update(root=root, M=np.load(r / "M.npy", mmap_mode="r"),
+                      ts=np.load(r / "ts.npy", mmap_mode="r"),
+                      columns=json.loads((r / "columns.json").read_text()))
+    return _frame["M"], _frame["ts"], _frame["columns"]
+
+
+def train_cutoff(issue: pd.Timestamp, every_days: int) -> pd.Timestamp:
+    """Latest block boundary (epoch-anchored, at the issue hour) not after `issue`."""
+    day = issue.normalize()
+    block = (day - pd.Timestamp(0, tz="UTC")).days // every_days * every_days
+    return pd.Timestamp(0, tz="UTC") + pd.Timedelta(days=block) + (issue - day)
+
+
+def run_block(root: str, cutoff_ns: int, issues_ns: list[int], features: list[str],
+              quantiles: list[int], nthread: int) -> list[dict]:
+    """Fit on rows <= cutoff, then forecast each issue time in the block -> [(issue_ns, (24, Q))]."""
+    M, ts, columns = _open(root)
+    col = {c: i for i, c in enumerate(columns)}
+    fi = [col[c] for c in features]
+    n_train = int(np.searchsorted(ts, cutoff_ns, side="right"))
+    train = np.asarray(M[:n_train])
+    train = train[~np.isnan(train).any(axis=1)]
+    X, y = train[:, fi].astype(np.float32), train[:, col[TARGET]]
+    boosters = {}
+    for q in quantiles:
+        m = xgb.XGBRegressor(**quantile_params(q / 100), n_jobs=nthread)
+        m.fit(X, y)
+        boosters[q] = m.get_booster()
+    models = bundle.Bundle(boosters, features, {"cutoff": cutoff_ns})
+
+    out = []
+    for t_ns in issues_ns:
+        lo = int(np.searchsorted(ts, t_ns - HISTORY_DAYS * 86_400 * 10**9))
+        hi = int(np.searchsorted(ts, t_ns, side="right"))
+        hist = pd.DataFrame(np.asarray(M[lo:hi]), columns=columns,
+                            index=pd.DatetimeIndex(np.asarray(ts[lo:hi]), tz="UTC"))
+        ctx = forecaster.make_context(hist, horizon=24)
+        out.append((t_ns, forecaster.forecast(models, features, ctx)[0]))    # (24, Q)
+    return out
+
+
+def _fold_path(cache: Path, t_ns: int, digest: str) -> Path:
+    return cache / "folds" / f"{t_ns}-{digest}.npy"
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--start", default=None, help="First issue date (default: end - --days)")
+    ap.add_argument("--end", default=None, help="Last issue date (default: last full day)")
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--issue-hour", type=int, default=11, help="UTC hour of each daily issue")
+    ap.add_argument("--retrain-every", type=int, default=1, help="Days sharing one model fit")
+    ap.add_argument("--quantiles", default="10,50,90")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    qs = parse_quantiles(args.quantiles)
+    if 50 not in qs:
+        raise SystemExit("--quantiles must include 50 (the recursion runs on the median).")
+    df = load_frame()
+    features = [c for c in df.columns if c != TARGET]
+    key = registry.registry_key("rolling-origin", features, {
+        "quantiles": {f"q{q}": quantile_params(q / 100) for q in qs},
+        "retrain_every": args.retrain_every, "history_days": HISTORY_DAYS})
+    cache = CACHE / key
+    root = write_matrix(df, cache / "matrix")
+    ts_all = df.index.as_unit("ns").asi8
+    chain = prefix_digests(df.to_numpy(dtype=np.float64), ts_all)
+
+    last_day = (df.index.max() - pd.Timedelta(hours=24 + args.issue_hour)).normalize()
+    end = pd.Timestamp(args.end, tz="UTC") if args.end else last_day
+    start = pd.Timestamp(args.start, tz="UTC") if args.start else end - pd.Timedelta(days=args.days - 1)
+    issues = pd.date_range(start, end, freq="1D") + pd.Timedelta(hours=args.issue_hour)
+    # fold path covers rows <= issue time (the data both the fit and the forecast see)
+    paths = {t.value: _fold_path(cache, t.value, chain[np.searchsorted(ts_all, t.value, side="right") - 1])
+             for t in issues}
+    todo = [t for t in issues if not paths[t.value].exists()]
+    print(f"{len(issues)} issue dates, {len(issues) - len(todo)} cached, {len(todo)} to run")
+
+    blocks: dict[int, list[int]] = {}
+    for t in todo:
+        blocks.setdefault(train_cutoff(t, args.retrain_every).value, []).append(t.value)
+    (cache / "folds").mkdir(parents=True, exist_ok=True)
+    jobs = max(1, min(args.jobs, len(blocks)))
+    nthread = max(1, (os.cpu_count() or 1) // jobs)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futs = [pool.submit(run_block, str(root), c, ts, features, qs, nthread)
+                for c, ts in sorted(blocks.items())]
+        for i, f in enumerate(as_completed(futs), 1):
+            for t_ns, pred in f.result():
+                path = paths[t_ns]
+                tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+                with open(tmp, "wb") as fh:
+                    np.save(fh, pred)
+                os.replace(tmp, path)
+            print(f"  block {i}/{len(futs)} done")
+
+    rows = []
+    for t in issues:
+        fut = pd.date_range(t + pd.Timedelta(hours=1), periods=24, freq="1h")
+        rows.append(pd.DataFrame(np.load(paths[t.value]),
+                                 columns=[f"q{q}" for q in qs]).assign(
+            issue_ts=t, ts_utc=fut, horizon=np.arange(1, 25),
+            actual=df[TARGET].reindex(fut).to_numpy()))
+    res = pd.concat(rows, ignore_index=True)
+    res.to_parquet(OUT_PARQUET, index=False)
+
+    levels = np.array(qs) / 100
+    P = res[[f"q{q}" for q in qs]].to_numpy()
+    s = scoring.score(res["actual"].to_numpy(), P, levels,
+                      hours=pd.DatetimeIndex(res["ts_utc"]).tz_convert("Europe/Berlin").hour)
+    err = (res["actual"] - res["q50"]).abs()
+    summary = {
+        "issue_dates": len(issues), "first_issue": str(issues[0]), "last_issue": str(issues[-1]),
+        "retrain_every_days": args.retrain_every, "quantiles": qs, "cache_key": key,
+        "mae_p50_by_horizon": {int(h): float(v) for h, v in err.groupby(res["horizon"]).mean().items()},
+        **s,
+    }
+    OUT_JSON.write_text(json.dumps(summary, indent=2))
+    print("Saved:", OUT_JSON, OUT_PARQUET)
+    print(json.dumps({k: summary[k] for k in ("issue_dates", "mae_p50", "crps", "pinball", "intervals")
+                      if k in summary}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# models/bundle.py
+"""Single-file model bundle: UBJSON boosters for every quantile + feature names + metadata.
+
+Layout: MAGIC | u64 header length | JSON header | concatenated UBJ blobs.
+The header indexes each blob by (offset, length) relative to the payload start,
+so a loader maps the file once and slices boosters out of it.
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import json
+import mmap
+import os
+import struct
+import numpy as np
+import xgboost as xgb
+
+from models import registry
+
+MAGIC = b"EPFDBND1"
+BUNDLE_FILE = "bundle.bin"
+ART = Path("models/artifacts")
+
+
+class Bundle:
+    def __init__(self, boosters: dict[int, xgb.Booster], features: list[str], meta: dict):
+        self.boosters = dict(sorted(boosters.items()))
+        self.features = features
+        self.meta = meta
+
+    @property
+    def quantiles(self) -> list[int]:
+        return list(self.boosters)
+
+    def predict(self, X, workers: int | None = None) -> np.ndarray:
+        """(n_rows, n_quantiles) matrix, columns in self.quantiles order.
+
+        `workers` > 1 runs the boosters on a thread pool (inplace_predict
+        releases the GIL); worth it for large X.
+        """
+        if hasattr(X, "reindex") and self.features:
+            X = X.reindex(columns=self.features)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if workers and workers > 1:
+            with ThreadPoolExecutor(workers) as ex:
+                cols = list(ex.map(lambda b: b.inplace_predict(X), self.boosters.values()))
+        else:
+            cols = [b.inplace_predict(X) for b in self.boosters.values()]
+        return np.column_stack(cols)
+
+
+def write_bundle(path: Path, boosters: dict[int, xgb.Booster], features: list[str],
+                 meta: dict | None = None) -> Path:
+    path = Path(path)
+    blobs, index, offset = [], {}, 0
+    for q, b in sorted(boosters.items()):
+        raw = bytes(b.save_raw(raw_format="ubj"))
+        index[str(q)] = {"offset": offset, "length": len(raw)}
+        blobs.append(raw)
+        offset += len(raw)
+    header = json.dumps({"version": 1, "features": list(features), "meta": meta or {},
+                         "models": index}).encode()
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(struct.pack("<Q", len(header)))
+        fh.write(header)
+        for raw in blobs:
+            fh.write(raw)
+    os.replace(tmp, path)
+    return path
+
+
+def load_bundle(path: Path, quantiles=None, nthread: int | None = None) -> Bundle:
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:8] != MAGIC:
+            raise SystemExit(f"{path} is not a model bundle.")
+        (hlen,) = struct.unpack("<Q", mm[8:16])
+        header = json.loads(mm[16:16 + hlen])
+        base = 16 + hlen
+        wanted = {int(q) for q in quantiles} if quantiles is not None else None
+        boosters = {}
+        for q, loc in header["models"].items():
+            if wanted is not None and int(q) not in wanted:
+                continue
+            start = base + loc["offset"]
+            b = xgb.Booster(model_file=bytearray(mm[start:start + loc["length"]]))
+            if nthread:
+                b.set_param({"nthread": nthread})
+            boosters[int(q)] = b
+    if wanted is not None and wanted - set(boosters):
+        missing = sorted(wanted - set(boosters))
+        raise SystemExit(f"{path} has no booster for quantile(s) {missing}.")
+    return Bundle(boosters, header["features"], header["meta"])
+
+
+def _booster_from_json(path: Path) -> xgb.Booster:
+    b = xgb.Booster()
+    b.load_model(path.as_posix())
+    return b
+
+
+def load_quantiles(quantiles, nthread: int | None = None, prefix: str = "xgb_q") -> Bundle:
+    """Ready-to-predict boosters for the requested quantiles (ints, e.g. 5..95).
+
+    Uses the bundle of the current registry set when there is one, else the
+    per-quantile JSON files. `prefix` selects the model family
+    (xgb_q = recursive/one-step models, direct_q = direct multi-horizon).
+    """
+    files = [f"{prefix}{q}.json" for q in quantiles]
+    model_dir = registry.resolve(files)
+    if (model_dir / BUNDLE_FILE).exists():
+        return load_bundle(model_dir / BUNDLE_FILE, quantiles, nthread)
+    boosters = {}
+    for q, f in zip(quantiles, files):
+        p = model_dir / f
+        if not p.exists():
+            raise SystemExit(f"Missing {p}. Run `make train-quantiles-full`.")
+        boosters[int(q)] = _booster_from_json(p)
+        if nthread:
+            boosters[int(q)].set_param({"nthread": nthread})
+    features = next(iter(boosters.values())).feature_names or []
+    return Bundle(boosters, features, {"source": str(model_dir)})
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pack xgb_q*.json files into one bundle.")
+    ap.add_argument("--dir", default=ART.as_posix(), help="Directory with xgb_q*.json")
+    ap.add_argument("--out", default=None, help="Output path (default: <dir>/bundle.bin)")
+    args = ap.parse_args()
+    src = Path(args.dir)
+    files = sorted(src.glob("xgb_q*.json"), key=lambda p: int(p.stem[5:]))
+    if not files:
+        raise SystemExit(f"No xgb_q*.json files in {src}.")
+    boosters = {int(p.stem[5:]): _booster_from_json(p) for p in files}
+    features = next(iter(boosters.values())).feature_names or []
+    out = write_bundle(Path(args.out) if args.out else src / BUNDLE_FILE, boosters, features,
+                       {"source": src.as_posix()})
+    print("Saved bundle:", out, f"({len(boosters)} boosters)")
+
+
+if __name__ == "__main__":
+    main()
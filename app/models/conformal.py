@@ -0,0 +1,262 @@
+# models/conformal.py
+"""Post-hoc conformal recalibration of the quantile fan.
+
+For quantile level tau and (Berlin local) hour h the served prediction
+becomes q_tau + delta[h, tau], where delta is the empirical tau-quantile of
+recent residuals y - q_tau at that hour. Residuals live in a ring buffer of
+the last `window` days per hour, so a daily update only predicts and
+inserts the new rows, and recomputing the offsets is one sort of a
+(24, window, K) array. Hours with fewer than MIN_PER_HOUR residuals use
+the offsets pooled over all hours.
+
+Every residual is out-of-sample: a row is only scored by a model set
+whose training data ended before it (bundle meta `train_end`). An empty
+buffer (first run, --rebuild, new window or levels) is filled from the
+last `window` days with holdout models fit on the rows before them. After
+that the buffer is kept across retrains: rows since the last run are
+scored by the previous model set, which has not seen them (or by the
+current one for rows after its train_end), so a daily retrain on all
+data still adds only holdout residuals.
+
+    python models/conformal.py [--window-days 60] [--rebuild]
+"""
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import json
+import numpy as np
+import pandas as pd
+
+from models import bundle, data_iter, quantile_fn, registry
+from pipeline import telemetry
+
+ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
+STATE = ART / "conformal.npz"
+TARGET = "price_eur_mwh"
+QUANTILES = tuple(range(5, 100, 5))
+MIN_PER_HOUR = 14
+
+
+def berlin_hours(idx: pd.DatetimeIndex) -> np.ndarray:
+    return np.asarray(idx.tz_convert("Europe/Berlin").hour)
+
+
+def model_id(models: bundle.Bundle) -> str:
+    return str(models.meta.get("key") or models.meta.get("source", ""))
+
+
+def trained_until(models: bundle.Bundle) -> int | None:
+    """ns timestamp of the last row the set may have seen; None when not recorded."""
+    end = models.meta.get("train_end")
+    return pd.Timestamp(end).as_unit("ns").value if end else None
+
+
+def previous_models(cal: "Calibrator", current: bundle.Bundle) -> bundle.Bundle | None:
+    """The registered set the buffer was last scored with, if it differs and still exists."""
+    if not cal.model or cal.model == model_id(current):
+        return None
+    path = registry.version_dir(current.meta.get("registry", "quantiles_full"), cal.model) / bundle.BUNDLE_FILE
+    return bundle.load_bundle(path, current.quantiles) if path.exists() else None
+
+
+def out_of_sample(df: pd.DataFrame, scorers) -> tuple[np.ndarray, np.ndarray, int]:
+    """(y, P, skipped) for the rows of df, each row predicted by the first set in
+    `scorers` whose train_end precedes it. Rows no set can score get a NaN target,
+    which Calibrator.update drops."""
+    ts = df.index.as_unit("ns").asi8
+    P = np.full((len(df), len(scorers[0].quantiles)), np.nan)
+    todo = np.ones(len(df), dtype=bool)
+    for m in scorers:
+        end = trained_until(m)
+        rows = todo & (ts > end) if end is not None else np.zeros(len(df), dtype=bool)
+        if rows.any():
+            P[rows] = m.predict(df.loc[rows].reindex(columns=m.features))
+            todo &= ~rows
+    y = np.where(todo, np.nan, df[TARGET].to_numpy(dtype=float))
+    return y, P, int(todo.sum())
+
+
+def holdout_models(df: pd.DataFrame, features: list[str], quantiles, cutoff: pd.Timestamp) -> bundle.Bundle:
+    """Same-parameter quantile models fit only on rows before cutoff."""
+    import xgboost as xgb
+    from models.train_quantiles_full import quantile_params
+    train = df.loc[df.index < cutoff].dropna()
+    if len(train) == 0:
+        raise SystemExit(f"No rows before {cutoff} to fit holdout models; use a shorter --window-days.")
+    X = train.reindex(columns=features).to_numpy(dtype=np.float32)
+    boosters = {}
+    for q in quantiles:
+        m = xgb.XGBRegressor(**quantile_params(q / 100))
+        m.fit(X, train[TARGET].to_numpy(dtype=float))
+        boosters[q] = m.get_booster()
+    return bundle.Bundle(boosters, features, {"train_end": (cutoff - pd.Timedelta(1, "ns")).isoformat()})
+
+
+def read_features(start=None) -> pd.DataFrame:
+    dataset = data_iter.open_dataset(data_iter.FEA)
+    df = dataset.to_table(filter=data_iter._ts_filter(start, None)).to_pandas()
+    if "ts_utc" in df.columns:
+        df = df.set_index(pd.to_datetime(df["ts_utc"], utc=True)).drop(columns="ts_utc")
+    df = df.sort_index()
+    for c in df.select_dtypes(include=["bool"]).columns:
+        df[c] = df[c].astype(int)
+    return df.select_dtypes(include=["number"])
+
+
+def _interp_sorted(s: np.ndarray, n: np.ndarray, tau: np.ndarray) -> np.ndarray:
+    """Linear-interpolated tau-quantile along axis -2 of NaN-last sorted data.
+
+    s: (..., W, K), n: (...,) valid counts, tau: (K,) -> (..., K); NaN where n == 0.
+    """
+    pos = tau * np.maximum(n[..., None] - 1, 0)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, np.maximum(n[..., None] - 1, 0))
+    a = np.take_along_axis(s, lo[..., None, :], axis=-2)[..., 0, :]
+    b = np.take_along_axis(s, hi[..., None, :], axis=-2)[..., 0, :]
+    out = a + (pos - lo) * (b - a)
+    return np.where(n[..., None] > 0, out, np.nan)
+
+
+class Calibrator:
+    def __init__(self, levels, window: int, resid=None, pos=None, count=None,
+                 last_ts: int | None = None, model: str = ""):
+        self.levels = np.asarray(levels, dtype=float)
+        self.window = int(window)
+        K = len(self.levels)
+        self.resid = np.full((24, self.window, K), np.nan) if resid is None else resid
+        self.pos = np.zeros(24, dtype=int) if pos is None else pos
+        self.count = np.zeros(24, dtype=int) if count is None else count
+        self.last_ts = last_ts
+        self.model = model
+        self._offsets = None
+
+    @classmethod
+    def load(cls, path: Path = STATE) -> "Calibrator | None":
+        if not Path(path).exists():
+            return None
+        z = np.load(path, allow_pickle=False)
+        last = int(z["last_ts"]) if z["last_ts"] >= 0 else None
+        return cls(z["levels"], int(z["window"]), z["resid"], z["pos"], z["count"],
+                   last, str(z["model"]))
+
+    def save(self, path: Path = STATE) -> Path:
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.tmp.npz")
+        np.savez(tmp, levels=self.levels, window=self.window, resid=self.resid, pos=self.pos,
+                 count=self.count, last_ts=-1 if self.last_ts is None else self.last_ts,
+                 model=self.model)
+        tmp.replace(path)
+        return path
+
+    def update(self, idx: pd.DatetimeIndex, y: np.ndarray, P: np.ndarray) -> int:
+        """Push residuals for rows newer than last_ts; returns the number of rows taken."""
+        ts = idx.as_unit("ns").asi8
+        keep = ~np.isnan(y) & ((ts > self.last_ts) if self.last_ts is not None else True)
+        if not keep.any():
+            return 0
+        ts, y, P = ts[keep], y[keep], P[keep]
+        order = np.argsort(ts, kind="stable")
+        ts, y, P = ts[order], y[order], P[order]
+        h = berlin_hours(pd.DatetimeIndex(ts, tz="UTC"))
+        # k-th new row of each hour goes to slot pos[h] + k; only the last `window` survive
+        by_h = np.argsort(h, kind="stable")
+        cnt = np.bincount(h, minlength=24)
+        start = np.concatenate([[0], np.cumsum(cnt)[:-1]])
+        k = np.empty(len(h), dtype=int)
+        k[by_h] = np.arange(len(h)) - np.repeat(start, cnt)
+        live = k >= (cnt[h] - self.window)
+        slot = (self.pos[h] + k) % self.window
+        self.resid[h[live], slot[live]] = y[live, None] - P[live]
+        self.pos = (self.pos + cnt) % self.window
+        self.count = np.minimum(self.count + cnt, self.window)
+        self.last_ts = int(ts[-1])
+        self._offsets = None
+        return int(len(ts))
+
+    def offsets(self) -> np.ndarray:
+        """(24, K) additive corrections per hour and quantile."""
+        if self._offsets is None:
+            s = np.sort(self.resid, axis=1)                       # NaN sorts last
+            per_hour = _interp_sorted(s, self.count, self.levels)
+            flat = self.resid.reshape(-1, len(self.levels))
+            pooled = _interp_sorted(np.sort(flat, axis=0), np.array(self.count.sum()), self.levels)
+            pooled = np.nan_to_num(pooled)
+            self._offsets = np.where((self.count >= MIN_PER_HOUR)[:, None], per_hour, pooled)
+        return self._offsets
+
+    def apply(self, P: np.ndarray, hours, quantiles=None) -> np.ndarray:
+        """Shift raw quantiles (..., n, K) by the offsets of each row's hour, then re-sort.
+
+        `quantiles` (ints, e.g. [10, 50, 90]) names P's columns when they are a
+        subset of the calibrated levels.
+        """
+        off = self.offsets()[np.asarray(hours, dtype=int)]
+        if quantiles is not None:
+            pct = np.rint(self.levels * 100).astype(int).tolist()
+            off = off[:, [pct.index(q) for q in quantiles]]
+        return quantile_fn.repair(P + off)
+
+
+def load_for(models: bundle.Bundle) -> Calibrator | None:
+    """The stored calibrator if it was fit for this model set and these quantiles."""
+    cal = Calibrator.load()
+    if cal is None or cal.model != model_id(models):
+        return None
+    pct = set(np.rint(cal.levels * 100).astype(int).tolist())
+    return cal if set(models.quantiles) <= pct else None
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--window-days", type=int, default=60)
+    ap.add_argument("--rebuild", action="store_true", help="Drop the buffer and refill it")
+    return ap.parse_args(argv)
+
+
+@telemetry.instrument("conformal")
+def main(argv=None):
+    args = parse_args(argv)
+    models = bundle.load_quantiles(QUANTILES)
+    levels = np.array(models.quantiles) / 100
+    cal = Calibrator.load()
+    n = 0
+    if (args.rebuild or cal is None or cal.last_ts is None
+            or cal.window != args.window_days or not np.array_equal(cal.levels, levels)):
+        # fill: the last `window` days scored by models that were fit before them
+        cal = Calibrator(levels, args.window_days)
+        df = read_features()
+        cutoff = df.index.max() - pd.Timedelta(days=args.window_days)
+        scorer = holdout_models(df, models.features, models.quantiles, cutoff)
+        df = df.loc[df.index > cutoff]
+        print(f"Filled from holdout models fit before {cutoff} ({len(df)} rows).")
+        if len(df):
+            n = cal.update(df.index, df[TARGET].to_numpy(dtype=float), scorer.predict(df))
+    else:
+        # keep: new rows only, each scored by a set that was not trained on it
+        df = read_features(pd.Timestamp(cal.last_ts, tz="UTC") + pd.Timedelta(seconds=1))
+        prev = previous_models(cal, models)
+        y, P, skipped = out_of_sample(df, [models] + ([prev] if prev is not None else []))
+        if skipped:
+            print(f"Skipped {skipped} rows seen in training by every available model set.")
+        if trained_until(models) is None:
+            print("Served models record no train_end; retrain them so new rows can be scored.")
+        if len(df):
+            n = cal.update(df.index, y, P)
+            # skipped rows are not retried
+            cal.last_ts = max(cal.last_ts, int(df.index.as_unit("ns").asi8.max()))
+    cal.model = model_id(models)
+    telemetry.current().rows_in = len(df)
+    cal.save()
+    off = cal.offsets()
+    summary = {"model": cal.model, "window_days": cal.window, "rows_added": n,
+               "last_ts": str(pd.Timestamp(cal.last_ts, tz="UTC")) if cal.last_ts else None,
+               "residuals_per_hour": cal.count.tolist(),
+               "mean_offset": dict(zip((f"q{q}" for q in models.quantiles),
+                                       np.round(off.mean(axis=0), 3).tolist()))}
+    (ART / "conformal.json").write_text(json.dumps(summary, indent=2))
+    print("Saved:", STATE, f"(+{n} rows)")
+    print(json.dumps(summary["mean_offset"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# models/data_iter.py
+from __future__ import annotations
+from pathlib import Path
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import xgboost as xgb
+
+FEA = Path("data/features/hourly.parquet")
+PARTS = Path("data/features/hourly_parts")   # hive layout: year=YYYY/month=M/
+TARGET = "price_eur_mwh"
+PARTITION_KEYS = ("year", "month")
+
+
+def default_source() -> Path:
+    """Prefer the partitioned feature store, fall back to the single parquet."""
+    return PARTS if PARTS.exists() else FEA
+
+
+def open_dataset(path=None) -> ds.Dataset:
+    path = Path(path or default_source())
+    if not path.exists():
+        raise SystemExit(f"Missing {path}. Run `make build-features` first.")
+    if path.is_dir():
+        return ds.dataset(path, format="parquet", partitioning="hive")
+    return ds.dataset(path, format="parquet")
+
+
+def feature_columns(dataset: ds.Dataset, target: str = TARGET) -> list[str]:
+    """Numeric/bool columns in file order, minus target, timestamp and partition keys."""
+    skip = {target, "ts_utc", *PARTITION_KEYS}
+    cols = []
+    for f in dataset.schema:
+        if f.name in skip or f.name.startswith("__"):
+            continue
+        if pa.types.is_integer(f.type) or pa.types.is_floating(f.type) or pa.types.is_boolean(f.type):
+            cols.append(f.name)
+    return cols
+
+
+def _ts_filter(start=None, end=None):
+    expr = None
+    if start is not None:
+        expr = ds.field("ts_utc") >= pd.Timestamp(start).to_pydatetime()
+    if end is not None:
+        e = ds.field("ts_utc") < pd.Timestamp(end).to_pydatetime()
+        expr = e if expr is None else expr & e
+    return expr
+
+
+def iter_batches(dataset: ds.Dataset, features: list[str], start=None, end=None,
+                 batch_rows: int = 200_000, target: str = TARGET):
+    """Yield (X float32, y float32) row batches with NaN rows dropped.
+
+    Small row groups are coalesced so each yielded batch holds ~batch_rows rows.
+    """
+    cols = features + [target]
+    scanner = dataset.scanner(columns=cols, filter=_ts_filter(start, end),
+                              batch_size=batch_rows)
+    pending, n_pending = [], 0
+
+    def flush():
+        tbl = pa.Table.from_batches(pending).combine_chunks()
+        X = np.empty((tbl.num_rows, len(features)), dtype=np.float32)
+        for j, c in enumerate(features):
+            X[:, j] = tbl.column(c).to_numpy(zero_copy_only=False)
+        y = tbl.column(target).to_numpy(zero_copy_only=False).astype(np.float32)
+        keep = ~(np.isnan(X).any(axis=1) | np.isnan(y))
+        return X[keep], y[keep]
+
+    for batch in scanner.to_batches():
+        if batch.num_rows == 0:
+            continue
+        pending.append(batch)
+        n_pending += batch.num_rows
+        if n_pending >= batch_rows:
+            yield flush()
+            pending, n_pending = [], 0
+    if pending:
+        yield flush()
+
+
+class FeatureBatchIter(xgb.DataIter):
+    """Stream feature batches into XGBoost's external-memory DMatrix.
+
+    Only one batch is resident at a time; XGBoost keeps the quantised pages
+    in its on-disk cache under ``cache_dir``. Without a ``cache_dir`` the
+    iterator makes a temporary one, which close() removes.
+    """
+
+    def __init__(self, dataset: ds.Dataset, features: list[str], start=None, end=None,
+                 batch_rows: int = 200_000, cache_dir=None):
+        self._dataset = dataset
+        self._features = features
+        self._start, self._end = start, end
+        self._batch_rows = batch_rows
+        self._it = None
+        self._owned = None if cache_dir else tempfile.mkdtemp(prefix="xgb_extmem_")
+        super().__init__(cache_prefix=os.path.join(cache_dir or self._owned, "cache"))
+
+    def close(self) -> None:
+        if self._owned is not None:
+            shutil.rmtree(self._owned, ignore_errors=True)
+            self._owned = None
+
+    def reset(self):
+        self._it = None
+
+    def next(self, input_data) -> bool:
+        if self._it is None:
+            self._it = iter_batches(self._dataset, self._features, self._start,
+                                    self._end, self._batch_rows)
+        for X, y in self._it:
+            if len(y) == 0:
+                continue
+            input_data(data=X, label=y, feature_names=self._features)
+            return True
+        return False
+
+
+def native_params(params: dict) -> tuple[dict, int]:
+    """Map XGBRegressor kwargs to (xgb.train params, num_boost_round)."""
+    p = dict(params)
+    rounds = int(p.pop("n_estimators", 100))
+    if "n_jobs" in p:
+        p["nthread"] = p.pop("n_jobs")
+    if "random_state" in p:
+        p["seed"] = p.pop("random_state")
+    p.setdefault("tree_method", "hist")
+    return p, rounds
+
+
+def time_splits(dataset: ds.Dataset, n_splits: int = 5, start=None, end=None):
+    """TimeSeriesSplit-equivalent fold boundaries computed from the ts column only.
+
+    Returns a list of (train_end, test_end) timestamps; train is ts < train_end,
+    test is train_end <= ts < test_end.
+    """
+    ts = dataset.to_table(columns=["ts_utc"], filter=_ts_filter(start, end)).column(0)
+    ts = np.sort(ts.to_numpy())
+    n = len(ts)
+    test_size = n // (n_splits + 1)
+    if test_size == 0:
+        raise SystemExit(f"Not enough rows ({n}) for {n_splits} splits.")
+    folds = []
+    for k in range(n_splits):
+        lo = n - (n_splits - k) * test_size
+        hi = lo + test_size
+        test_end = ts[hi] if hi < n else ts[-1] + np.timedelta64(1, "h")
+        folds.append((pd.Timestamp(ts[lo], tz="UTC"), pd.Timestamp(test_end, tz="UTC")))
+    return folds
+
+
+def train_external(params: dict, dataset: ds.Dataset, features: list[str], start=None,
+                   end=None, batch_rows: int = 200_000, cache_dir=None) -> xgb.Booster:
+    it = FeatureBatchIter(dataset, features, start, end, batch_rows, cache_dir)
+    dmat_cls = getattr(xgb, "ExtMemQuantileDMatrix", xgb.DMatrix)
+    try:
+        dtrain = dmat_cls(it)
+        p, rounds = native_params(params)
+        booster = xgb.train(p, dtrain, num_boost_round=rounds)
+        del dtrain                  # release the page files before the directory goes
+        return booster
+    finally:
+        it.close()
+
+
+def evaluate_streaming(booster: xgb.Booster, dataset: ds.Dataset, features: list[str],
+                       start=None, end=None, batch_rows: int = 200_000) -> dict:
+    """MAE/RMSE accumulated batch by batch (no full prediction vector in memory)."""
+    n, abs_sum, sq_sum = 0, 0.0, 0.0
+    for X, y in iter_batches(dataset, features, start, end, batch_rows):
+        if len(y) == 0:
+            continue
+        err = booster.inplace_predict(X) - y
+        n += len(y)
+        abs_sum += float(np.abs(err, dtype=np.float64).sum())
+        sq_sum += float(np.square(err, dtype=np.float64).sum())
+    if n == 0:
+        return {"mae": float("nan"), "rmse": float("nan")}
+    return {"mae": abs_sum / n, "rmse": float(np.sqrt(sq_sum / n))}
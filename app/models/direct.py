@@ -0,0 +1,85 @@
+# models/direct.py
+"""Direct multi-horizon design: one row per (issue time t, horizon h).
+
+Features are restricted to what is known at issue time: the feature row at t
+(observed price/load/renewables plus their lags and rollings), the target
+hour's calendar, and h itself. The target is the price at t + h. A forecast
+for any number of issue times is therefore a single batched predict per
+quantile booster — no step depends on another.
+"""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import holidays
+
+TARGET = "price_eur_mwh"
+HORIZONS = tuple(range(1, 25))
+CALENDAR = ("hour", "dow", "is_weekend", "is_holiday_de")
+NOW = f"{TARGET}_now"          # price observed at the issue hour
+
+
+def calendar_for(idx: pd.DatetimeIndex) -> pd.DataFrame:
+    """Calendar columns for arbitrary UTC timestamps (not necessarily contiguous)."""
+    idx_local = idx.tz_convert("Europe/Berlin")
+    years = pd.Index(idx_local.year).unique().tolist()
+    hol_dates = pd.to_datetime(list(holidays.country_holidays("DE", years=years).keys()))
+    dow = idx_local.dayofweek
+    return pd.DataFrame({
+        "hour": idx_local.hour,
+        "dow": dow,
+        "is_weekend": np.isin(dow, [5, 6]).astype(int),
+        "is_holiday_de": idx_local.tz_localize(None).normalize().isin(hol_dates).astype(int),
+    }, index=idx)
+
+
+def issue_columns(df: pd.DataFrame) -> list[str]:
+    return [c for c in df.columns if c not in CALENDAR and c != TARGET]
+
+
+def feature_names(df: pd.DataFrame) -> list[str]:
+    return [NOW] + issue_columns(df) + [f"target_{c}" for c in CALENDAR] + ["horizon"]
+
+
+def design_matrix(issue: pd.DataFrame, horizons=HORIZONS) -> pd.DataFrame:
+    """Stack issue-time rows against every horizon -> (n_issue * n_h) rows, issue-major."""
+    n, H = len(issue), len(horizons)
+    hz = np.asarray(horizons)
+    base = issue[issue_columns(issue)].to_numpy(dtype=float)
+    target_ts = (issue.index.values[:, None] + hz[None, :] * np.timedelta64(1, "h")).ravel()
+    cal = calendar_for(pd.DatetimeIndex(target_ts).tz_localize("UTC"))
+    cols = {NOW: np.repeat(issue[TARGET].to_numpy(dtype=float), H)}
+    for j, c in enumerate(issue_columns(issue)):
+        cols[c] = np.repeat(base[:, j], H)
+    for c in CALENDAR:
+        cols[f"target_{c}"] = cal[c].to_numpy(dtype=float)
+    cols["horizon"] = np.tile(hz, n).astype(float)
+    mi = pd.MultiIndex.from_arrays([np.repeat(issue.index, H), np.tile(hz, n)],
+                                   names=["issue_ts", "horizon"])
+    return pd.DataFrame(cols, index=mi)
+
+
+def training_frame(df: pd.DataFrame, horizons=HORIZONS, stride: int = 1):
+    """(X, y) for every issue time on the hourly grid whose t + h target is observed.
+
+    `stride` keeps every n-th issue hour (24 = one issue per day at the same hour).
+    """
+    grid = df.reindex(pd.date_range(df.index.min(), df.index.max(), freq="1h", tz="UTC"))
+    issue = grid.iloc[::stride].dropna()
+    X = design_matrix(issue, horizons)
+    price = grid[TARGET]
+    target_ts = X.index.get_level_values("issue_ts") + pd.to_timedelta(
+        X.index.get_level_values("horizon"), unit="h")
+    y = pd.Series(price.reindex(target_ts).to_numpy(), index=X.index, name=TARGET)
+    keep = y.notna().to_numpy()
+    return X[keep], y[keep]
+
+
+def forecast(models, hist: pd.DataFrame, issue_times=None, horizons=HORIZONS) -> np.ndarray:
+    """(n_issue, n_horizons, n_quantiles) from one predict per booster.
+
+    Defaults to a single issue at the last history row.
+    """
+    issue = hist.loc[[hist.index.max()]] if issue_times is None else hist.loc[issue_times]
+    X = design_matrix(issue, horizons)
+    P = models.predict(X)
+    return P.reshape(len(issue), len(horizons), -1)
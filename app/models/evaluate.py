@@ -0,0 +1,160 @@
+# models/evaluate.py
+"""Evaluation stage for the quantile models, from one shared prediction matrix.
+
+Builds the feature matrix once, predicts every quantile booster once
+(threaded), and writes all calibration/backtest artifacts from the same
+arrays:
+  calibration_quantile.json/.png        q10/q50/q90 nominal vs empirical
+  calibration_quantile_full.json/.png   all served quantiles
+  backtest_quantile.json                coverage/width/MAE + full scores
+  evaluation.json                       scoring.score over the test window
+  evaluation_rolling.csv                (--rolling-days) scores per window over the full history
+"""
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from models import bundle, scoring
+from pipeline import telemetry
+
+ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
+FEA = Path("data/features/hourly.parquet")
+TARGET = "price_eur_mwh"
+QS_FULL = tuple(range(5, 100, 5))
+QS_BASIC = (10, 50, 90)
+
+
+def load_data():
+    df = pd.read_parquet(FEA)
+    telemetry.current().read(FEA, rows=len(df))
+    if "ts_utc" in df.columns:
+        df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
+        df = df.set_index("ts_utc").sort_index()
+    for c in df.select_dtypes(include=["bool"]).columns:
+        df[c] = df[c].astype(int)
+    df = df.select_dtypes(include=["number"]).dropna()
+    return df
+
+
+def load_models() -> bundle.Bundle:
+    try:
+        return bundle.load_quantiles(QS_FULL)
+    except SystemExit:
+        return bundle.load_quantiles(QS_BASIC)
+
+
+def plot_calibration(nominal, empirical, path: Path, title: str):
+    plt.figure(figsize=(6, 6))
+    plt.plot([0, 1], [0, 1], "k--", label="Perfect calibration")
+    plt.plot(nominal, empirical, "o-", label="Model calibration")
+    plt.xlabel("Nominal quantile")
+    plt.ylabel("Observed frequency")
+    plt.title(title)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path, dpi=160)
+    plt.close()
+    print("Saved:", path)
+
+
+def rolling_scores(y, P, levels, index: pd.DatetimeIndex, window_days: int, step_days: int):
+    """Window means from prefix sums: one pass over the rows whatever the window count."""
+    pct = np.rint(levels * 100).astype(int).tolist()
+    L = scoring.pinball_matrix(y, P, levels)
+    parts = {"pinball_mean": L.mean(axis=1), "crps": scoring.crps_rows(L, levels)}
+    if 50 in pct:
+        parts["mae_p50"] = np.abs(y - P[:, pct.index(50)])
+    if 10 in pct and 90 in pct:
+        lo, hi = P[:, pct.index(10)], P[:, pct.index(90)]
+        parts["coverage_10-90"] = ((y >= lo) & (y <= hi)).astype(float)
+        parts["width_10-90"] = hi - lo
+    cs = {k: np.concatenate([[0.0], np.cumsum(v)]) for k, v in parts.items()}
+    ts = index.as_unit("ns").asi8
+    ends = pd.date_range(index.min() + pd.Timedelta(days=window_days), index.max(),
+                         freq=f"{step_days}D")
+    e = ends.as_unit("ns").asi8
+    hi = np.searchsorted(ts, e, side="right")
+    lo = np.searchsorted(ts, e - pd.Timedelta(days=window_days).value, side="right")
+    n = hi - lo
+    keep = n > 0
+    out = pd.DataFrame({"window_end": ends[keep], "n": n[keep]})
+    for k, c in cs.items():
+        out[k] = (c[hi] - c[lo])[keep] / n[keep]
+    below = np.vstack([np.zeros(len(levels)), np.cumsum(y[:, None] <= P, axis=0)])
+    emp = (below[hi] - below[lo])[keep] / n[keep, None]
+    out["calibration_error"] = np.abs(emp - levels).mean(axis=1)
+    return out
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--test-days", type=int, default=30)
+    ap.add_argument("--rolling-days", type=int, default=0,
+                    help="Also score rolling windows of this length over the full history "
+                         "(in-sample where the served models saw those rows in training)")
+    ap.add_argument("--step-days", type=int, default=7)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="Threads for predicting the quantile boosters")
+    return ap.parse_args(argv)
+
+
+@telemetry.instrument("evaluate")
+def main(argv=None):
+    args = parse_args(argv)
+    df = load_data()
+    models = load_models()
+    features = models.features or [c for c in df.columns if c != TARGET]
+    cutoff = df.index.max() - pd.Timedelta(days=args.test_days)
+    rows = df if args.rolling_days else df.loc[df.index > cutoff]
+
+    P_all = models.predict(rows[features].astype(float), workers=args.workers)
+    y_all = rows[TARGET].to_numpy(dtype=float)
+    qs = models.quantiles
+    levels = np.array(qs) / 100
+
+    test = np.asarray(rows.index > cutoff)
+    y, P, idx = y_all[test], P_all[test], rows.index[test]
+    s = scoring.score(y, P, levels, hours=idx.tz_convert("Europe/Berlin").hour)
+    (ART / "evaluation.json").write_text(json.dumps(
+        {"test_days": args.test_days, "quantiles": qs, **s}, indent=2))
+    print("Saved:", ART / "evaluation.json")
+
+    emp = dict(zip(qs, s["empirical"]))
+    pd.DataFrame({"nominal": levels.tolist(), "empirical": s["empirical"]}).to_json(
+        ART / "calibration_quantile_full.json", indent=2)
+    plot_calibration(levels, s["empirical"], ART / "calibration_quantile_full.png",
+                     f"Quantile calibration curve (last {args.test_days} days)")
+
+    basic = [q for q in QS_BASIC if q in emp]
+    pd.DataFrame({f"q{q}": {"nominal": q / 100, "empirical": emp[q]} for q in basic}).T.to_json(
+        ART / "calibration_quantile.json", indent=2)
+    plot_calibration([q / 100 for q in basic], [emp[q] for q in basic],
+                     ART / "calibration_quantile.png", f"Quantile calibration (last {args.test_days} days)")
+
+    iv = s["intervals"].get("10-90", {})
+    backtest = {
+        "days_tested": int((idx.max() - cutoff).days) if len(idx) else 0,
+        "coverage": iv.get("coverage"), "expected_coverage": 0.8,
+        "avg_interval_width": iv.get("width"), "mae_p50": s.get("mae_p50"),
+        "pinball": s["pinball"], "crps": s["crps"], "pit_histogram": s["pit_histogram"],
+        "by_hour": s.get("by_hour"),
+    }
+    (ART / "backtest_quantile.json").write_text(json.dumps(backtest, indent=2))
+    print("Saved:", ART / "backtest_quantile.json")
+
+    if args.rolling_days:
+        roll = rolling_scores(y_all, P_all, levels, rows.index, args.rolling_days, args.step_days)
+        roll.to_csv(ART / "evaluation_rolling.csv", index=False)
+        print("Saved:", ART / "evaluation_rolling.csv", f"({len(roll)} windows)")
+    print(json.dumps({k: backtest[k] for k in ("coverage", "avg_interval_width", "mae_p50", "crps")},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
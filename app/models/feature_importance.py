@@ -4,8 +4,10 @@ import json, matplotlib.pyplot as plt
 import xgboost as xgb
 import pandas as pd
 
+from models import registry
+
 ART = Path("models/artifacts")
-MODEL = ART / "xgb_baseline.json"
+MODEL_FILE = "xgb_baseline.json"
 FIG = ART / "feature_importance.png"
 
 def main():
@@ -18,7 +20,7 @@ def main():
     X = df[[c for c in df.columns if c != target]]
 
     model = xgb.XGBRegressor()
-    model.load_model(MODEL.as_posix())
+    model.load_model((registry.resolve([MODEL_FILE]) / MODEL_FILE).as_posix())
 
     # Get gain-based importance if available; fallback to weight
     booster = model.get_booster()
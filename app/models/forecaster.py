@@ -0,0 +1,184 @@
+# models/forecaster.py
+"""Recursive multi-step forecaster with all state in NumPy arrays.
+
+History for the recursive columns lives in a fixed (S, L + horizon) buffer
+(L = longest lag/rolling window). Everything that does not depend on the
+model's own output — calendar, exogenous hour profile, load lags — is filled
+for every step up front; only the price lags/rollings are written per step,
+followed by one inplace_predict per quantile booster on an (S, F) block.
+S is the number of scenarios (1 for the plain forecast).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+import re
+import numpy as np
+import pandas as pd
+import holidays
+
+from pipeline import profiling
+
+TARGET = "price_eur_mwh"
+RECURSIVE = (TARGET, "load_mw")
+EXOG = ("load_mw", "wind_mw", "solar_mw")
+CALENDAR = ("hour", "dow", "is_weekend", "is_holiday_de")
+LOOKBACK = 168                       # longest lag / rolling window in build_features
+PROFILE_DAYS = 28
+_LAG = re.compile(r"^(?P<base>.+)_lag(?P<n>\d+)$")
+_ROLL = re.compile(r"^(?P<base>.+)_roll(?P<n>\d+)_mean$")
+
+
+def calendar_frame(start_utc: pd.Timestamp, periods=24) -> pd.DataFrame:
+    idx = pd.date_range(start_utc, periods=periods, freq="1h", tz="UTC")
+    idx_local = idx.tz_convert("Europe/Berlin")
+    years = pd.Index(idx_local.year).unique().tolist()
+    de_hols = holidays.country_holidays("DE", years=years)
+    hol_dates = pd.to_datetime(list(de_hols.keys()))
+    df = pd.DataFrame(index=idx)
+    df["hour"] = idx_local.hour
+    df["dow"] = idx_local.dayofweek
+    df["is_weekend"] = df["dow"].isin([5, 6]).astype(int)
+    df["is_holiday_de"] = idx_local.tz_localize(
+        None).normalize().isin(hol_dates).astype(int)
+    return df
+
+
+def _ffill(a: np.ndarray, seed: float) -> np.ndarray:
+    """Forward-fill NaNs along the last axis, starting from `seed` (0.0 if NaN)."""
+    seed = 0.0 if np.isnan(seed) else seed
+    a = np.concatenate([np.full(a.shape[:-1] + (1,), seed), a], axis=-1)
+    idx = np.where(np.isnan(a), 0, np.arange(a.shape[-1]))
+    idx = np.maximum.accumulate(idx, axis=-1)
+    return np.take_along_axis(a, idx, axis=-1)[..., 1:]
+
+
+def _hour_profile(hist: pd.DataFrame, cols, days=PROFILE_DAYS) -> dict[str, np.ndarray]:
+    """Mean per Berlin local hour over the last `days` days -> {col: (24,) array, NaN if unseen}."""
+    recent = hist.loc[hist.index >= hist.index.max() - pd.Timedelta(days=days)]
+    hours = recent.index.tz_convert("Europe/Berlin").hour.to_numpy()
+    out = {}
+    for c in cols:
+        v = recent[c].to_numpy(dtype=float)
+        ok = ~np.isnan(v)
+        cnt = np.bincount(hours[ok], minlength=24)
+        tot = np.bincount(hours[ok], weights=v[ok], minlength=24)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[c] = np.where(cnt > 0, tot / cnt, np.nan)
+    return out
+
+
+@dataclass
+class Context:
+    future_idx: pd.DatetimeIndex
+    history: dict[str, np.ndarray]       # col -> (LOOKBACK,) on a contiguous hourly grid
+    exog: dict[str, np.ndarray]          # col -> (horizon,) hour-profile proxy, NaNs filled
+    calendar: dict[str, np.ndarray]      # col -> (horizon,)
+    last_values: dict[str, float]        # last non-NaN observation per column
+
+    @property
+    def horizon(self) -> int:
+        return len(self.future_idx)
+
+
+def make_context(hist: pd.DataFrame, horizon: int = 24) -> Context:
+    last_ts = hist.index.max()
+    future_idx = pd.date_range(last_ts + pd.Timedelta(hours=1), periods=horizon,
+                               freq="1h", tz="UTC")
+    grid = pd.date_range(end=last_ts, periods=LOOKBACK, freq="1h", tz="UTC")
+    history = {c: hist[c].reindex(grid).to_numpy(dtype=float)
+               for c in RECURSIVE if c in hist.columns}
+
+    cal = calendar_frame(future_idx[0], horizon)
+    calendar = {c: cal[c].to_numpy(dtype=float) for c in CALENDAR if c in hist.columns}
+
+    last_values = {c: float(s.iloc[-1]) if not (s := hist[c].dropna()).empty else np.nan
+                   for c in hist.columns}
+    exog_cols = [c for c in EXOG if c in hist.columns]
+    prof = _hour_profile(hist, exog_cols)
+    fut_hours = future_idx.tz_convert("Europe/Berlin").hour.to_numpy()
+    exog = {c: _ffill(prof[c][fut_hours], last_values[c]) for c in exog_cols}
+    return Context(future_idx, history, exog, calendar, last_values)
+
+
+def _renewables_share(exog: dict[str, np.ndarray]) -> np.ndarray:
+    load = exog["load_mw"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        den = np.where(load == 0, np.nan, load)
+        return (np.nan_to_num(exog.get("wind_mw", 0.0)) + np.nan_to_num(exog.get("solar_mw", 0.0))) / den
+
+
+@profiling.timed("forecaster.forecast")
+def forecast(models, features: list[str], ctx: Context, exog: dict[str, np.ndarray] | None = None,
+             median_q: int = 50) -> np.ndarray:
+    """Run the recursive forecast; returns (S, horizon, n_quantiles) in models.quantiles order.
+
+    `models` is a bundle.Bundle. `exog` optionally overrides exogenous paths per
+    scenario as {col: (S, horizon)} arrays (or (horizon,) for a single path).
+    """
+    h, F = ctx.horizon, len(features)
+    paths = {c: np.atleast_2d(np.asarray(v, dtype=float)) for c, v in ctx.exog.items()}
+    for c, v in (exog or {}).items():
+        paths[c] = np.atleast_2d(np.asarray(v, dtype=float))
+    S = max([p.shape[0] for p in paths.values()] + [1])
+    paths = {c: np.broadcast_to(p, (S, h)) for c, p in paths.items()}
+    if "renewables_share" in features and "load_mw" in paths:
+        paths["renewables_share"] = _renewables_share(paths)
+
+    L = LOOKBACK
+    buf = {}
+    for c, past in ctx.history.items():
+        b = np.empty((S, L + h))
+        b[:, :L] = past
+        b[:, L:] = paths[c] if c in paths and c != TARGET else np.nan
+        buf[c] = b
+
+    # (horizon, S, F) so every step's block is contiguous for inplace_predict
+    X = np.full((h, S, F), np.nan, dtype=np.float32)
+    per_step = []       # (feature index, base col, kind, n) filled inside the loop
+    for j, name in enumerate(features):
+        if name in paths:
+            X[:, :, j] = paths[name].T
+        elif name in ctx.calendar:
+            X[:, :, j] = ctx.calendar[name][:, None]
+        elif (m := _LAG.match(name) or _ROLL.match(name)) and m["base"] in buf:
+            kind, base, n = ("lag" if m.re is _LAG else "roll"), m["base"], int(m["n"])
+            if base == TARGET:
+                per_step.append((j, base, kind, n))
+                continue
+            X[:, :, j] = _window_feature(buf[base], kind, n, L, np.arange(h)).T
+
+    qs = list(models.quantiles)
+    mid = qs.index(median_q) if median_q in qs else int(np.argmin([abs(q - 50) for q in qs]))
+    boosters = list(models.boosters.values())
+    out = np.empty((h, S, len(qs)))
+    price = buf.get(TARGET)
+    # only the median feeds back, so the step loop runs one booster; the
+    # other quantiles score every step's rows in a single call afterwards
+    for k in range(h):
+        for j, base, kind, n in per_step:
+            X[k, :, j] = _window_feature(buf[base], kind, n, L, k)
+        out[k, :, mid] = boosters[mid].inplace_predict(X[k])
+        if price is not None:
+            price[:, L + k] = out[k, :, mid]       # roll the median forward as the next lag
+    flat = X.reshape(h * S, F)
+    for i, b in enumerate(boosters):
+        if i != mid:
+            out[:, :, i] = b.inplace_predict(flat).reshape(h, S)
+    return out.transpose(1, 0, 2)
+
+
+def _window_feature(b: np.ndarray, kind: str, n: int, L: int, k):
+    """Lag-n value or mean of the n values before step(s) k, from an (S, L+h) buffer."""
+    t = L + np.asarray(k)
+    if kind == "lag":
+        return b[:, t - n]
+    if np.ndim(k) == 0:
+        w = b[:, max(t - n, 0):t]
+        cnt = (~np.isnan(w)).sum(axis=1)
+        return np.where(cnt > 0, np.nansum(w, axis=1) / np.maximum(cnt, 1), np.nan)
+    # all steps at once: cumulative sums over NaN-masked values
+    v = np.nan_to_num(b)
+    c = np.concatenate([np.zeros((b.shape[0], 1)), np.cumsum(v, axis=1)], axis=1)
+    cnt = np.concatenate([np.zeros((b.shape[0], 1)), np.cumsum(~np.isnan(b), axis=1)], axis=1)
+    lo = np.maximum(t - n, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (c[:, t] - c[:, lo]) / (cnt[:, t] - cnt[:, lo])
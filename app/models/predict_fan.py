@@ -3,9 +3,11 @@ from pathlib import Path
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import xgboost as xgb
 import holidays
 
+from models import bundle, conformal, quantile_fn
+from pipeline import telemetry
+
 ART = Path("models/artifacts")
 ART.mkdir(parents=True, exist_ok=True)
 FEA = Path("data/features/hourly.parquet")
@@ -15,8 +17,8 @@ OUT_CSV = ART / "predictions_fan.csv"
 OUT_PNG = ART / "predictions_fan.png"
 
 
-def load_recent(days=180):
-    df = pd.read_parquet(FEA)
+def load_recent(days=180, df=None):
+    df = pd.read_parquet(FEA) if df is None else df.copy()
     if "ts_utc" in df.columns:
         df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
         df = df.set_index("ts_utc").sort_index()
@@ -40,8 +42,10 @@ def calendar_frame(start_utc, periods=24):
     return df
 
 
-def main():
-    hist = load_recent()
+@telemetry.instrument("predict_fan")
+def main(frame=None):
+    """Write the fan CSV/plot and return the predictions; `frame` skips re-reading FEA."""
+    hist = load_recent(df=frame)
     features = [c for c in hist.columns if c != TARGET]
 
     last_ts = hist.index.max()
@@ -57,20 +61,17 @@ def main():
 
     work = pd.concat([hist, fut], axis=0).sort_index()
 
-    preds = {}
-    for q in range(5, 100, 5):  # q05 … q95
-        fname = ART / f"xgb_q{q}.json"
-        if not fname.exists():
-            raise SystemExit(
-                f"Missing {fname}, run train_quantiles_full.py first.")
-        model = xgb.XGBRegressor()
-        model.load_model(fname.as_posix())
-        X_fut = work.loc[future_idx, features].astype(float)
-        preds[q] = pd.Series(model.predict(
-            X_fut), index=future_idx, name=f"q{q}")
-
-    pred_df = pd.concat(preds.values(), axis=1)
+    models = bundle.load_quantiles(range(5, 100, 5))  # q05 … q95
+    X_fut = work.loc[future_idx, features].astype(float)
+    P = models.predict(X_fut)
+    cal = conformal.load_for(models)
+    P = (cal.apply(P, conformal.berlin_hours(future_idx)) if cal is not None
+         else quantile_fn.repair(P))
+    pred_df = pd.DataFrame(P, index=future_idx,
+                           columns=[f"q{q}" for q in models.quantiles])
     pred_df.to_csv(OUT_CSV, index_label="ts_utc")
+    telemetry.current().rows_in = len(hist)
+    telemetry.current().wrote(OUT_CSV, rows=len(pred_df))
     print("Saved CSV:", OUT_CSV)
 
     plt.figure(figsize=(12, 6))
@@ -91,7 +92,9 @@ def main():
     plt.legend()
     plt.tight_layout()
     plt.savefig(OUT_PNG, dpi=160)
+    plt.close()
     print("Saved plot:", OUT_PNG)
+    return pred_df
 
 
 if __name__ == "__main__":
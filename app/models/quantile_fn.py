@@ -0,0 +1,119 @@
+# models/quantile_fn.py
+"""Continuous predictive distribution from a fixed set of model quantiles.
+
+Rows (hours, scenarios, requests) are handled as one array. Crossing
+quantiles are repaired by sorting each row (monotone rearrangement). Inside
+the outermost levels the quantile function is a monotone cubic (PCHIP,
+Fritsch-Carlson) interpolant and the CDF is its exact inverse; beyond them
+the tails are exponential, fitted to the two outermost knots on each side.
+"""
+from __future__ import annotations
+import numpy as np
+
+_EPS = 1e-9
+_BISECT = 24          # 0.05 / 2**24 ~ 3e-9 in probability
+
+
+def repair(values: np.ndarray) -> np.ndarray:
+    """Sort each row so quantile estimates no longer cross."""
+    return np.sort(np.asarray(values, dtype=float), axis=-1)
+
+
+def _pchip_slopes(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Fritsch-Carlson knot derivatives; x, y are (n, K) with x strictly increasing per row."""
+    h = np.diff(x, axis=1)
+    delta = np.diff(y, axis=1) / h
+    d = np.zeros_like(y)
+    w1 = 2 * h[:, 1:] + h[:, :-1]
+    w2 = h[:, 1:] + 2 * h[:, :-1]
+    same = (delta[:, :-1] * delta[:, 1:]) > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hm = (w1 + w2) / (w1 / delta[:, :-1] + w2 / delta[:, 1:])
+    d[:, 1:-1] = np.where(same, hm, 0.0)
+    d[:, 0] = _end_slope(h[:, 0], h[:, 1], delta[:, 0], delta[:, 1])
+    d[:, -1] = _end_slope(h[:, -1], h[:, -2], delta[:, -1], delta[:, -2])
+    return d
+
+
+def _end_slope(h0, h1, m0, m1):
+    d = ((2 * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+    d = np.where(np.sign(d) != np.sign(m0), 0.0, d)
+    return np.where((np.sign(m0) != np.sign(m1)) & (np.abs(d) > 3 * np.abs(m0)), 3 * m0, d)
+
+
+def _segment_coefs(x, y, d, idx):
+    """Cubic coefficients in t = (xq - x0) / h for segment idx (n, M): c0 + c1 t + c2 t^2 + c3 t^3."""
+    rows = np.arange(x.shape[0])[:, None]
+    x0, h = x[rows, idx], x[rows, idx + 1] - x[rows, idx]
+    y0, y1 = y[rows, idx], y[rows, idx + 1]
+    m0, m1 = h * d[rows, idx], h * d[rows, idx + 1]
+    return x0, h, (y0, m0, 3 * (y1 - y0) - 2 * m0 - m1, 2 * (y0 - y1) + m0 + m1)
+
+
+def _poly(c, t):
+    return c[0] + t * (c[1] + t * (c[2] + t * c[3]))
+
+
+class QuantileFunction:
+    """levels: (K,) probabilities in (0, 1); values: (n, K) quantile estimates per row."""
+
+    def __init__(self, levels, values):
+        self.levels = np.asarray(levels, dtype=float)
+        order = np.argsort(self.levels)
+        self.levels = self.levels[order]
+        v = repair(np.atleast_2d(np.asarray(values, dtype=float))[:, order])
+        # strictly increasing knots so the inverse (CDF) direction is defined
+        scale = np.maximum(np.abs(v).max(axis=1, keepdims=True), 1.0)
+        self.values = v + np.arange(v.shape[1]) * _EPS * scale
+        n, K = self.values.shape
+        if K < 2:
+            raise ValueError("need at least two quantile levels")
+        p = np.broadcast_to(self.levels, (n, K))
+        self._d_q = _pchip_slopes(p, self.values)
+        # exponential tails: Q(p) = q1 + s_lo*ln(p/p1), Q(p) = qK - s_hi*ln((1-p)/(1-pK))
+        p1, p2, pk1, pk = self.levels[[0, 1, -2, -1]]
+        self._s_lo = np.maximum((self.values[:, 1] - self.values[:, 0]) / np.log(p2 / p1), _EPS)
+        self._s_hi = np.maximum((self.values[:, -1] - self.values[:, -2])
+                                / np.log((1 - pk1) / (1 - pk)), _EPS)
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def quantile(self, p) -> np.ndarray:
+        """(n, M) quantiles at probabilities p (scalar, (M,) or (n, M))."""
+        n, K = self.values.shape
+        p = np.broadcast_to(np.asarray(p, dtype=float), (n,) + np.shape(np.atleast_1d(p))[-1:])
+        if np.any((p <= 0) | (p >= 1)):
+            raise ValueError("probabilities must be in (0, 1)")
+        lv, v = self.levels, self.values
+        idx = np.clip(np.searchsorted(lv, p, side="right") - 1, 0, K - 2)
+        x0, h, c = _segment_coefs(np.broadcast_to(lv, (n, K)), v, self._d_q, idx)
+        out = _poly(c, (p - x0) / h)
+        lo, hi = p < lv[0], p > lv[-1]
+        out = np.where(lo, v[:, :1] + self._s_lo[:, None] * np.log(p / lv[0]), out)
+        out = np.where(hi, v[:, -1:] - self._s_hi[:, None] * np.log((1 - p) / (1 - lv[-1])), out)
+        return out
+
+    def cdf(self, x) -> np.ndarray:
+        """(n, M) P(price <= x) for thresholds x (scalar, (M,) or (n, M))."""
+        n, K = self.values.shape
+        x = np.broadcast_to(np.asarray(x, dtype=float), (n,) + np.shape(np.atleast_1d(x))[-1:])
+        v, lv = self.values, self.levels
+        idx = np.clip((x[:, :, None] >= v[:, None, :]).sum(axis=-1) - 1, 0, K - 2)
+        # invert the monotone segment cubic by bisection on t in [0, 1]
+        x0, h, c = _segment_coefs(np.broadcast_to(lv, (n, K)), v, self._d_q, idx)
+        a, b = np.zeros(x.shape), np.ones(x.shape)
+        for _ in range(_BISECT):
+            mid = 0.5 * (a + b)
+            below = _poly(c, mid) < x
+            a, b = np.where(below, mid, a), np.where(below, b, mid)
+        out = x0 + h * 0.5 * (a + b)
+        lo, hi = x < v[:, :1], x > v[:, -1:]
+        with np.errstate(over="ignore"):
+            out = np.where(lo, lv[0] * np.exp((x - v[:, :1]) / self._s_lo[:, None]), out)
+            out = np.where(hi, 1 - (1 - lv[-1]) * np.exp(-(x - v[:, -1:]) / self._s_hi[:, None]), out)
+        return np.clip(out, 0.0, 1.0)
+
+    def prob_between(self, lo, hi) -> np.ndarray:
+        """(n, M) P(lo < price <= hi)."""
+        return np.clip(self.cdf(hi) - self.cdf(lo), 0.0, 1.0)
@@ -0,0 +1,100 @@
+# models/registry.py
+from __future__ import annotations
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+
+ART = Path("models/artifacts")
+REG = Path("models/registry")     # REG/<name>/<key>/... + REG/<name>/current.json
+
+
+def file_digest(path: Path, chunk: int = 1 << 20) -> str:
+    """sha256 of a file, or of every file under a directory (relative path + bytes)."""
+    path = Path(path)
+    h = hashlib.sha256()
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    for f in files:
+        if path.is_dir():
+            h.update(f.relative_to(path).as_posix().encode())
+        with open(f, "rb") as fh:
+            for block in iter(lambda: fh.read(chunk), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def registry_key(feature_version: str, features: list[str], params: dict) -> str:
+    payload = json.dumps({"data": feature_version, "features": list(features),
+                          "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _write_json_atomic(path: Path, obj: dict) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(obj, indent=2))
+    os.replace(tmp, path)
+
+
+def version_dir(name: str, key: str) -> Path:
+    return REG / name / key
+
+
+def exists(name: str, key: str) -> bool:
+    return (version_dir(name, key) / "manifest.json").exists()
+
+
+def staging_dir(name: str, key: str) -> Path:
+    """Fresh scratch dir next to the final location (same filesystem → atomic rename)."""
+    d = REG / name / f".{key}.{os.getpid()}.tmp"
+    if d.exists():
+        shutil.rmtree(d)
+    d.mkdir(parents=True)
+    return d
+
+
+def commit(name: str, key: str, staged: Path, manifest: dict) -> Path:
+    """Seal a staged artifact set: manifest last, then one rename into place."""
+    manifest = {"name": name, "key": key,
+                "created_at": datetime.now(timezone.utc).isoformat(), **manifest}
+    (staged / "manifest.json").write_text(json.dumps(manifest, indent=2, default=str))
+    final = version_dir(name, key)
+    if final.exists():      # another run won the race with identical inputs
+        shutil.rmtree(staged)
+        return final
+    os.replace(staged, final)
+    return final
+
+
+def promote(name: str, key: str) -> None:
+    if not exists(name, key):
+        raise SystemExit(f"Cannot promote {name}/{key}: no such registered version.")
+    _write_json_atomic(REG / name / "current.json", {
+        "key": key, "promoted_at": datetime.now(timezone.utc).isoformat()})
+
+
+def current(name: str) -> dict | None:
+    p = REG / name / "current.json"
+    if not p.exists():
+        return None
+    ptr = json.loads(p.read_text())
+    return ptr if exists(name, ptr["key"]) else None
+
+
+def current_dir(name: str) -> Path | None:
+    ptr = current(name)
+    return version_dir(name, ptr["key"]) if ptr else None
+
+
+def resolve(filenames, names=None) -> Path:
+    """Dir holding all `filenames`: the most recently promoted registry set, else models/artifacts."""
+    if REG.exists():
+        names = names or [p.name for p in REG.iterdir() if p.is_dir()]
+        ptrs = [(n, current(n)) for n in names]
+        ptrs = sorted((p["promoted_at"], n) for n, p in ptrs if p)
+        for _, n in reversed(ptrs):
+            d = current_dir(n)
+            if d and all((d / f).exists() for f in filenames):
+                return d
+    return ART
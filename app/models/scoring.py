@@ -0,0 +1,108 @@
+# models/scoring.py
+"""Probabilistic scores for quantile forecasts, one vectorized pass per call.
+
+All functions take P: (n, K) predicted quantiles at `levels` (K,) in (0, 1)
+and y: (n,) actuals. Rows with a NaN actual are ignored.
+"""
+from __future__ import annotations
+import numpy as np
+
+from models import quantile_fn
+
+INTERVALS = ((5, 95), (10, 90), (25, 75))
+
+
+def _prep(y, P, levels):
+    y = np.asarray(y, dtype=float)
+    P = np.atleast_2d(np.asarray(P, dtype=float))
+    levels = np.asarray(levels, dtype=float)
+    if P.shape != (len(y), len(levels)):
+        raise ValueError(f"P is {P.shape}, expected ({len(y)}, {len(levels)})")
+    ok = ~np.isnan(y)
+    return y[ok], P[ok], levels, ok
+
+
+def pinball_matrix(y, P, levels) -> np.ndarray:
+    """(n, K) pinball loss per row and quantile."""
+    d = np.asarray(y, dtype=float)[:, None] - np.asarray(P, dtype=float)
+    tau = np.asarray(levels, dtype=float)
+    return np.maximum(tau * d, (tau - 1) * d)
+
+
+def crps_weights(levels) -> np.ndarray:
+    """Quadrature weights on [0, 1] (each level owns half of its neighbouring gaps)."""
+    lv = np.asarray(levels, dtype=float)
+    edges = np.concatenate([[0.0], (lv[1:] + lv[:-1]) / 2, [1.0]])
+    return np.diff(edges)
+
+
+def crps_rows(L: np.ndarray, levels) -> np.ndarray:
+    """Per-row CRPS from a pinball matrix: CRPS = 2 * integral of the pinball loss over tau."""
+    return 2 * L @ crps_weights(levels)
+
+
+def pit(y, P, levels) -> np.ndarray:
+    """Probability integral transform F(y) under the interpolated predictive distribution."""
+    y, P, levels, _ = _prep(y, P, levels)
+    return quantile_fn.QuantileFunction(levels, P).cdf(y[:, None])[:, 0]
+
+
+def pit_histogram(u: np.ndarray, bins: int = 10) -> list[float]:
+    """Relative frequencies per PIT bin (flat at 1/bins when calibrated)."""
+    counts, _ = np.histogram(u, bins=bins, range=(0.0, 1.0))
+    return (counts / max(len(u), 1)).tolist()
+
+
+def _by_group(values: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """Group means of the columns of an (n, m) array -> (n_groups, m)."""
+    cnt = np.bincount(groups, minlength=n_groups)
+    sums = np.stack([np.bincount(groups, weights=values[:, j], minlength=n_groups)
+                     for j in range(values.shape[1])], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / cnt[:, None]
+
+
+def score(y, P, levels, hours=None, intervals=INTERVALS, pit_bins: int = 10) -> dict:
+    """Pinball per quantile, CRPS, empirical quantile coverage, PIT histogram, central
+    interval coverage/width and, if `hours` (n,) is given, the same per hour of day."""
+    y, P, levels, ok = _prep(y, P, levels)
+    pct = np.rint(levels * 100).astype(int)
+    col = {int(q): j for j, q in enumerate(pct)}
+    L = pinball_matrix(y, P, levels)
+    crps = crps_rows(L, levels)
+    below = y[:, None] <= P
+    pairs = [(lo, hi) for lo, hi in intervals if lo in col and hi in col]
+    if pairs:
+        lo_i = [col[lo] for lo, _ in pairs]
+        hi_i = [col[hi] for _, hi in pairs]
+        inside = (y[:, None] >= P[:, lo_i]) & (y[:, None] <= P[:, hi_i])
+        width = P[:, hi_i] - P[:, lo_i]
+    out = {
+        "n": int(len(y)),
+        "levels": levels.tolist(),
+        "pinball": dict(zip((f"q{q}" for q in pct), L.mean(axis=0).tolist())),
+        "pinball_mean": float(L.mean()) if len(y) else float("nan"),
+        "crps": float(crps.mean()) if len(y) else float("nan"),
+        "empirical": below.mean(axis=0).tolist(),
+        "pit_histogram": pit_histogram(pit(y, P, levels), pit_bins),
+        "intervals": {f"{lo}-{hi}": {"nominal": (hi - lo) / 100,
+                                     "coverage": float(inside[:, k].mean()),
+                                     "width": float(width[:, k].mean())}
+                      for k, (lo, hi) in enumerate(pairs)},
+    }
+    if 50 in col:
+        out["mae_p50"] = float(np.abs(y - P[:, col[50]]).mean())
+    if hours is not None:
+        h = np.asarray(hours, dtype=int)[ok]
+        parts = [L, crps[:, None]]
+        if pairs:
+            parts += [inside.astype(float), width]
+        G = _by_group(np.hstack(parts), h, 24)
+        K, m = L.shape[1], len(pairs)
+        out["by_hour"] = {
+            "pinball_mean": G[:, :K].mean(axis=1).tolist(),
+            "crps": G[:, K].tolist(),
+            **{f"coverage_{lo}-{hi}": G[:, K + 1 + k].tolist() for k, (lo, hi) in enumerate(pairs)},
+            **{f"width_{lo}-{hi}": G[:, K + 1 + m + k].tolist() for k, (lo, hi) in enumerate(pairs)},
+        }
+    return out
@@ -1,46 +1,26 @@
 # models/shap_analysis.py
 from pathlib import Path
-import numpy as np
 import pandas as pd
 import shap
-import xgboost as xgb
 import matplotlib.pyplot as plt
 
-ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
-MODEL_PATH = ART / "xgb_baseline.json"
-FEA_PATH = Path("data/features/hourly.parquet")
-TARGET = "price_eur_mwh"
+from models import shap_store
 
-def load_data():
-    df = pd.read_parquet(FEA_PATH)
-    # make sure index is ts_utc
-    if "ts_utc" in df.columns:
-        df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
-        df = df.set_index("ts_utc").sort_index()
-    for c in df.select_dtypes(include=["bool"]).columns:
-        df[c] = df[c].astype(int)
-    df = df.select_dtypes(include=["number"]).dropna()
-    X = df.drop(columns=[TARGET])
-    y = df[TARGET]
-    return df, X, y
+ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
+DAYS = 7
 
 def main():
-    if not MODEL_PATH.exists():
-        raise SystemExit("Model not found. Train first (`make train-baseline`).")
-    model = xgb.XGBRegressor()
-    model.load_model(MODEL_PATH.as_posix())
-
-    df, X, y = load_data()
-
-    # Recent 7 days via .loc mask (no FutureWarning)
-    end = df.index.max()
-    start = end - pd.Timedelta(days=7)
-    recent = X.loc[start:end]
-    if recent.empty:
-        recent = X.tail(1000)
-
-    explainer = shap.TreeExplainer(model)
-    shap_values = explainer.shap_values(recent)
+    # contributions come from the incremental store; only rows not yet stored are computed
+    models = shap_store.load_models(("baseline",))
+    X_all = shap_store.load_features()
+    end = X_all.index.max()
+    start = end - pd.Timedelta(days=DAYS)
+    shap_store.update(models, X_all.loc[start:end])
+
+    sv = shap_store.load("baseline", start, end + pd.Timedelta(hours=1), version=models["baseline"][0])
+    base_values = sv.pop("bias").to_numpy()
+    recent = X_all.loc[sv.index, sv.columns]
+    shap_values = sv.to_numpy()
 
     # 1) Summary bar (mean |SHAP|)
     plt.figure(figsize=(8,6))
@@ -60,13 +40,8 @@ def main():
 
     # 3) Waterfall for most recent row
     latest_x = recent.tail(1)
-    latest_sv = explainer.shap_values(latest_x)
-
-    # expected_value can be array-like; latest_sv is (1, n_features) → flatten to 1D
-    base = explainer.expected_value
-    if isinstance(base, (list, np.ndarray)):
-        base = float(np.array(base).reshape(-1)[0])
-    latest_sv_1d = np.array(latest_sv).reshape(-1)
+    base = float(base_values[-1])
+    latest_sv_1d = shap_values[-1]
 
     shap.plots._waterfall.waterfall_legacy(
         base, latest_sv_1d,
@@ -0,0 +1,210 @@
+# models/shap_store.py
+"""Incremental store of per-row SHAP contributions for the baseline and quantile models.
+
+Contributions come from XGBoost's native TreeSHAP (`pred_contribs=True`),
+computed in row batches on all cores; the quantile boosters share one
+DMatrix per batch. Values are kept per (model, model_version, ts_utc):
+
+    models/artifacts/shap/<model>/<version>/<YYYY-MM>.parquet   ts_utc, bias, <feature>...
+    models/artifacts/shap/<model>/current.json                  version last written
+
+A run only computes rows with no stored values for the current version,
+and only rewrites the months those rows fall in.
+
+    python models/shap_store.py [--models baseline,quantiles] [--start 2024-01-01]
+"""
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xgboost as xgb
+
+from models import bundle, registry
+from pipeline import telemetry
+
+ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
+STORE = ART / "shap"
+FEA = Path("data/features/hourly.parquet")
+TARGET = "price_eur_mwh"
+BASELINE_FILE = "xgb_baseline.json"
+QUANTILES = tuple(range(5, 100, 5))
+BATCH_ROWS = 20_000
+
+
+def model_version(model_dir: Path, files: list[str]) -> str:
+    """Registry key for a registered set, else a digest of the model files."""
+    if model_dir.parent.parent == registry.REG:
+        return model_dir.name
+    h = hashlib.sha256()
+    for f in files:
+        h.update(registry.file_digest(model_dir / f).encode())
+    return h.hexdigest()[:16]
+
+
+def load_models(which=("baseline", "quantiles"), nthread: int | None = None) -> dict:
+    """name -> (version, booster) for the served baseline and/or quantile models."""
+    out = {}
+    if "baseline" in which:
+        d = registry.resolve([BASELINE_FILE])
+        if not (d / BASELINE_FILE).exists():
+            raise SystemExit("Model not found. Train first (`make train-baseline`).")
+        b = xgb.Booster()
+        b.load_model((d / BASELINE_FILE).as_posix())
+        out["baseline"] = (model_version(d, [BASELINE_FILE]), b)
+    if "quantiles" in which:
+        files = [f"xgb_q{q}.json" for q in QUANTILES]
+        d = registry.resolve(files)
+        models = bundle.load_quantiles(QUANTILES)
+        version = model_version(d, [bundle.BUNDLE_FILE] if (d / bundle.BUNDLE_FILE).exists() else files)
+        for q, b in models.boosters.items():
+            if models.features and not b.feature_names:
+                b.feature_names = models.features
+            out[f"q{q}"] = (version, b)
+    if nthread:
+        for _, b in out.values():
+            b.set_param({"nthread": nthread})
+    return out
+
+
+def _utc(value) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+
+
+def _month(ts: pd.DatetimeIndex) -> np.ndarray:
+    return np.asarray(ts.strftime("%Y-%m"))
+
+
+def stored_ts(root: Path) -> np.ndarray:
+    """int64 ns timestamps already stored under one model version."""
+    parts = [pq.read_table(p, columns=["ts_utc"]).column(0).to_numpy() for p in sorted(root.glob("*.parquet"))]
+    if not parts:
+        return np.array([], dtype=np.int64)
+    return pd.DatetimeIndex(np.concatenate(parts)).as_unit("ns").asi8
+
+
+def contributions(boosters: list[xgb.Booster], X: pd.DataFrame, batch_rows: int = BATCH_ROWS):
+    """Yield (row slice, [(n, F + 1) float32 per booster]) batch by batch; last column is the bias."""
+    for lo in range(0, len(X), batch_rows):
+        sl = slice(lo, lo + batch_rows)
+        dm = xgb.DMatrix(X.iloc[sl].to_numpy(np.float32), feature_names=list(X.columns))
+        yield sl, [b.predict(dm, pred_contribs=True).astype(np.float32) for b in boosters]
+
+
+def _write_months(root: Path, frame: pd.DataFrame) -> None:
+    """Merge new rows into their month files (one atomic rewrite per touched month)."""
+    root.mkdir(parents=True, exist_ok=True)
+    for month, part in frame.groupby(_month(pd.DatetimeIndex(frame["ts_utc"])), sort=True):
+        path = root / f"{month}.parquet"
+        if path.exists():
+            part = pd.concat([pd.read_parquet(path), part], ignore_index=True)
+            part = part.drop_duplicates("ts_utc", keep="last")
+        part = part.sort_values("ts_utc")
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        pq.write_table(pa.Table.from_pandas(part, preserve_index=False), tmp)
+        os.replace(tmp, path)
+
+
+def update(models: dict, X: pd.DataFrame, batch_rows: int = BATCH_ROWS) -> dict[str, int]:
+    """Compute and store contributions for rows of X (index ts_utc) missing per model -> rows added."""
+    ts = X.index.as_unit("ns").asi8
+    # models that miss the same rows with the same features share the DMatrix batches
+    groups: dict[tuple, list[str]] = {}
+    missing = {}
+    for name, (version, b) in models.items():
+        miss = ~np.isin(ts, stored_ts(STORE / name / version))
+        missing[name] = miss
+        key = (tuple(b.feature_names or X.columns), hashlib.sha1(miss.tobytes()).hexdigest())
+        groups.setdefault(key, []).append(name)
+
+    added = {}
+    for (features, _), names in groups.items():
+        rows = X.loc[missing[names[0]], list(features)]
+        out = {n: [] for n in names}
+        for sl, values in contributions([models[n][1] for n in names], rows, batch_rows):
+            for n, v in zip(names, values):
+                out[n].append(v)
+        for n in names:
+            version = models[n][0]
+            added[n] = len(rows)
+            if len(rows):
+                V = np.concatenate(out[n])
+                frame = pd.DataFrame(V, columns=[*features, "bias"])
+                frame.insert(0, "ts_utc", rows.index)
+                _write_months(STORE / n / version, frame)
+            registry._write_json_atomic(STORE / n / "current.json", {"version": version})
+    return added
+
+
+def current_version(model: str) -> str | None:
+    p = STORE / model / "current.json"
+    return json.loads(p.read_text())["version"] if p.exists() else None
+
+
+def load(model: str, start=None, end=None, version: str | None = None,
+         columns: list[str] | None = None) -> pd.DataFrame:
+    """Stored contributions for [start, end) indexed by ts_utc; reads only the months in range."""
+    version = version or current_version(model)
+    if version is None:
+        raise SystemExit(f"No SHAP values stored for {model}. Run `make shap-store`.")
+    root = STORE / model / version
+    start = _utc(start) if start is not None else None
+    end = _utc(end) if end is not None else None
+    lo = start.strftime("%Y-%m") if start is not None else None
+    hi = end.strftime("%Y-%m") if end is not None else None
+    files = [p for p in sorted(root.glob("*.parquet"))
+             if (lo is None or p.stem >= lo) and (hi is None or p.stem <= hi)]
+    if not files:
+        return pd.DataFrame(columns=columns or []).rename_axis("ts_utc")
+    cols = None if columns is None else ["ts_utc", *columns]
+    df = pd.concat([pd.read_parquet(p, columns=cols) for p in files], ignore_index=True)
+    df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("ts_utc"), utc=True), name="ts_utc")
+    if start is not None:
+        df = df.loc[df.index >= start]
+    if end is not None:
+        df = df.loc[df.index < end]
+    return df
+
+
+def load_features(start=None) -> pd.DataFrame:
+    df = pd.read_parquet(FEA)
+    if "ts_utc" in df.columns:
+        df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
+        df = df.set_index("ts_utc")
+    df = df.sort_index()
+    for c in df.select_dtypes(include=["bool"]).columns:
+        df[c] = df[c].astype(int)
+    df = df.select_dtypes(include=["number"]).drop(columns=[TARGET], errors="ignore")
+    df = df.loc[~df.index.duplicated(keep="last")]
+    if start is not None:
+        df = df.loc[df.index >= _utc(start)]
+    return df
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--models", default="baseline,quantiles",
+                    help="Comma list of: baseline, quantiles")
+    ap.add_argument("--start", default=None, help="Only store rows from this date on")
+    ap.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    ap.add_argument("--nthread", type=int, default=os.cpu_count() or 1)
+    return ap.parse_args()
+
+
+@telemetry.instrument("shap_store")
+def main():
+    args = parse_args()
+    models = load_models(tuple(args.models.split(",")), args.nthread)
+    added = update(models, load_features(args.start), args.batch_rows)
+    for name, n in added.items():
+        print(f"{name} [{models[name][0]}]: +{n} rows")
+
+
+if __name__ == "__main__":
+    main()
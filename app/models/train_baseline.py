@@ -1,5 +1,6 @@
 # models/train_baseline.py
 from pathlib import Path
+import argparse
 import json
 import numpy as np
 import pandas as pd
@@ -7,9 +8,24 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error
 from sklearn.model_selection import TimeSeriesSplit
 import xgboost as xgb
 
+from models import data_iter, registry
+from pipeline import profiling, telemetry
+
 FEA = Path("data/features/hourly.parquet")
 ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
 TARGET = "price_eur_mwh"
+REGISTRY_NAME = "baseline"
+
+PARAMS = dict(
+    n_estimators=500,
+    learning_rate=0.05,
+    max_depth=6,
+    subsample=0.8,
+    colsample_bytree=0.8,
+    reg_lambda=1.0,
+    n_jobs=4,
+    random_state=42
+)
 
 def make_dataset(df: pd.DataFrame):
     y = df[TARGET].astype(float)
@@ -17,6 +33,7 @@ def make_dataset(df: pd.DataFrame):
     X = df[features].astype(float)
     return X, y, features
 
+@profiling.timed()
 def walk_forward_eval(X, y, n_splits=5):
     tscv = TimeSeriesSplit(n_splits=n_splits)
     maes, rmses, models = [], [], []
@@ -24,16 +41,7 @@ def walk_forward_eval(X, y, n_splits=5):
         X_tr, X_te = X.iloc[train_idx], X.iloc[test_idx]
         y_tr, y_te = y.iloc[train_idx], y.iloc[test_idx]
 
-        model = xgb.XGBRegressor(
-            n_estimators=500,
-            learning_rate=0.05,
-            max_depth=6,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            reg_lambda=1.0,
-            n_jobs=4,
-            random_state=42
-        )
+        model = xgb.XGBRegressor(**PARAMS)
         model.fit(X_tr, y_tr, eval_set=[(X_te, y_te)], verbose=False)
         y_hat = model.predict(X_te)
 
@@ -44,9 +52,51 @@ def walk_forward_eval(X, y, n_splits=5):
         print(f"Fold {fold}: MAE={mae:.3f}, RMSE={rmse:.3f}")
     return models[-1], float(np.mean(maes)), float(np.mean(rmses))
 
+@profiling.timed()
+def walk_forward_eval_external(source, n_splits=5, batch_rows=200_000):
+    """Same walk-forward CV, but each fold streams batches from disk (bounded memory)."""
+    dataset = data_iter.open_dataset(source)
+    feats = data_iter.feature_columns(dataset, TARGET)
+    maes, rmses, booster = [], [], None
+    for fold, (train_end, test_end) in enumerate(data_iter.time_splits(dataset, n_splits), start=1):
+        booster = data_iter.train_external(PARAMS, dataset, feats, end=train_end,
+                                           batch_rows=batch_rows)
+        m = data_iter.evaluate_streaming(booster, dataset, feats, start=train_end,
+                                         end=test_end, batch_rows=batch_rows)
+        maes.append(m["mae"]); rmses.append(m["rmse"])
+        print(f"Fold {fold}: MAE={m['mae']:.3f}, RMSE={m['rmse']:.3f}")
+    return booster, float(np.mean(maes)), float(np.mean(rmses)), feats
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--external-memory", action="store_true",
+                    help="Stream row batches from partitioned features via XGBoost external memory")
+    ap.add_argument("--source", default=None,
+                    help="Feature parquet file or partition dir (default: hourly_parts if present)")
+    ap.add_argument("--batch-rows", type=int, default=200_000)
+    ap.add_argument("--force", action="store_true",
+                    help="Retrain even if the registry already holds this data/feature/param key")
+    return ap.parse_args()
+
+@telemetry.instrument("train_baseline")
 def main():
-    if not FEA.exists():
+    args = parse_args()
+    if not args.external_memory and not FEA.exists():
         raise SystemExit("Missing features parquet. Run features/build_features.py")
+    source = (args.source or data_iter.default_source()) if args.external_memory else FEA
+    feature_version = registry.file_digest(source)
+    key = registry.registry_key(
+        feature_version, data_iter.feature_columns(data_iter.open_dataset(source), TARGET), PARAMS)
+    if registry.exists(REGISTRY_NAME, key) and not args.force:
+        registry.promote(REGISTRY_NAME, key)
+        print(f"{REGISTRY_NAME}/{key} already trained on this feature version; nothing to do.")
+        return
+
+    if args.external_memory:
+        model, mae, rmse, feats = walk_forward_eval_external(
+            source, n_splits=5, batch_rows=args.batch_rows)
+        save(model, mae, rmse, feats, key, feature_version, source)
+        return
 
     df = pd.read_parquet(FEA)
     # Keep numeric columns only (convert bools to ints)
@@ -62,13 +112,20 @@ def main():
 
     X, y, feats = make_dataset(df)
     model, mae, rmse = walk_forward_eval(X, y, n_splits=5)
+    save(model, mae, rmse, feats, key, feature_version, FEA)
 
+def save(model, mae, rmse, feats, key, feature_version, source):
     ART.mkdir(parents=True, exist_ok=True)
-    model.save_model((ART / "xgb_baseline.json").as_posix())
+    staged = registry.staging_dir(REGISTRY_NAME, key)
+    model.save_model((staged / "xgb_baseline.json").as_posix())
     (ART / "metrics.json").write_text(json.dumps(
         {"mae": mae, "rmse": rmse, "n_features": len(feats)}, indent=2
     ))
-    print("Saved model:", ART / "xgb_baseline.json")
+    final = registry.commit(REGISTRY_NAME, key, staged, {
+        "feature_version": feature_version, "source": str(source), "features": list(feats),
+        "params": PARAMS, "metrics": {"mae": mae, "rmse": rmse}})
+    registry.promote(REGISTRY_NAME, key)
+    print("Saved model:", final / "xgb_baseline.json")
     print("Metrics:", {"mae": mae, "rmse": rmse})
 
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+# models/train_direct.py
+from pathlib import Path
+import argparse
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+import json
+
+from models import bundle, direct, registry
+from models.train_quantiles_full import load_data, quantile_params
+from pipeline import telemetry
+
+ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
+FEA = Path("data/features/hourly.parquet")
+TARGET = "price_eur_mwh"
+REGISTRY_NAME = "direct"
+FILE_PREFIX = "direct_q"
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stride", type=int, default=1,
+                    help="Keep every n-th issue hour (24 = one issue per day)")
+    ap.add_argument("--holdout-days", type=int, default=30)
+    ap.add_argument("--quantiles", default="5-95",
+                    help="'5-95' for q05..q95 in steps of 5, or a list like '10,50,90'")
+    ap.add_argument("--force", action="store_true",
+                    help="Retrain even if the registry already holds this data/feature/param key")
+    return ap.parse_args()
+
+def parse_quantiles(spec: str) -> list[int]:
+    if spec == "5-95":
+        return list(range(5, 100, 5))
+    return [int(q) for q in spec.split(",")]
+
+def holdout_split(X: pd.DataFrame, holdout_days: int):
+    """(train mask, holdout mask, cutoff) over a direct training frame.
+
+    The holdout is the issue times in the last `holdout_days` (whole 24h
+    paths). Training keeps only rows whose target hour is <= cutoff, so the
+    issue times in the 24h before the cutoff, whose targets fall inside the
+    holdout, are purged rather than leaked.
+    """
+    issue_ts = X.index.get_level_values("issue_ts")
+    target_ts = issue_ts + pd.to_timedelta(X.index.get_level_values("horizon"), unit="h")
+    cutoff = issue_ts.max() - pd.Timedelta(days=holdout_days)
+    return np.asarray(target_ts <= cutoff), np.asarray(issue_ts > cutoff), cutoff
+
+@telemetry.instrument("train_direct")
+def main():
+    args = parse_args()
+    qs = parse_quantiles(args.quantiles)
+    X_all, y_all = load_data()
+    df = X_all.assign(**{TARGET: y_all})
+    X, y = direct.training_frame(df, stride=args.stride)
+    feats = list(X.columns)
+
+    feature_version = registry.file_digest(FEA)
+    params = {"stride": args.stride, "horizons": list(direct.HORIZONS),
+              **{f"q{q}": quantile_params(q / 100) for q in qs}}
+    key = registry.registry_key(feature_version, feats, params)
+    if registry.exists(REGISTRY_NAME, key) and not args.force:
+        registry.promote(REGISTRY_NAME, key)
+        print(f"{REGISTRY_NAME}/{key} already trained on this feature version; nothing to do.")
+        return
+
+    tr, te, _ = holdout_split(X, args.holdout_days)
+    staged = registry.staging_dir(REGISTRY_NAME, key)
+    metrics, boosters = {}, {}
+    for q in qs:
+        m = xgb.XGBRegressor(**quantile_params(q / 100))
+        m.fit(X[tr], y[tr])
+        y_hat = m.predict(X[te])
+        err = pd.Series(np.abs(y[te].to_numpy() - y_hat), index=X.index[te])
+        by_h = err.groupby(level="horizon").mean()
+        metrics[f"q{q}"] = {"mae": float(err.mean()),
+                            "mae_by_horizon": {int(h): float(v) for h, v in by_h.items()}}
+        # refit on everything for serving
+        m = xgb.XGBRegressor(**quantile_params(q / 100))
+        m.fit(X, y)
+        m.save_model((staged / f"{FILE_PREFIX}{q}.json").as_posix())
+        boosters[q] = m.get_booster()
+        print(f"Trained direct q={q/100:.2f}, holdout MAE={metrics[f'q{q}']['mae']:.2f}")
+
+    bundle.write_bundle(staged / bundle.BUNDLE_FILE, boosters, feats,
+                        {"registry": REGISTRY_NAME, "key": key, "horizons": list(direct.HORIZONS)})
+    (ART / "metrics_direct.json").write_text(json.dumps(metrics, indent=2))
+    print("Saved metrics:", ART / "metrics_direct.json")
+    final = registry.commit(REGISTRY_NAME, key, staged, {
+        "feature_version": feature_version, "source": str(FEA),
+        "features": feats, "params": params, "metrics": metrics})
+    registry.promote(REGISTRY_NAME, key)
+    print("Promoted:", final)
+
+if __name__ == "__main__":
+    main()
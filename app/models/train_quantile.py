@@ -1,5 +1,6 @@
 # models/train_quantile.py
 from pathlib import Path
+import argparse
 import numpy as np
 import pandas as pd
 import xgboost as xgb
@@ -7,9 +8,13 @@ from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import json
 
+from models import bundle, data_iter, registry
+from pipeline import telemetry
+
 ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
 FEA = Path("data/features/hourly.parquet")
 TARGET = "price_eur_mwh"
+REGISTRY_NAME = "quantile"
 
 def load_data():
     df = pd.read_parquet(FEA)
@@ -26,8 +31,8 @@ def load_data():
 def _rmse(y_true, y_pred):
     return float(np.sqrt(mean_squared_error(y_true, y_pred)))
 
-def train_quantile(X, y, q: float, n_splits=5):
-    params = {
+def quantile_params(q: float) -> dict:
+    return {
         "objective": "reg:quantileerror",
         "quantile_alpha": q,
         "eval_metric": "mae",
@@ -38,6 +43,9 @@ def train_quantile(X, y, q: float, n_splits=5):
         "colsample_bytree": 0.9,
         "random_state": 42,
     }
+
+def train_quantile(X, y, q: float, n_splits=5):
+    params = quantile_params(q)
     tscv = TimeSeriesSplit(n_splits=n_splits)
     maes, rmses = [], []
     for tr, te in tscv.split(X):
@@ -53,18 +61,68 @@ def train_quantile(X, y, q: float, n_splits=5):
     model.fit(X, y)
     return model, {"mae": float(np.mean(maes)), "rmse": float(np.mean(rmses))}
 
+def train_quantile_external(dataset, feats, q: float, n_splits=5, batch_rows=200_000):
+    """Out-of-core variant of train_quantile: folds and final fit stream from disk."""
+    params = quantile_params(q)
+    maes, rmses = [], []
+    for train_end, test_end in data_iter.time_splits(dataset, n_splits):
+        booster = data_iter.train_external(params, dataset, feats, end=train_end,
+                                           batch_rows=batch_rows)
+        m = data_iter.evaluate_streaming(booster, dataset, feats, start=train_end,
+                                         end=test_end, batch_rows=batch_rows)
+        maes.append(m["mae"]); rmses.append(m["rmse"])
+    booster = data_iter.train_external(params, dataset, feats, batch_rows=batch_rows)
+    return booster, {"mae": float(np.mean(maes)), "rmse": float(np.mean(rmses))}
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--external-memory", action="store_true",
+                    help="Stream row batches from partitioned features via XGBoost external memory")
+    ap.add_argument("--source", default=None,
+                    help="Feature parquet file or partition dir (default: hourly_parts if present)")
+    ap.add_argument("--batch-rows", type=int, default=200_000)
+    ap.add_argument("--force", action="store_true",
+                    help="Retrain even if the registry already holds this data/feature/param key")
+    return ap.parse_args()
+
+@telemetry.instrument("train_quantile")
 def main():
-    X, y = load_data()
+    args = parse_args()
     quantiles = [0.1, 0.5, 0.9]
-    metrics = {}
+    source = (args.source or data_iter.default_source()) if args.external_memory else FEA
+    dataset = data_iter.open_dataset(source)
+    feats = data_iter.feature_columns(dataset, TARGET)
+    feature_version = registry.file_digest(source)
+    params = {f"q{int(q*100)}": quantile_params(q) for q in quantiles}
+    key = registry.registry_key(feature_version, feats, params)
+    if registry.exists(REGISTRY_NAME, key) and not args.force:
+        registry.promote(REGISTRY_NAME, key)
+        print(f"{REGISTRY_NAME}/{key} already trained on this feature version; nothing to do.")
+        return
+
+    if args.external_memory:
+        fit = lambda q: train_quantile_external(dataset, feats, q, batch_rows=args.batch_rows)
+    else:
+        X, y = load_data()
+        fit = lambda q: train_quantile(X, y, q)
+    staged = registry.staging_dir(REGISTRY_NAME, key)
+    metrics, boosters = {}, {}
     for q in quantiles:
-        model, m = train_quantile(X, y, q)
-        fname = ART / f"xgb_q{int(q*100)}.json"
+        model, m = fit(q)
+        boosters[int(q*100)] = model.get_booster() if hasattr(model, "get_booster") else model
+        fname = staged / f"xgb_q{int(q*100)}.json"
         model.save_model(fname.as_posix())
         metrics[f"q{int(q*100)}"] = m
         print(f"Trained q={q:.1f} → {fname.name}, MAE={m['mae']:.3f}, RMSE={m['rmse']:.3f}")
     (ART / "metrics_quantile.json").write_text(json.dumps(metrics, indent=2))
     print("Saved metrics:", ART / "metrics_quantile.json")
+    bundle.write_bundle(staged / bundle.BUNDLE_FILE, boosters, feats,
+                        {"registry": REGISTRY_NAME, "key": key, "feature_version": feature_version})
+    final = registry.commit(REGISTRY_NAME, key, staged, {
+        "feature_version": feature_version, "source": str(source),
+        "features": feats, "params": params, "metrics": metrics})
+    registry.promote(REGISTRY_NAME, key)
+    print("Promoted:", final)
 
 if __name__ == "__main__":
     main()
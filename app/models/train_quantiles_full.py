@@ -1,5 +1,8 @@
 # models/train_quantiles_full.py
 from pathlib import Path
+import argparse
+import os
+import shutil
 import numpy as np
 import pandas as pd
 import xgboost as xgb
@@ -7,25 +10,31 @@ from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import json
 
+from models import bundle, data_iter, registry
+from pipeline import telemetry
+
 ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
 FEA = Path("data/features/hourly.parquet")
 TARGET = "price_eur_mwh"
+REGISTRY_NAME = "quantiles_full"
+QUANTILES = tuple(range(5, 100, 5))  # q05 to q95
 
-def load_data():
-    df = pd.read_parquet(FEA)
+def load_data(df=None):
+    df = pd.read_parquet(FEA) if df is None else df.copy()
     if "ts_utc" in df.columns:
         df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
         df = df.set_index("ts_utc").sort_index()
     for c in df.select_dtypes(include=["bool"]).columns:
         df[c] = df[c].astype(int)
     df = df.select_dtypes(include=["number"]).dropna()
+    telemetry.current().rows_in = len(df)
     return df.drop(columns=[TARGET]), df[TARGET]
 
 def _rmse(y_true, y_pred):
     return float(np.sqrt(mean_squared_error(y_true, y_pred)))
 
-def train_quantile(X, y, q: float, n_splits=5):
-    params = {
+def quantile_params(q: float) -> dict:
+    return {
         "objective": "reg:quantileerror",
         "quantile_alpha": q,
         "eval_metric": "mae",
@@ -36,6 +45,9 @@ def train_quantile(X, y, q: float, n_splits=5):
         "colsample_bytree": 0.9,
         "random_state": 42,
     }
+
+def train_quantile(X, y, q: float, n_splits=5):
+    params = quantile_params(q)
     tscv = TimeSeriesSplit(n_splits=n_splits)
     maes, rmses = [], []
     for tr, te in tscv.split(X):
@@ -48,18 +60,129 @@ def train_quantile(X, y, q: float, n_splits=5):
     model.fit(X, y)
     return model, {"mae": float(np.mean(maes)), "rmse": float(np.mean(rmses))}
 
-def main():
-    X, y = load_data()
-    quantiles = [q/100 for q in range(5, 100, 5)]  # q05 to q95
-    metrics = {}
+def train_quantile_external(dataset, feats, q: float, n_splits=5, batch_rows=200_000):
+    """Out-of-core variant of train_quantile: folds and final fit stream from disk."""
+    params = quantile_params(q)
+    maes, rmses = [], []
+    for train_end, test_end in data_iter.time_splits(dataset, n_splits):
+        booster = data_iter.train_external(params, dataset, feats, end=train_end,
+                                           batch_rows=batch_rows)
+        m = data_iter.evaluate_streaming(booster, dataset, feats, start=train_end,
+                                         end=test_end, batch_rows=batch_rows)
+        maes.append(m["mae"]); rmses.append(m["rmse"])
+    booster = data_iter.train_external(params, dataset, feats, batch_rows=batch_rows)
+    return booster, {"mae": float(np.mean(maes)), "rmse": float(np.mean(rmses))}
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--external-memory", action="store_true",
+                    help="Stream row batches from partitioned features via XGBoost external memory")
+    ap.add_argument("--source", default=None,
+                    help="Feature parquet file or partition dir (default: hourly_parts if present)")
+    ap.add_argument("--batch-rows", type=int, default=200_000)
+    ap.add_argument("--force", action="store_true",
+                    help="Retrain even if the registry already holds this data/feature/param key")
+    ap.add_argument("--quantile", type=int, choices=QUANTILES, default=None,
+                    help="Train only this quantile (percent) into the parts dir; see --finalize")
+    ap.add_argument("--finalize", action="store_true",
+                    help="Bundle, register and promote the per-quantile parts")
+    return ap.parse_args(argv)
+
+def parts_dir(key: str) -> Path:
+    """Where `--quantile` runs for one registry key leave their model and metrics."""
+    return registry.REG / REGISTRY_NAME / f".{key}.parts"
+
+def train_part(q: int, key: str, fit, force=False) -> None:
+    """Fit one quantile into parts_dir(key); a finished part is kept (retries are cheap)."""
+    parts = parts_dir(key); parts.mkdir(parents=True, exist_ok=True)
+    out = parts / f"xgb_q{q}.json"
+    if out.exists() and not force:
+        print(f"q{q} already trained for {REGISTRY_NAME}/{key}; nothing to do.")
+        return
+    model, m = fit(q / 100)
+    tmp = parts / f".xgb_q{q}.{os.getpid()}.json"
+    model.save_model(tmp.as_posix())
+    registry._write_json_atomic(parts / f"q{q}.metrics.json", m)
+    os.replace(tmp, out)    # model file last: its presence marks a complete part
+    print(f"Trained q={q/100:.2f} → {out}, MAE={m['mae']:.2f}, RMSE={m['rmse']:.2f}")
+
+def train_end(dataset) -> str:
+    """Latest timestamp the models can have seen (conformal only scores rows after it)."""
+    ts = dataset.to_table(columns=["ts_utc"]).column(0).to_numpy()
+    return pd.Timestamp(ts.max(), tz="UTC").isoformat()
+
+def seal(key: str, staged: Path, boosters: dict, metrics: dict, feats, source,
+         feature_version: str, params: dict, train_end: str) -> Path:
+    (ART / "metrics_quantiles_full.json").write_text(json.dumps(metrics, indent=2))
+    print("Saved metrics:", ART / "metrics_quantiles_full.json")
+    bundle.write_bundle(staged / bundle.BUNDLE_FILE, boosters, feats,
+                        {"registry": REGISTRY_NAME, "key": key, "feature_version": feature_version,
+                         "train_end": train_end})
+    final = registry.commit(REGISTRY_NAME, key, staged, {
+        "feature_version": feature_version, "source": str(source), "train_end": train_end,
+        "features": feats, "params": params, "metrics": metrics})
+    registry.promote(REGISTRY_NAME, key)
+    print("Promoted:", final)
+    return final
+
+def finalize(key: str, **manifest) -> Path:
+    """Gather the parts of all QUANTILES into one registered, promoted set."""
+    parts = parts_dir(key)
+    missing = [q for q in QUANTILES if not (parts / f"xgb_q{q}.json").exists()]
+    if missing:
+        raise SystemExit(f"Missing quantile parts {missing} for {REGISTRY_NAME}/{key}. "
+                         "Run `--quantile Q` for each first.")
+    staged = registry.staging_dir(REGISTRY_NAME, key)
+    metrics, boosters = {}, {}
+    for q in QUANTILES:
+        fname = staged / f"xgb_q{q}.json"
+        shutil.copy2(parts / fname.name, fname)
+        boosters[q] = xgb.Booster(model_file=fname.as_posix())
+        metrics[f"q{q}"] = json.loads((parts / f"q{q}.metrics.json").read_text())
+    final = seal(key, staged, boosters, metrics, **manifest)
+    shutil.rmtree(parts, ignore_errors=True)
+    return final
+
+@telemetry.instrument("train_quantiles_full")
+def main(argv=None, frame=None):
+    """`frame`: the feature frame already in memory (same content as FEA)."""
+    args = parse_args(argv)
+    quantiles = [q/100 for q in QUANTILES]
+    source = (args.source or data_iter.default_source()) if args.external_memory else FEA
+    dataset = data_iter.open_dataset(source)
+    feats = data_iter.feature_columns(dataset, TARGET)
+    feature_version = registry.file_digest(source)
+    params = {f"q{int(q*100)}": quantile_params(q) for q in quantiles}
+    key = registry.registry_key(feature_version, feats, params)
+    if registry.exists(REGISTRY_NAME, key) and not args.force:
+        if args.quantile is None:
+            registry.promote(REGISTRY_NAME, key)
+        print(f"{REGISTRY_NAME}/{key} already trained on this feature version; nothing to do.")
+        return
+    manifest = dict(feats=feats, source=source, feature_version=feature_version, params=params,
+                    train_end=train_end(dataset))
+    if args.finalize:
+        finalize(key, **manifest)
+        return
+
+    if args.external_memory:
+        fit = lambda q: train_quantile_external(dataset, feats, q, batch_rows=args.batch_rows)
+    else:
+        X, y = load_data(frame)
+        fit = lambda q: train_quantile(X, y, q)
+    if args.quantile is not None:
+        train_part(args.quantile, key, fit, force=args.force)
+        return
+    staged = registry.staging_dir(REGISTRY_NAME, key)
+    metrics, boosters = {}, {}
     for q in quantiles:
-        model, m = train_quantile(X, y, q)
-        fname = ART / f"xgb_q{int(q*100)}.json"
+        model, m = fit(q)
+        boosters[int(q*100)] = model.get_booster() if hasattr(model, "get_booster") else model
+        fname = staged / f"xgb_q{int(q*100)}.json"
         model.save_model(fname.as_posix())
         metrics[f"q{int(q*100)}"] = m
         print(f"Trained q={q:.2f} → {fname.name}, MAE={m['mae']:.2f}, RMSE={m['rmse']:.2f}")
-    (ART / "metrics_quantiles_full.json").write_text(json.dumps(metrics, indent=2))
-    print("Saved metrics:", ART / "metrics_quantiles_full.json")
+    seal(key, staged, boosters, metrics, **manifest)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,245 @@
+# pipeline/backfill.py
+"""Backfill history as independent UTC-month partitions.
+
+Each month goes through two idempotent steps:
+
+  fetch   SMARD load/wind/solar (and ENTSO-E prices when ENTSOE_TOKEN is set)
+          for the month -> data/raw/parts/<source>/<YYYY-MM>.parquet
+  build   features for the month (from its raw rows plus LOOKBACK of the
+          month before) -> data/features/hourly_parts/year=/month=, then
+          upsert just those rows into energy.features_hourly
+
+Steps record what they consumed in models/artifacts/backfill/<YYYY-MM>.json
+and are skipped when that is unchanged, so a failed or interrupted backfill
+resumes at the months that did not finish. All fetches finish before any
+build starts (a month's features read the previous month's raw rows).
+`finish` rewrites data/features/hourly.parquet from the partitions for the
+trainers. OPSD (`make fetch-opsd`) is still the base for years before SMARD.
+
+    python pipeline/backfill.py run --start 2015-01 --end 2024-12 [--workers 4] [--no-db]
+    python pipeline/backfill.py fetch --month 2019-03      # one partition (as the DAG does)
+    python pipeline/backfill.py build --month 2019-03 [--no-db]
+    python pipeline/backfill.py finish
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import pandas as pd
+
+from features import build_features
+from ingestion import fetch_entsoe, fetch_smard
+from models import registry
+from pipeline import telemetry
+from pipeline.cache import Digests, code_files
+
+ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
+STATE = ART / "backfill"
+FEA_PARTS = build_features.FEA / "hourly_parts"
+FEA = build_features.FEA / "hourly.parquet"
+SMARD = {"load": (fetch_smard.save_load, "smard_load"),
+         "wind": (fetch_smard.save_wind, "smard_gen_wind"),
+         "solar": (fetch_smard.save_solar, "smard_gen_solar")}
+ENTSOE = "entsoe_day_ahead"
+
+
+def months(start: str, end: str) -> list[str]:
+    """YYYY-MM labels from start to end inclusive (either YYYY-MM or YYYY-MM-DD)."""
+    return [p.strftime("%Y-%m") for p in pd.period_range(start[:7], end[:7], freq="M")]
+
+
+def bounds(month: str) -> tuple[pd.Timestamp, pd.Timestamp]:
+    lo = pd.Timestamp(f"{month}-01", tz="UTC")
+    return lo, lo + pd.DateOffset(months=1)
+
+
+def load_state(month: str) -> dict:
+    p = STATE / f"{month}.json"
+    return json.loads(p.read_text()) if p.exists() else {}
+
+
+def save_state(month: str, state: dict) -> None:
+    STATE.mkdir(parents=True, exist_ok=True)
+    registry._write_json_atomic(STATE / f"{month}.json", state)
+
+
+def _atomic(write, path: Path):
+    """Call write(tmp) and move the result into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    out = write(tmp)
+    os.replace(tmp, path)
+    return out
+
+
+@telemetry.instrument("backfill_fetch")
+def fetch_month(month: str, redo: bool = False) -> dict:
+    """Raw partitions for one month; a finished past month is not fetched again."""
+    state = load_state(month)
+    if state.get("fetch", {}).get("complete") and not redo:
+        return {"month": month, "step": "fetch", "skipped": True}
+    lo, hi = bounds(month)
+    last = hi - pd.Timedelta(hours=1)
+    cfg = fetch_smard.load_cfg()
+    region = cfg.get("region", "DE")
+    ids = {k: int(v) for k, v in cfg["series"].items()}
+    rows = {}
+    for name, (save, stem) in SMARD.items():
+        path = build_features.PARTS / stem / f"{month}.parquet"
+        df = _atomic(lambda tmp: save(ids, region, "hour", lo, last, out=tmp), path)
+        rows[stem] = len(df)
+    if fetch_entsoe.TOKEN:
+        df = fetch_entsoe.fetch_window(lo.to_pydatetime(), hi.to_pydatetime())
+        df = df[(df["ts_utc"] >= lo) & (df["ts_utc"] < hi)]
+        _atomic(lambda tmp: df.to_parquet(tmp, index=False),
+                build_features.PARTS / ENTSOE / f"{month}.parquet")
+        rows[ENTSOE] = len(df)
+    complete = hi <= pd.Timestamp.now(tz="UTC")     # the running month is refetched next time
+    state["fetch"] = {"rows": rows, "complete": bool(complete),
+                      "at": datetime.now(timezone.utc).isoformat()}
+    save_state(month, state)
+    return {"month": month, "step": "fetch", "rows": rows}
+
+
+def window_digest(path: Path, window) -> str:
+    """Digest of the rows of a single-file raw source with lo <= ts < hi.
+
+    Those files grow every day, so their file digest would change every
+    month's key; only the rows a month's features read count.
+    """
+    lo, hi = window
+    df = build_features._read_one(path, "ts_utc")
+    df = df[(df["ts_utc"] >= lo) & (df["ts_utc"] < hi)].sort_values("ts_utc", kind="stable")
+    h = hashlib.sha256(json.dumps(list(df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def raw_digest(month: str, digests: Digests) -> str:
+    """Digest of the raw rows the month's features are built from, and of the feature code."""
+    lo, hi = bounds(month)
+    window = (lo - build_features.LOOKBACK, hi)
+    parts, rows = [], {}
+    for stem in ("opsd_bootstrap", ENTSOE, *(s for _, s in SMARD.values())):
+        path = build_features.RAW / f"{stem}.parquet"
+        parts += build_features.month_parts(path, window)
+        if path.exists():
+            rows[path.as_posix()] = window_digest(path, window)
+    parts += [Path(f) for f in code_files("features/build_features.py")]
+    return registry.registry_key("", [f.as_posix() for f in parts] + sorted(rows),
+                                 {**{f.as_posix(): digests(f) for f in parts}, **rows})
+
+
+def partition_dir(month: str) -> Path:
+    lo, _ = bounds(month)
+    return FEA_PARTS / f"year={lo.year}" / f"month={lo.month}"
+
+
+@telemetry.instrument("backfill_build")
+def build_month(month: str, db: bool = True, redo: bool = False) -> dict:
+    """Feature partition for one month, then (db) an upsert of only its rows."""
+    state = load_state(month)
+    digests = Digests()
+    raw = raw_digest(month, digests)
+    out = {"month": month, "step": "build"}
+    done = state.get("build", {})
+    # a month that built no rows has no partition and is still done
+    if (redo or done.get("raw") != raw
+            or (done.get("rows", 0) > 0 and not partition_dir(month).exists())):
+        lo, hi = bounds(month)
+        df = build_features.build(lo, hi)
+        if len(df):
+            build_features.write_partitions(df, FEA_PARTS)
+        elif partition_dir(month).exists():
+            shutil.rmtree(partition_dir(month))      # stale rows from an earlier build
+        state["build"] = {"raw": raw, "rows": len(df), "at": datetime.now(timezone.utc).isoformat()}
+        save_state(month, state)
+        out["rows"] = len(df)
+    else:
+        out["skipped"] = True
+    if db and partition_dir(month).exists():
+        part = digests(partition_dir(month))
+        if redo or state.get("load", {}).get("features") != part:
+            from db import load_features_to_pg        # psycopg2 only where a DB is used
+            df = pd.read_parquet(partition_dir(month))
+            load_features_to_pg.main(df.set_index("ts_utc"))
+            state["load"] = {"features": part, "at": datetime.now(timezone.utc).isoformat()}
+            save_state(month, state)
+            out["loaded"] = True
+    digests.save()
+    return out
+
+
+def finish() -> int:
+    """data/features/hourly.parquet from all feature partitions."""
+    df = pd.read_parquet(FEA_PARTS).drop(columns=["year", "month"], errors="ignore")
+    df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
+    df = df.set_index("ts_utc").sort_index()
+    df = df.loc[~df.index.duplicated(keep="last")]
+    _atomic(lambda tmp: df.to_parquet(tmp), FEA)
+    print("Saved:", FEA, "rows:", len(df))
+    return len(df)
+
+
+def run_parallel(fn, labels, workers: int, **kw) -> list[str]:
+    """fn(label, **kw) for every month on a bounded process pool; returns the months that failed."""
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fn, m, **kw): m for m in labels}
+        for fut in as_completed(futures):
+            m = futures[fut]
+            try:
+                print(json.dumps(fut.result()))
+            except Exception as e:
+                failed.append(m)
+                print(json.dumps({"month": m, "step": fn.__name__, "error": f"{type(e).__name__}: {e}"}))
+    return sorted(failed)
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="fetch and build every month in [start, end], then finish")
+    r.add_argument("--start", required=True, help="First month (YYYY-MM)")
+    r.add_argument("--end", required=True, help="Last month (YYYY-MM)")
+    r.add_argument("--workers", type=int, default=4, help="Months built at once")
+    r.add_argument("--fetch-workers", type=int, default=4, help="Months fetched at once")
+    r.add_argument("--skip-fetch", action="store_true", help="Use the raw partitions on disk")
+    for name in ("fetch", "build"):
+        p = sub.add_parser(name, help=f"{name} one month")
+        p.add_argument("--month", required=True)
+    for p in (r, sub.choices["build"]):
+        p.add_argument("--no-db", action="store_true", help="Write parquet partitions only")
+    for p in (r, sub.choices["fetch"], sub.choices["build"]):
+        p.add_argument("--redo", action="store_true", help="Ignore the recorded state")
+    sub.add_parser("finish", help="Rewrite hourly.parquet from the feature partitions")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.cmd == "fetch":
+        print(json.dumps(fetch_month(args.month, args.redo)))
+    elif args.cmd == "build":
+        print(json.dumps(build_month(args.month, not args.no_db, args.redo)))
+    elif args.cmd == "finish":
+        finish()
+    else:
+        labels = months(args.start, args.end)
+        failed = [] if args.skip_fetch else run_parallel(fetch_month, labels, args.fetch_workers,
+                                                         redo=args.redo)
+        failed += run_parallel(build_month, [m for m in labels if m not in failed], args.workers,
+                               db=not args.no_db, redo=args.redo)
+        if failed:
+            raise SystemExit(f"{len(failed)} month(s) failed: {', '.join(sorted(failed))}. "
+                             "Re-run the same command to resume.")
+        finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# pipeline/cache.py
+"""Content-addressed stage cache for the pipeline scripts.
+
+A stage's fingerprint is a sha256 over its name and arguments, the bytes of
+its code (the script plus every repo module it imports, transitively) and
+the bytes of its input files. After a successful run the fingerprint and
+the digests of the stage's outputs go into the manifest; a later run with
+the same fingerprint and untouched outputs is skipped. Each input that is
+another stage's recorded output is noted with that stage, so the manifest
+also gives the lineage of every artifact. File digests are memoised on
+(size, mtime_ns), so an unchanged tree is fingerprinted without reading it.
+
+Stages with only database side effects (load, save) have no file outputs to
+check; use --force after resetting the database.
+
+    python pipeline/cache.py run build load train conformal forecast save [--force]
+    python pipeline/cache.py status
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import ast
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+from models import registry
+from pipeline import telemetry
+
+ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
+CACHE = ART / "stage_cache"
+MANIFEST = CACHE / "manifest.json"     # stage -> last successful run
+DIGESTS = CACHE / "digests.json"       # path -> [size, mtime_ns, sha256]
+LOG = CACHE / "runs.jsonl"             # one line per run or skip
+FEA = "data/features/hourly.parquet"
+MODELS = ("models/registry/*/current.json", "models/artifacts/xgb_*.json",
+          "models/artifacts/bundle.bin")
+
+
+@dataclass(frozen=True)
+class Stage:
+    script: str
+    inputs: tuple[str, ...] = ()     # globs, files or directories
+    outputs: tuple[str, ...] = ()    # must exist unchanged for a skip
+    args: tuple[str, ...] = ()
+
+
+STAGES = {
+    "build": Stage("features/build_features.py", ("data/raw/*.parquet", "data/raw/parts"),
+                   (FEA, "data/features/hourly_parts")),
+    "load": Stage("db/load_features_to_pg.py", (FEA, "db/rollups.sql")),
+    "train": Stage("models/train_quantiles_full.py", (FEA,),
+                   ("models/registry/quantiles_full/current.json",)),
+    "conformal": Stage("models/conformal.py", (FEA, *MODELS),
+                       ("models/artifacts/conformal.npz", "models/artifacts/conformal.json")),
+    "forecast": Stage("models/predict_fan.py", (FEA, *MODELS, "models/artifacts/conformal.npz"),
+                      ("models/artifacts/predictions_fan.csv", "models/artifacts/predictions_fan.png")),
+    "save": Stage("db/save_predictions.py", ("models/artifacts/predictions_fan.csv", "db/rollups.sql")),
+    "evaluate": Stage("models/evaluate.py", (FEA, *MODELS),
+                      ("models/artifacts/evaluation.json", "models/artifacts/backtest_quantile.json")),
+    "importance": Stage("models/feature_importance.py", (FEA, *MODELS),
+                        ("models/artifacts/feature_importance.png",)),
+}
+
+
+class Digests:
+    """sha256 of files and directories, memoised on (size, mtime_ns)."""
+
+    def __init__(self, path: Path = DIGESTS):
+        self.path = path
+        self.memo = json.loads(path.read_text()) if path.exists() else {}
+        self.dirty = False
+
+    def file(self, p: Path) -> str:
+        st = p.stat()
+        hit = self.memo.get(p.as_posix())
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        sha = registry.file_digest(p)
+        self.memo[p.as_posix()] = [st.st_size, st.st_mtime_ns, sha]
+        self.dirty = True
+        return sha
+
+    def __call__(self, path) -> str | None:
+        p = Path(path)
+        if p.is_dir():
+            h = hashlib.sha256()
+            for f in sorted(f for f in p.rglob("*") if f.is_file()):
+                h.update(f"{f.relative_to(p).as_posix()}:{self.file(f)}\n".encode())
+            return h.hexdigest()
+        return self.file(p) if p.is_file() else None
+
+    def save(self) -> None:
+        if self.dirty:
+            CACHE.mkdir(parents=True, exist_ok=True)
+            registry._write_json_atomic(self.path, self.memo)
+            self.dirty = False
+
+
+def code_files(script: str) -> list[str]:
+    """The script and every repo module it imports, transitively."""
+    seen, todo = set(), [Path(script)]
+    while todo:
+        p = todo.pop()
+        if p in seen or not p.is_file():
+            continue
+        seen.add(p)
+        for node in ast.walk(ast.parse(p.read_bytes())):
+            if isinstance(node, ast.Import):
+                mods = [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                mods = [node.module, *(f"{node.module}.{a.name}" for a in node.names)]
+            else:
+                continue
+            todo += [f for f in (Path(m.replace(".", "/") + ".py") for m in mods) if f.is_file()]
+    return sorted(p.as_posix() for p in seen)
+
+
+def expand(patterns) -> list[str]:
+    """Paths matching the globs; a pattern with no match is kept (and digests to None)."""
+    out = set()
+    for pat in patterns:
+        out.update(glob.glob(pat) or [pat])
+    return sorted(out)
+
+
+@dataclass
+class Key:
+    stage: str
+    fingerprint: str
+    code: dict
+    inputs: dict
+    fresh: bool = False
+    digests: Digests = field(default=None, repr=False)
+
+
+def _manifest() -> dict:
+    return json.loads(MANIFEST.read_text()) if MANIFEST.exists() else {}
+
+
+def check(name: str, force: bool = False, digests: Digests | None = None) -> Key:
+    """Fingerprint a stage's current code and inputs; fresh if a recorded run matches."""
+    st = STAGES[name]
+    digests = digests or Digests()
+    code = {p: digests(p) for p in code_files(st.script)}
+    inputs = {p: digests(p) for p in expand(st.inputs)}
+    payload = json.dumps({"stage": name, "args": st.args, "code": code, "inputs": inputs},
+                         sort_keys=True)
+    key = Key(name, hashlib.sha256(payload.encode()).hexdigest(), code, inputs, digests=digests)
+    entry = _manifest().get(name)
+    key.fresh = (not force and entry is not None and entry["fingerprint"] == key.fingerprint
+                 and all(digests(p) == d for p, d in entry["outputs"].items()))
+    digests.save()
+    return key
+
+
+def _log(row: dict) -> None:
+    CACHE.mkdir(parents=True, exist_ok=True)
+    with open(LOG, "a") as f:
+        f.write(json.dumps(row) + "\n")
+
+
+def skipped(key: Key) -> None:
+    print(f"[{key.stage}] up to date ({key.fingerprint[:12]}); skipped")
+    _log({"stage": key.stage, "fingerprint": key.fingerprint, "cached": True,
+          "at": datetime.now(timezone.utc).isoformat()})
+
+
+def record(key: Key, wall_s: float) -> dict:
+    """Store a successful run: fingerprint, input/code digests, output digests, upstream stages."""
+    digests = key.digests or Digests()
+    outputs = {p: digests(p) for p in expand(STAGES[key.stage].outputs)}
+    digests.save()
+    CACHE.mkdir(parents=True, exist_ok=True)
+    with open(CACHE / ".lock", "w") as lock:       # parallel DAG tasks share the manifest
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        manifest = _manifest()
+        upstream = {p: s for p, d in key.inputs.items()
+                    for s, e in manifest.items() if s != key.stage and d and e["outputs"].get(p) == d}
+        entry = {"fingerprint": key.fingerprint, "script": STAGES[key.stage].script,
+                 "args": list(STAGES[key.stage].args), "code": key.code, "inputs": key.inputs,
+                 "upstream": upstream, "outputs": outputs, "wall_s": round(wall_s, 3),
+                 "finished_at": datetime.now(timezone.utc).isoformat()}
+        manifest[key.stage] = entry
+        registry._write_json_atomic(MANIFEST, manifest)
+    _log({"stage": key.stage, "fingerprint": key.fingerprint, "cached": False,
+          "wall_s": entry["wall_s"], "at": entry["finished_at"]})
+    return entry
+
+
+def run(names, force: bool = False) -> None:
+    """Run each stage's script unless its fingerprint is already recorded; stop on failure."""
+    for name in names:
+        key = check(name, force)
+        if key.fresh:
+            skipped(key)
+            continue
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, STAGES[name].script, *STAGES[name].args],
+                              env={**os.environ, "PIPELINE_RUN_ID": telemetry.RUN_ID})
+        if proc.returncode != 0:
+            raise SystemExit(f"[{name}] failed with exit code {proc.returncode}")
+        entry = record(key, time.perf_counter() - t0)
+        print(f"[{name}] ran in {entry['wall_s']:.2f}s ({key.fingerprint[:12]})")
+
+
+def status() -> None:
+    digests = Digests()
+    for name in STAGES:
+        key = check(name, digests=digests)
+        entry = _manifest().get(name)
+        when = entry["finished_at"] if entry else "never"
+        state = "fresh" if key.fresh else "stale"
+        ups = sorted(set(entry["upstream"].values())) if entry else []
+        print(f"{name:<11} {state:<6} last run {when}" + (f"  <- {', '.join(ups)}" if ups else ""))
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="Run stages in order, skipping those already up to date")
+    r.add_argument("stages", nargs="+", choices=list(STAGES))
+    r.add_argument("--force", action="store_true", help="Run even if up to date")
+    sub.add_parser("status", help="Fresh/stale per stage and its upstream stages")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.cmd == "run":
+        run(args.stages, args.force)
+    else:
+        status()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# pipeline/profiling.py
+"""Opt-in profiling for the pipeline entry points and API requests.
+
+    EPFD_PROFILE=cpu,mem,timers python models/train_baseline.py
+    python pipeline/profiling.py --modes sample,mem models/train_baseline.py [script args]
+
+Every stage wrapped by pipeline/telemetry.py (each script's main) is
+profiled when EPFD_PROFILE is set; the CLI form also covers scripts
+without a stage. Modes:
+
+  cpu     cProfile -> cpu.prof (snakeviz / pstats) and the top functions
+  sample  a thread sampling every thread's stack each EPFD_PROFILE_INTERVAL
+          seconds (default 0.005) -> samples.folded for flamegraph.pl or
+          speedscope; far less overhead than cProfile on tight loops
+  mem     tracemalloc -> top allocation sites at the end, peak traced
+          size, and mem.snapshot for Snapshot.load(...).compare_to(...)
+  timers  calls / total / max of the hot spots wrapped with @timed
+          (add_lags_rollings, fetch_series, walk_forward_eval,
+          execute_values, forecaster.forecast)
+
+Reports go to models/artifacts/profiles/<stage>-<UTC time>-<pid>/ with a
+summary.txt of the top EPFD_PROFILE_TOP (25) rows per mode. The API
+profiles a request only when EPFD_PROFILE is set and the request carries
+an X-Profile header. With EPFD_PROFILE unset, @timed returns the function
+itself and stages do not touch this module beyond one flag check.
+"""
+from __future__ import annotations
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+import functools
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+VALID = ("cpu", "sample", "mem", "timers")
+MODES = frozenset(m.strip() for m in os.getenv("EPFD_PROFILE", "").split(",") if m.strip())
+if MODES & {"1", "all"}:
+    MODES = frozenset(("cpu", "mem", "timers"))
+if MODES - set(VALID):
+    raise SystemExit(f"EPFD_PROFILE: unknown mode(s) {sorted(MODES - set(VALID))}; use {', '.join(VALID)}.")
+ENABLED = bool(MODES)
+OUT = Path(os.getenv("EPFD_PROFILE_DIR", "models/artifacts/profiles"))
+TOP = int(os.getenv("EPFD_PROFILE_TOP", "25"))
+INTERVAL = float(os.getenv("EPFD_PROFILE_INTERVAL", "0.005"))
+
+# sync routes run in the threadpool, which cProfile (event-loop thread only) would miss
+API_MODES = (MODES - {"cpu"}) | ({"sample"} if "cpu" in MODES else set())
+
+_timers: dict[str, list] = {}          # name -> [calls, total_s, max_s]
+_timers_lock = threading.Lock()
+_busy = threading.Lock()               # one session per process; nested stages join the outer one
+
+
+def timed(name: str | None = None):
+    """Decorator: per-function call count and time while `timers` is on; a no-op otherwise."""
+    def wrap(fn):
+        if "timers" not in MODES:
+            return fn
+        key = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                dt = time.perf_counter() - t0
+                with _timers_lock:
+                    s = _timers.setdefault(key, [0, 0.0, 0.0])
+                    s[0] += 1
+                    s[1] += dt
+                    s[2] = max(s[2], dt)
+        return inner
+    return wrap
+
+
+class Sampler:
+    """Statistical CPU profile: stacks of all other threads every `interval` seconds."""
+
+    def __init__(self, interval: float = INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def top(self, n: int = TOP) -> list[str]:
+        total = sum(self.stacks.values()) or 1
+        own, incl = Counter(), Counter()
+        for stack, k in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += k
+            for f in set(frames):
+                incl[f] += k
+        rows = [f"{total} samples every {self.interval * 1000:g} ms", "  self%   incl%  function"]
+        rows += [f"{100 * k / total:6.1f}  {100 * incl[f] / total:6.1f}  {f}" for f, k in own.most_common(n)]
+        return rows
+
+
+class Session:
+    """Profile the enclosed block in the given modes and write the reports on exit.
+
+    Only one session runs per process at a time: a stage started inside
+    another (or a concurrent API request) runs unprofiled, and `dir` is None.
+    """
+
+    def __init__(self, name: str, modes=None):
+        self.name = name
+        self.modes = frozenset(MODES if modes is None else modes)
+        self.dir: Path | None = None
+        self._owner = False
+
+    def __enter__(self):
+        if not self.modes or not _busy.acquire(blocking=False):
+            return self
+        self._owner = True
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self.dir = OUT / f"{self.name.replace('/', '_')}-{stamp}-{os.getpid()}"
+        with _timers_lock:
+            self._timers0 = {k: list(v) for k, v in _timers.items()}
+        if "mem" in self.modes:
+            import tracemalloc
+            tracemalloc.start(10)
+        if "sample" in self.modes:
+            self._sampler = Sampler()
+            self._sampler.start()
+        if "cpu" in self.modes:
+            import cProfile
+            self._prof = cProfile.Profile()
+            self._prof.enable()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if not self._owner:
+            return False
+        try:
+            wall = time.perf_counter() - self._t0
+            if "cpu" in self.modes:
+                self._prof.disable()
+            if "sample" in self.modes:
+                self._sampler.stop()
+            snap = None
+            if "mem" in self.modes:
+                import tracemalloc
+                snap = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            self.dir.mkdir(parents=True, exist_ok=True)
+            summary = [f"{self.name}: {wall:.3f}s wall, modes {','.join(sorted(self.modes))}"]
+            if "cpu" in self.modes:
+                summary += ["", "== cpu (cProfile, by cumulative time) =="] + self._cpu_report()
+            if "sample" in self.modes:
+                (self.dir / "samples.folded").write_text(
+                    "".join(f"{s} {k}\n" for s, k in self._sampler.stacks.most_common()))
+                summary += ["", "== sample (by own time) =="] + self._sampler.top()
+            if snap is not None:
+                snap.dump(str(self.dir / "mem.snapshot"))
+                summary += ["", f"== mem (tracemalloc; peak traced {peak / 2**20:.1f} MB) =="]
+                summary += [str(s) for s in snap.statistics("lineno")[:TOP]]
+            if "timers" in self.modes:
+                summary += ["", "== timers =="] + self._timer_report()
+            (self.dir / "summary.txt").write_text("\n".join(summary) + "\n")
+            print(f"[profile] {self.name}: {self.dir / 'summary.txt'}", file=sys.stderr)
+        finally:
+            self._owner = False
+            _busy.release()
+        return False
+
+    def _cpu_report(self) -> list[str]:
+        import pstats
+        self._prof.dump_stats(str(self.dir / "cpu.prof"))
+        buf = io.StringIO()
+        pstats.Stats(self._prof, stream=buf).strip_dirs().sort_stats("cumulative").print_stats(TOP)
+        return [line for line in buf.getvalue().splitlines() if line.strip()]
+
+    def _timer_report(self) -> list[str]:
+        with _timers_lock:
+            now = {k: list(v) for k, v in _timers.items()}
+        rows = {}
+        for k, (calls, total, mx) in now.items():
+            c0, t0, _ = self._timers0.get(k, (0, 0.0, 0.0))
+            if calls > c0:
+                rows[k] = {"calls": calls - c0, "total_s": round(total - t0, 6), "max_s": round(mx, 6)}
+        (self.dir / "timers.json").write_text(json.dumps(rows, indent=2))
+        out = [f"{'function':<32} {'calls':>8} {'total_s':>10} {'max_s':>10}"]
+        out += [f"{k:<32} {r['calls']:>8} {r['total_s']:>10.4f} {r['max_s']:>10.4f}"
+                for k, r in sorted(rows.items(), key=lambda kv: -kv[1]["total_s"])]
+        return out
+
+
+def parse_args(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Run a pipeline script under the profiler.")
+    ap.add_argument("--modes", default="cpu,mem,timers", help=f"Comma list from: {', '.join(VALID)}")
+    ap.add_argument("script", help="e.g. models/train_baseline.py")
+    ap.add_argument("args", nargs=argparse.REMAINDER, help="Passed to the script")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # modes are read at import, so set them before the script (and pipeline.profiling) is imported
+    os.environ["EPFD_PROFILE"] = args.modes
+    sys.path.insert(0, os.getcwd())
+    import importlib
+    import runpy
+    prof = importlib.import_module("pipeline.profiling")
+    sys.argv = [args.script, *args.args]
+    with prof.Session(Path(args.script).stem):
+        runpy.run_path(args.script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
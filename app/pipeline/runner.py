@@ -0,0 +1,240 @@
+# pipeline/runner.py
+"""Run the daily pipeline stages in one warm process.
+
+Each stage is a callable over a shared Run: heavy modules are imported once,
+and frames produced by one stage (features, fan) are handed to the next in
+memory instead of being re-read from parquet/CSV. Every stage records wall
+and CPU time plus the time spent on first imports, and the run writes a
+JSON report. With `--cache`, stages whose code and inputs match their last
+recorded run (pipeline/cache.py) are skipped. `--cold` runs the same stages as separate `python script.py`
+processes (as the BashOperator DAG does) for comparison.
+
+    python pipeline/runner.py [--stages build,load,train,forecast,save] [--start D --end D] [--cache]
+    python pipeline/runner.py --cold --report models/artifacts/pipeline_cold.json
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import importlib
+import json
+import subprocess
+import sys
+import time
+
+from pipeline import cache
+
+ART = Path("models/artifacts"); ART.mkdir(parents=True, exist_ok=True)
+REPORT = ART / "pipeline_run.json"
+
+
+@dataclass
+class StageTiming:
+    name: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    import_s: float = 0.0
+    ok: bool = True
+    error: str | None = None
+    cached: bool = False
+
+
+@dataclass
+class Run:
+    start: str | None = None
+    end: str | None = None
+    frames: dict = field(default_factory=dict)
+    timings: list[StageTiming] = field(default_factory=list)
+    _current: StageTiming | None = None
+
+    def module(self, name: str):
+        """Import (timed on first use, free afterwards)."""
+        if name in sys.modules:
+            return sys.modules[name]
+        t0 = time.perf_counter()
+        mod = importlib.import_module(name)
+        if self._current is not None:
+            self._current.import_s += time.perf_counter() - t0
+        return mod
+
+
+def stage_migrate(run: Run):
+    run.module("db.migrations").main()
+
+
+def stage_fetch(run: Run):
+    argv = []
+    if run.start:
+        argv += ["--start", run.start]
+    if run.end:
+        argv += ["--end", run.end]
+    run.module("ingestion.fetch_smard").main(argv)
+
+
+def stage_build(run: Run):
+    bf = run.module("features.build_features")
+    df = bf.build()
+    bf.write(df)
+    run.frames["features"] = df
+    print("Built features:", len(df), "rows")
+
+
+def stage_load(run: Run):
+    run.module("db.load_features_to_pg").main(run.frames.get("features"))
+
+
+DQ_SQL = """
+SELECT (SELECT count(*) FROM energy.features_hourly WHERE ts_utc >= now() - interval '2 days'),
+       (SELECT count(*) FROM (SELECT ts_utc FROM energy.features_hourly
+                              GROUP BY 1 HAVING count(*) > 1) d)
+"""
+
+
+def stage_dq(run: Run):
+    rollups = run.module("db.rollups")
+    psycopg2 = run.module("psycopg2")
+    with psycopg2.connect(**rollups.DB) as conn, conn.cursor() as cur:
+        cur.execute(DQ_SQL)
+        recent, dupes = cur.fetchone()
+    if not recent or dupes:
+        raise SystemExit(f"Data quality failed: {recent} rows in the last 2 days, {dupes} duplicate timestamps.")
+
+
+def stage_train(run: Run):
+    run.module("models.train_quantiles_full").main([], frame=run.frames.get("features"))
+
+
+def stage_conformal(run: Run):
+    run.module("models.conformal").main([])
+
+
+def stage_forecast(run: Run):
+    run.frames["fan"] = run.module("models.predict_fan").main(run.frames.get("features"))
+
+
+def stage_save(run: Run):
+    run.module("db.save_predictions").save_fan(df=run.frames.get("fan"))
+
+
+def stage_evaluate(run: Run):
+    run.module("models.evaluate").main([])
+
+
+STAGES = {
+    "migrate": stage_migrate,
+    "fetch": stage_fetch,
+    "build": stage_build,
+    "load": stage_load,
+    "dq": stage_dq,
+    "train": stage_train,
+    "conformal": stage_conformal,
+    "forecast": stage_forecast,
+    "save": stage_save,
+    "evaluate": stage_evaluate,
+}
+SCRIPTS = {     # what the per-task DAG runs for the same stage
+    "migrate": ["db/migrations.py"],
+    "fetch": ["ingestion/fetch_smard.py"],
+    "build": ["features/build_features.py"],
+    "load": ["db/load_features_to_pg.py"],
+    "train": ["models/train_quantiles_full.py"],
+    "conformal": ["models/conformal.py"],
+    "forecast": ["models/predict_fan.py"],
+    "save": ["db/save_predictions.py"],
+    "evaluate": ["models/evaluate.py"],
+}
+DEFAULT = ("build", "load", "train", "conformal", "forecast", "save")
+
+
+def run_stages(names, run: Run | None = None, use_cache: bool = False) -> Run:
+    """Run stages in order in this process; stops at the first failure (re-raised)."""
+    run = run or Run()
+    for name in names:
+        t = StageTiming(name)
+        run.timings.append(t)
+        run._current = t
+        w0, c0 = time.perf_counter(), time.process_time()
+        key = cache.check(name) if use_cache and name in cache.STAGES else None
+        try:
+            if key is not None and key.fresh:
+                t.cached = True
+                cache.skipped(key)
+                continue
+            STAGES[name](run)
+            if key is not None:
+                cache.record(key, time.perf_counter() - w0)
+        except BaseException as e:
+            t.ok, t.error = False, f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            t.wall_s = time.perf_counter() - w0
+            t.cpu_s = time.process_time() - c0
+            run._current = None
+            print(f"[{name}] {t.wall_s:.2f}s wall, {t.cpu_s:.2f}s cpu, {t.import_s:.2f}s imports")
+    return run
+
+
+def run_cold(names, start=None, end=None) -> list[StageTiming]:
+    """Same stages as one fresh interpreter each (the BashOperator way)."""
+    out = []
+    for name in names:
+        if name not in SCRIPTS:
+            continue
+        cmd = [sys.executable, *SCRIPTS[name]]
+        if name == "fetch":
+            cmd += [a for k, v in (("--start", start), ("--end", end)) if v for a in (k, v)]
+        w0 = time.perf_counter()
+        proc = subprocess.run(cmd)
+        t = StageTiming(name, wall_s=time.perf_counter() - w0, ok=proc.returncode == 0,
+                        error=None if proc.returncode == 0 else f"exit {proc.returncode}")
+        out.append(t)
+        print(f"[{name}] cold {t.wall_s:.2f}s wall")
+        if not t.ok:
+            break
+    return out
+
+
+def write_report(path: Path, mode: str, timings: list[StageTiming], total_s: float) -> None:
+    path.write_text(json.dumps({
+        "mode": mode, "finished_at": datetime.now(timezone.utc).isoformat(),
+        "total_wall_s": total_s, "stages": [asdict(t) for t in timings]}, indent=2))
+    print("Saved:", path)
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stages", default=",".join(DEFAULT),
+                    help=f"Comma list, in order, from: {', '.join(STAGES)}")
+    ap.add_argument("--start", default=None, help="Fetch window start (YYYY-MM-DD)")
+    ap.add_argument("--end", default=None, help="Fetch window end (YYYY-MM-DD)")
+    ap.add_argument("--cold", action="store_true", help="One subprocess per stage, for comparison")
+    ap.add_argument("--cache", action="store_true",
+                    help="Skip stages whose code and inputs are unchanged since their last run")
+    ap.add_argument("--report", default=None)
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in names if s not in STAGES]
+    if unknown:
+        raise SystemExit(f"Unknown stages {unknown}; have {list(STAGES)}")
+    report = Path(args.report) if args.report else REPORT
+    t0 = time.perf_counter()
+    if args.cold:
+        timings = run_cold(names, args.start, args.end)
+        write_report(report, "cold", timings, time.perf_counter() - t0)
+        if not all(t.ok for t in timings):
+            raise SystemExit(1)
+        return
+    run = Run(start=args.start, end=args.end)
+    try:
+        run_stages(names, run, use_cache=args.cache)
+    finally:
+        write_report(report, "warm", run.timings, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# pipeline/telemetry.py
+"""Per-stage resource telemetry for the pipeline entry points.
+
+    @telemetry.instrument("build_features")
+    def main():
+        ...
+        telemetry.current().wrote(path, rows=len(df))
+
+Each stage records wall and CPU time, peak RSS, rows in/out and bytes
+read/written, tagged with a run id (the Airflow DAG run id when set, so
+all tasks of one run group together). Rows go to energy.pipeline_metrics
+(db/pipeline_metrics.sql); if the database is unreachable they are
+appended to models/artifacts/pipeline_metrics.jsonl instead.
+
+EPFD_TELEMETRY=off disables recording; =file skips the database.
+With EPFD_PROFILE set, each stage is also profiled (pipeline/profiling.py)
+and its report directory is noted in `extra`.
+Peak RSS is the process high-water mark, i.e. per stage when each stage
+is its own process (BashOperator DAG), cumulative in pipeline/runner.py.
+"""
+from __future__ import annotations
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timezone
+from pathlib import Path
+import functools
+import json
+import os
+import resource
+import socket
+import sys
+import time
+import uuid
+
+from pipeline import profiling
+
+ART = Path("models/artifacts")
+FALLBACK = ART / "pipeline_metrics.jsonl"
+MODE = os.getenv("EPFD_TELEMETRY", "pg")        # pg | file | off
+RUN_ID = (os.getenv("PIPELINE_RUN_ID") or os.getenv("AIRFLOW_CTX_DAG_RUN_ID")
+          or f"local-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}")
+os.environ.setdefault("PIPELINE_RUN_ID", RUN_ID)    # subprocesses join the same run
+INSERT_SQL = """
+INSERT INTO energy.pipeline_metrics (run_id, stage, started_at, wall_s, cpu_s, peak_rss_mb,
+    rows_in, rows_out, bytes_read, bytes_written, ok, error, host, extra)
+VALUES (%(run_id)s, %(stage)s, %(started_at)s, %(wall_s)s, %(cpu_s)s, %(peak_rss_mb)s,
+    %(rows_in)s, %(rows_out)s, %(bytes_read)s, %(bytes_written)s, %(ok)s, %(error)s, %(host)s,
+    %(extra)s::jsonb)
+"""
+
+
+def _size(path) -> int:
+    p = Path(path)
+    if p.is_dir():
+        return sum(f.stat().st_size for f in p.rglob("*") if f.is_file())
+    return p.stat().st_size if p.exists() else 0
+
+
+def peak_rss_mb() -> float:
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / (1024 * 1024) if sys.platform == "darwin" else kb / 1024    # bytes on macOS
+
+
+@dataclass
+class StageMetrics:
+    stage: str
+    run_id: str = RUN_ID
+    started_at: str = ""
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_mb: float = 0.0
+    rows_in: int | None = None
+    rows_out: int | None = None
+    bytes_read: int = 0
+    bytes_written: int = 0
+    ok: bool = True
+    error: str | None = None
+    host: str = field(default_factory=socket.gethostname)
+    extra: dict = field(default_factory=dict)
+
+    def read(self, path, rows: int | None = None) -> None:
+        """Count a file or directory read (and optionally the rows taken from it)."""
+        self.bytes_read += _size(path)
+        if rows is not None:
+            self.rows_in = (self.rows_in or 0) + int(rows)
+
+    def wrote(self, path, rows: int | None = None) -> None:
+        self.bytes_written += _size(path)
+        if rows is not None:
+            self.rows_out = (self.rows_out or 0) + int(rows)
+
+
+class _Null(StageMetrics):
+    """Stand-in when no stage is active: accepts and drops everything."""
+
+    def read(self, path, rows=None) -> None:
+        pass
+
+    def wrote(self, path, rows=None) -> None:
+        pass
+
+
+_NULL = _Null("-")
+_active: list[StageMetrics] = []
+
+
+def current() -> StageMetrics:
+    """The innermost active stage (a no-op recorder outside any stage)."""
+    return _active[-1] if _active else _NULL
+
+
+def record(m: StageMetrics) -> None:
+    row = asdict(m)
+    if MODE == "pg":
+        try:
+            import psycopg2
+            from db import rollups
+            with psycopg2.connect(connect_timeout=3, **rollups.DB) as conn, conn.cursor() as cur:
+                cur.execute(INSERT_SQL, {**row, "extra": json.dumps(row["extra"])})
+            conn.close()
+            return
+        except Exception as e:
+            row["extra"] = {**row["extra"], "pg_error": f"{type(e).__name__}: {e}"}
+    ART.mkdir(parents=True, exist_ok=True)
+    with open(FALLBACK, "a") as f:
+        f.write(json.dumps(row, default=str) + "\n")
+
+
+def _profiled(name: str):
+    return profiling.Session(name) if profiling.ENABLED else nullcontext()
+
+
+@contextmanager
+def stage(name: str, **extra):
+    """Measure the enclosed block as one stage and record it (also on failure)."""
+    if MODE == "off":
+        with _profiled(name):
+            yield _NULL
+        return
+    m = StageMetrics(name, started_at=datetime.now(timezone.utc).isoformat(), extra=extra)
+    _active.append(m)
+    w0, c0 = time.perf_counter(), time.process_time()
+    prof = None
+    try:
+        with _profiled(name) as prof:
+            yield m
+    except BaseException as e:
+        m.ok = isinstance(e, SystemExit) and e.code in (None, 0)
+        m.error = None if m.ok else f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        m.wall_s = time.perf_counter() - w0
+        m.cpu_s = time.process_time() - c0
+        m.peak_rss_mb = peak_rss_mb()
+        if prof is not None and prof.dir is not None:
+            m.extra["profile"] = prof.dir.as_posix()
+        _active.remove(m)
+        record(m)
+
+
+def instrument(name: str):
+    """Decorator: run the function as stage `name`."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
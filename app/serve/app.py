@@ -0,0 +1,115 @@
+# serve/app.py
+"""Model-serving process: concurrent requests are scored in micro-batches.
+
+    uvicorn serve.app:app --port 8001
+
+POST /predict        rows of one-step features  -> quantiles per row
+POST /forecast/24h   issue timestamps           -> direct 24h quantile fan per issue
+GET  /stats          latency and batch-size histograms per batcher
+
+Responses are repaired (non-crossing) like the web API's. Where the target
+hours are known (the default latest row, every direct fan) the snapshot's
+conformal offsets are applied as well.
+"""
+from __future__ import annotations
+from contextlib import asynccontextmanager
+import os
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from models import direct, quantile_fn
+from serve.batcher import MicroBatcher
+from web.serving_state import StateHolder
+
+WORKERS = int(os.getenv("EPFD_BATCH_WORKERS", os.cpu_count() or 1))
+MAX_BATCH = int(os.getenv("EPFD_MAX_BATCH", "512"))
+MAX_WAIT_MS = float(os.getenv("EPFD_MAX_WAIT_MS", "2"))
+
+# one OpenMP thread per booster call: parallelism comes from concurrent batches. The
+# direct multi-horizon set lives in the same snapshot, so a retrain or reload swaps both.
+state = StateHolder(poll_seconds=float(os.getenv("EPFD_RELOAD_SECONDS", "30")), nthread=1,
+                    with_direct=True)
+state.preload()
+
+# each request passes the models of the snapshot it built X from (see MicroBatcher.submit)
+batchers = {"one_step": MicroBatcher(None, MAX_BATCH, MAX_WAIT_MS, WORKERS),
+            "direct": MicroBatcher(None, MAX_BATCH, MAX_WAIT_MS, WORKERS)}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    state.start()
+    for b in batchers.values():
+        await b.start()
+    yield
+    for b in batchers.values():
+        await b.stop()
+    state.stop()
+
+app = FastAPI(title="Energy Forecast Serving", lifespan=lifespan)
+
+
+class RowsRequest(BaseModel):
+    rows: list[dict[str, float]] | None = None      # by feature name, missing -> NaN
+    x: list[list[float]] | None = None              # already in model feature order
+
+
+class ForecastRequest(BaseModel):
+    issue_ts: list[str] | None = None               # default: latest feature hour
+
+
+def _snapshot():
+    snap = state.get()
+    if snap is None:
+        raise HTTPException(status_code=503, detail=state.error or "Model state not loaded.")
+    return snap
+
+
+@app.post("/predict")
+async def predict(req: RowsRequest):
+    snap = _snapshot()
+    if req.x is not None:
+        X = np.asarray(req.x, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != len(snap.features):
+            raise HTTPException(status_code=422, detail=f"x must be (n, {len(snap.features)})")
+    elif req.rows:
+        X = pd.DataFrame(req.rows).reindex(columns=snap.features).to_numpy(np.float32)
+    else:
+        X = snap.x_last
+    P = await batchers["one_step"].submit(X, snap.models)
+    # only the default row has a known hour (the same one Snapshot.next_hour calibrates)
+    P = snap.calibrate(P, snap.tail.index[-1:]) if X is snap.x_last else quantile_fn.repair(P)
+    qs = snap.models.quantiles
+    return {"quantiles": qs, "predictions": P.round(4).tolist()}
+
+
+@app.post("/forecast/24h")
+async def forecast_24h(req: ForecastRequest):
+    snap = _snapshot()
+    direct_models = snap.direct
+    if direct_models is None:
+        raise HTTPException(status_code=503, detail="No direct models. Run `make train-direct`.")
+    hist = snap.tail
+    try:
+        issue = (pd.DatetimeIndex(pd.to_datetime(req.issue_ts, utc=True)) if req.issue_ts
+                 else pd.DatetimeIndex([hist.index.max()]))
+        X = direct.design_matrix(hist.loc[issue])
+    except KeyError as e:
+        raise HTTPException(status_code=422, detail=f"issue time not in feature tail: {e}")
+    X = X.reindex(columns=direct_models.features).to_numpy(np.float32)
+    P = await batchers["direct"].submit(X, direct_models)
+    target_ts = pd.DatetimeIndex([t + pd.Timedelta(hours=h) for t in issue for h in direct.HORIZONS])
+    P = snap.calibrate(P, target_ts, direct_models.quantiles)
+    P = P.reshape(len(issue), len(direct.HORIZONS), -1)
+    return {"quantiles": direct_models.quantiles, "horizons": list(direct.HORIZONS),
+            "forecasts": [{"issue_ts": str(t), "values": p.T.round(2).tolist()}
+                          for t, p in zip(issue, P)]}
+
+
+@app.get("/stats")
+def stats():
+    return {name: b.stats.summary() | {"workers": b.workers, "max_batch": b.max_batch,
+                                       "max_wait_ms": 1000 * b.max_wait}
+            for name, b in batchers.items()}
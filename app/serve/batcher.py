@@ -0,0 +1,134 @@
+# serve/batcher.py
+"""Request micro-batching for row-wise model scoring.
+
+Callers submit an (n, F) block and await a future. Batch workers take the
+first waiting request, keep collecting until `max_batch` rows or
+`max_wait_ms` have passed, score the stacked block with one predict call
+(one inplace_predict per booster) in a thread, and split the result back.
+A request may name the model to score it with (e.g. the one whose feature
+order built X); requests for different models in one batch are scored
+separately, so a hot reload never mixes features and boosters.
+XGBoost releases the GIL while predicting, so `workers` batches run on
+separate cores at the same time.
+"""
+from __future__ import annotations
+from collections import Counter, deque
+import asyncio
+import os
+import time
+import numpy as np
+
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Stats:
+    """Recent latencies (for percentiles) plus cumulative histograms."""
+
+    def __init__(self, window: int = 10_000):
+        self.latencies = deque(maxlen=window)
+        self.latency_hist = Counter()
+        self.batch_rows = Counter()
+        self.batch_requests = Counter()
+        self.requests = 0
+        self.batches = 0
+
+    def observe_request(self, seconds: float) -> None:
+        ms = 1000 * seconds
+        self.requests += 1
+        self.latencies.append(ms)
+        self.latency_hist[next((b for b in LATENCY_BUCKETS_MS if ms <= b), "inf")] += 1
+
+    def observe_batch(self, n_requests: int, n_rows: int) -> None:
+        self.batches += 1
+        self.batch_requests[1 << (n_requests - 1).bit_length()] += 1
+        self.batch_rows[1 << (n_rows - 1).bit_length()] += 1
+
+    def summary(self) -> dict:
+        lat = np.fromiter(self.latencies, float)
+        pct = np.percentile(lat, [50, 99]).round(3).tolist() if len(lat) else [None, None]
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "latency_ms": {"p50": pct[0], "p99": pct[1],
+                           "histogram_le": {str(k): self.latency_hist[k]
+                                            for k in (*LATENCY_BUCKETS_MS, "inf")}},
+            "batch_requests_le": dict(sorted(self.batch_requests.items())),
+            "batch_rows_le": dict(sorted(self.batch_rows.items())),
+        }
+
+
+class MicroBatcher:
+    def __init__(self, predict, max_batch: int = 512, max_wait_ms: float = 2.0,
+                 workers: int | None = None):
+        self.predict = predict                  # (n, F) float32 -> (n, Q); default model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers or os.cpu_count() or 1
+        self.stats = Stats()
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, X: np.ndarray, model=None) -> np.ndarray:
+        """Score X with model.predict (default: the batcher's predict)."""
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher.start() has not been awaited")
+        t0 = time.perf_counter()
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((np.ascontiguousarray(X, dtype=np.float32), model, fut))
+        out = await fut
+        self.stats.observe_request(time.perf_counter() - t0)
+        return out
+
+    async def _collect(self) -> list:
+        items = [await self._queue.get()]
+        rows = len(items[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), left)
+                except asyncio.TimeoutError:
+                    break
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    async def _score(self, items: list) -> None:
+        model = items[0][1]
+        predict = self.predict if model is None else model.predict
+        X = np.concatenate([x for x, _, _ in items]) if len(items) > 1 else items[0][0]
+        try:
+            P = await asyncio.to_thread(predict, X)
+        except Exception as e:
+            for _, _, fut in items:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        self.stats.observe_batch(len(items), len(X))
+        bounds = np.cumsum([len(x) for x, _, _ in items])[:-1]
+        for (_, _, fut), p in zip(items, np.split(P, bounds)):
+            if not fut.done():          # caller may have gone away
+                fut.set_result(p)
+
+    async def _run(self) -> None:
+        while True:
+            groups: dict[int, list] = {}
+            for item in await self._collect():
+                groups.setdefault(id(item[1]), []).append(item)
+            for items in groups.values():
+                await self._score(items)
@@ -0,0 +1,79 @@
+# tests/test_backfill.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import build_features
+from pipeline import backfill
+from pipeline.cache import Digests
+
+MONTH = "2024-03"
+
+
+@pytest.fixture
+def raw(tmp_path, monkeypatch):
+    """opsd_bootstrap.parquet covering Jan-Apr 2024; the data/ and models/ paths are relative."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data" / "raw").mkdir(parents=True)
+    idx = pd.date_range("2024-01-01", "2024-04-30 23:00", freq="h", tz="UTC")
+    df = pd.DataFrame({"ts_utc": idx, "price_eur_mwh": np.arange(len(idx), dtype=float), "load_mw": 50_000.0})
+    path = build_features.RAW / "opsd_bootstrap.parquet"
+    df.to_parquet(path, index=False)
+    return path
+
+
+def _digest():
+    return backfill.raw_digest(MONTH, Digests())
+
+
+def _edit(path, ts, col="price_eur_mwh", value=-1.0):
+    df = pd.read_parquet(path)
+    ts = pd.Timestamp(ts)
+    df.loc[df["ts_utc"] == (ts if ts.tz else ts.tz_localize("UTC")), col] = value
+    df.to_parquet(path, index=False)
+
+
+def test_rows_outside_the_window_do_not_change_the_digest(raw):
+    before = _digest()
+    df = pd.read_parquet(raw)
+    more = pd.DataFrame({"ts_utc": pd.date_range("2024-05-01", periods=48, freq="h", tz="UTC"),
+                         "price_eur_mwh": 1.0, "load_mw": 1.0})
+    pd.concat([df, more]).to_parquet(raw, index=False)      # the daily append
+    assert _digest() == before
+    _edit(raw, "2024-01-15 00:00")                          # before month start - LOOKBACK
+    assert _digest() == before
+
+
+def test_rows_inside_the_window_change_the_digest(raw):
+    before = _digest()
+    lo, _ = backfill.bounds(MONTH)
+    _edit(raw, lo - build_features.LOOKBACK + pd.Timedelta(hours=1))    # inside the LOOKBACK
+    in_lookback = _digest()
+    assert in_lookback != before
+    _edit(raw, "2024-03-20 12:00")
+    assert _digest() != in_lookback
+
+
+def test_row_order_does_not_matter(raw):
+    before = _digest()
+    pd.read_parquet(raw).iloc[::-1].to_parquet(raw, index=False)
+    assert _digest() == before
+
+
+def test_empty_month_is_built_once(raw, monkeypatch):
+    calls = []
+
+    def build(lo, hi):
+        calls.append(lo)
+        return pd.DataFrame()
+    monkeypatch.setattr(build_features, "build", build)
+    stale = backfill.partition_dir(MONTH)
+    stale.mkdir(parents=True)
+    (stale / "part-0.parquet").write_bytes(b"old")
+    assert backfill.build_month(MONTH, db=False)["rows"] == 0
+    assert not stale.exists()                                 # stale rows removed
+    assert backfill.build_month(MONTH, db=False)["skipped"]   # no partition, still done
+    assert len(calls) == 1
+    _edit(raw, "2024-03-20 12:00")
+    assert "skipped" not in backfill.build_month(MONTH, db=False)
+    assert len(calls) == 2
@@ -0,0 +1,47 @@
+# tests/test_backtest.py
+import numpy as np
+import pandas as pd
+
+from models import backtest
+
+
+def _frame(n=6):
+    M = np.arange(n * 3, dtype=np.float64).reshape(n, 3)
+    ts = pd.date_range("2024-01-01", periods=n, freq="h", tz="UTC").as_unit("ns").asi8
+    return M, ts
+
+
+def test_prefix_digests_change_from_the_edited_row_on():
+    M, ts = _frame()
+    before = backtest.prefix_digests(M, ts)
+    M[3, 1] += 1.0
+    after = backtest.prefix_digests(M, ts)
+    assert len(before) == len(M)
+    assert before[:3] == after[:3]
+    assert all(a != b for a, b in zip(before[3:], after[3:]))
+
+
+def test_prefix_digests_cover_timestamps():
+    M, ts = _frame()
+    shifted = ts.copy()
+    shifted[4] += 1
+    assert backtest.prefix_digests(M, ts)[:4] == backtest.prefix_digests(M, shifted)[:4]
+    assert backtest.prefix_digests(M, ts)[4] != backtest.prefix_digests(M, shifted)[4]
+
+
+def test_appended_rows_keep_existing_digests():
+    M, ts = _frame(8)
+    assert backtest.prefix_digests(M[:5], ts[:5]) == backtest.prefix_digests(M, ts)[:5]
+
+
+def test_train_cutoff():
+    issue = pd.Timestamp("2024-03-10 11:00", tz="UTC")
+    assert backtest.train_cutoff(issue, 1) == issue
+    cut = backtest.train_cutoff(issue, 7)
+    assert cut <= issue < cut + pd.Timedelta(days=7)
+    assert cut.hour == 11                              # keeps the issue hour
+    assert (cut.normalize() - pd.Timestamp(0, tz="UTC")).days % 7 == 0
+    # every issue in a block shares the cutoff, the next block moves it by every_days
+    later = backtest.train_cutoff(cut + pd.Timedelta(days=6), 7)
+    assert later == cut
+    assert backtest.train_cutoff(cut + pd.Timedelta(days=7), 7) == cut + pd.Timedelta(days=7)
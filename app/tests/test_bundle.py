@@ -0,0 +1,66 @@
+# tests/test_bundle.py
+import json
+import struct
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from models import bundle
+
+
+@pytest.fixture
+def boosters():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(64, 3)).astype(np.float32)
+    y = X @ np.array([1.0, -2.0, 0.5]) + rng.normal(scale=0.1, size=64)
+    out = {}
+    for q in (10, 50, 90):
+        d = xgb.DMatrix(X, label=y, feature_names=["a", "b", "c"])
+        out[q] = xgb.train({"objective": "reg:quantileerror", "quantile_alpha": q / 100,
+                            "max_depth": 2, "nthread": 1, "seed": 0}, d, num_boost_round=5)
+    return X, out
+
+
+def test_layout(tmp_path, boosters):
+    _, models = boosters
+    path = bundle.write_bundle(tmp_path / "b.bin", models, ["a", "b", "c"], {"key": "k1"})
+    raw = path.read_bytes()
+    assert raw[:8] == bundle.MAGIC
+    (hlen,) = struct.unpack("<Q", raw[8:16])
+    header = json.loads(raw[16:16 + hlen])
+    assert header["version"] == 1
+    assert header["features"] == ["a", "b", "c"]
+    assert header["meta"] == {"key": "k1"}
+    assert list(header["models"]) == ["10", "50", "90"]
+    # blobs are back to back and fill the rest of the file
+    spans = sorted((m["offset"], m["length"]) for m in header["models"].values())
+    assert spans[0][0] == 0
+    assert all(o1 + n1 == o2 for (o1, n1), (o2, _) in zip(spans, spans[1:]))
+    assert 16 + hlen + spans[-1][0] + spans[-1][1] == len(raw)
+
+
+def test_round_trip(tmp_path, boosters):
+    X, models = boosters
+    path = bundle.write_bundle(tmp_path / "b.bin", models, ["a", "b", "c"], {"key": "k1"})
+    b = bundle.load_bundle(path)
+    assert b.quantiles == [10, 50, 90]
+    assert b.features == ["a", "b", "c"]
+    assert b.meta == {"key": "k1"}
+    want = np.column_stack([m.inplace_predict(X) for m in models.values()])
+    np.testing.assert_array_equal(b.predict(X), want)
+
+
+def test_subset_and_missing_quantiles(tmp_path, boosters):
+    _, models = boosters
+    path = bundle.write_bundle(tmp_path / "b.bin", models, ["a", "b", "c"])
+    assert bundle.load_bundle(path, [90, 10]).quantiles == [10, 90]
+    with pytest.raises(SystemExit):
+        bundle.load_bundle(path, [10, 95])
+
+
+def test_bad_magic(tmp_path):
+    path = tmp_path / "not.bin"
+    path.write_bytes(b"NOTABNDL" + bytes(16))
+    with pytest.raises(SystemExit):
+        bundle.load_bundle(path)
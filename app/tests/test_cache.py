@@ -0,0 +1,55 @@
+# tests/test_cache.py
+import os
+
+import pytest
+
+from pipeline import cache
+
+
+@pytest.fixture
+def stage(tmp_path, monkeypatch):
+    """One stage reading in.txt and writing out.txt; the cache paths are relative, so they land in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache, "STAGES", {"s": cache.Stage("stage.py", ("in.txt",), ("out.txt",))})
+    (tmp_path / "stage.py").write_text("print('stage')\n")
+    (tmp_path / "in.txt").write_text("a\n")
+    (tmp_path / "out.txt").write_text("result\n")
+    return tmp_path
+
+
+def _touch_later(path):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_recorded_stage_is_fresh(stage):
+    assert not cache.check("s").fresh
+    cache.record(cache.check("s"), 0.1)
+    assert cache.check("s").fresh
+
+
+def test_identical_rewrite_with_new_mtime_is_skipped(stage):
+    cache.record(cache.check("s"), 0.1)
+    path = stage / "in.txt"
+    path.write_text("a\n")
+    _touch_later(path)
+    assert cache.check("s").fresh
+
+
+def test_changed_input_reruns(stage):
+    cache.record(cache.check("s"), 0.1)
+    path = stage / "in.txt"
+    path.write_text("b\n")
+    _touch_later(path)
+    assert not cache.check("s").fresh
+
+
+def test_changed_output_reruns(stage):
+    cache.record(cache.check("s"), 0.1)
+    (stage / "out.txt").write_text("edited\n")
+    assert not cache.check("s").fresh
+
+
+def test_force(stage):
+    cache.record(cache.check("s"), 0.1)
+    assert not cache.check("s", force=True).fresh
@@ -0,0 +1,107 @@
+# tests/test_conformal.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from models import conformal
+
+LEVELS = [0.1, 0.5, 0.9]
+
+
+def _hours(day_hour_pairs):
+    """UTC timestamps on January days (Berlin = UTC + 1)."""
+    return pd.DatetimeIndex([pd.Timestamp(f"2024-01-{d:02d} {h:02d}:00", tz="UTC")
+                             for d, h in day_hour_pairs])
+
+
+def _push(cal, idx, resid):
+    """Residuals y - P = resid for every level."""
+    resid = np.asarray(resid, dtype=float)
+    return cal.update(idx, resid, np.zeros((len(idx), len(LEVELS))))
+
+
+@pytest.fixture
+def cal(monkeypatch):
+    monkeypatch.setattr(conformal, "MIN_PER_HOUR", 2)
+    return conformal.Calibrator(LEVELS, window=3)
+
+
+def test_ring_buffer_keeps_the_last_window_per_hour(cal):
+    # Berlin 11:00 gets residuals 1..5 (wraps past the window of 3), Berlin 12:00 gets 10, 20
+    idx = _hours([(d, 10) for d in range(1, 6)] + [(1, 11), (2, 11)])
+    assert _push(cal, idx, [1, 2, 3, 4, 5, 10, 20]) == 7
+    assert sorted(cal.resid[11, :, 0]) == [3, 4, 5]
+    assert cal.count[11] == 3 and cal.count[12] == 2 and cal.count.sum() == 5
+    assert cal.pos[11] == 5 % 3
+    off = cal.offsets()
+    np.testing.assert_allclose(off[11], [3.2, 4.0, 4.8])
+    np.testing.assert_allclose(off[12], [11.0, 15.0, 19.0])
+    # hours with too few residuals fall back to the pool {3, 4, 5, 10, 20}
+    np.testing.assert_allclose(off[0], [3.4, 5.0, 16.0])
+
+
+def test_wrap_across_updates_matches_one_update(cal):
+    one = conformal.Calibrator(LEVELS, window=3)
+    idx = _hours([(d, 10) for d in range(1, 8)])
+    resid = [1, 2, 3, 4, 5, 6, 7]
+    _push(one, idx, resid)
+    for lo, hi in ((0, 2), (2, 3), (3, 7)):
+        _push(cal, idx[lo:hi], resid[lo:hi])
+    assert sorted(cal.resid[11, :, 0]) == sorted(one.resid[11, :, 0]) == [5, 6, 7]
+    np.testing.assert_array_equal(cal.offsets(), one.offsets())
+
+
+def test_old_rows_and_missing_targets_are_ignored(cal):
+    _push(cal, _hours([(5, 10)]), [1])
+    assert _push(cal, _hours([(4, 10), (5, 10)]), [9, 9]) == 0     # not after last_ts
+    assert cal.update(_hours([(6, 10)]), np.array([np.nan]), np.zeros((1, 3))) == 0
+    assert cal.count[11] == 1
+
+
+def test_apply_shifts_by_hour_and_repairs(cal):
+    _push(cal, _hours([(d, 10) for d in range(1, 6)] + [(1, 11), (2, 11)]), [1, 2, 3, 4, 5, 10, 20])
+    P = np.array([[0.0, 0.0, 0.0], [0.0, 0.0, -20.0]])
+    out = cal.apply(P, [11, 12])
+    np.testing.assert_allclose(out[0], [3.2, 4.0, 4.8])
+    np.testing.assert_allclose(out[1], [-1.0, 11.0, 15.0])          # 19 - 20 sorted to the front
+    np.testing.assert_allclose(cal.apply(P[:1, :2], [11], quantiles=[50, 90]), [[4.0, 4.8]])
+
+
+def test_save_load_round_trip(cal, tmp_path):
+    _push(cal, _hours([(1, 10), (2, 10)]), [1, 2])
+    cal.model = "k1"
+    back = conformal.Calibrator.load(cal.save(tmp_path / "c.npz"))
+    assert back.model == "k1" and back.last_ts == cal.last_ts
+    np.testing.assert_array_equal(back.offsets(), cal.offsets())
+
+
+class _Models:
+    """Stands in for a bundle: constant predictions, a recorded train_end."""
+
+    def __init__(self, value, train_end):
+        self.value, self.features, self.quantiles = value, ["x"], [10, 50, 90]
+        self.meta = {"train_end": train_end.isoformat()} if train_end is not None else {}
+
+    def predict(self, X):
+        return np.full((len(X), 3), self.value)
+
+
+def test_out_of_sample_never_scores_training_rows():
+    idx = pd.date_range("2024-01-01", periods=12, freq="D", tz="UTC")
+    df = pd.DataFrame({"x": 0.0, conformal.TARGET: 100.0}, index=idx)
+    current = _Models(1.0, idx[9])           # trained through day 10
+    previous = _Models(2.0, idx[4])          # trained through day 5
+    y, P, skipped = conformal.out_of_sample(df, [current, previous])
+    assert skipped == 5
+    assert np.isnan(y[:5]).all() and np.isnan(P[:5]).all()
+    np.testing.assert_array_equal(P[5:10, 0], 2.0)      # days 6..10: only the previous set is out of sample
+    np.testing.assert_array_equal(P[10:, 0], 1.0)       # days 11..12: the current set
+    cal = conformal.Calibrator([0.1, 0.5, 0.9], window=30)
+    assert cal.update(df.index, y, P) == 7
+
+
+def test_out_of_sample_skips_models_without_train_end():
+    idx = pd.date_range("2024-01-01", periods=3, freq="D", tz="UTC")
+    df = pd.DataFrame({"x": 0.0, conformal.TARGET: 1.0}, index=idx)
+    y, _, skipped = conformal.out_of_sample(df, [_Models(1.0, None)])
+    assert skipped == 3 and np.isnan(y).all()
@@ -0,0 +1,50 @@
+# tests/test_direct.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench.synthetic import make_features
+from models import direct
+from models.train_direct import holdout_split
+
+
+@pytest.fixture(scope="module")
+def frame():
+    df = make_features(years=0.06, seed=5)
+    for c in df.select_dtypes(include=["bool"]).columns:
+        df[c] = df[c].astype(int)
+    return df
+
+
+def test_holdout_split_purges_targets_after_the_cutoff(frame):
+    X, _ = direct.training_frame(frame)
+    tr, te, cutoff = holdout_split(X, holdout_days=3)
+    issue_ts = X.index.get_level_values("issue_ts")
+    target_ts = issue_ts + pd.to_timedelta(X.index.get_level_values("horizon"), unit="h")
+    assert tr.any() and te.any()
+    assert (target_ts[tr] <= cutoff).all()
+    assert (issue_ts[te] > cutoff).all()
+    assert not (tr & te).any()
+    # issue times just before the cutoff are in neither set: their late horizons overlap the holdout
+    purged = ~tr & ~te
+    assert purged.any()
+    assert (issue_ts[purged] > cutoff - pd.Timedelta(hours=24)).all()
+    assert (target_ts[purged] > cutoff).all()
+
+
+def test_design_matrix_matches_training_rows(frame):
+    X, y = direct.training_frame(frame)
+    t = frame.index[len(frame) // 2]
+    row = direct.design_matrix(frame.loc[[t]])
+    pd.testing.assert_frame_equal(row, X.loc[[t]])
+    target = [frame[direct.TARGET].get(t + pd.Timedelta(hours=h), np.nan) for h in direct.HORIZONS]
+    np.testing.assert_array_equal(y.loc[t].to_numpy(), target)
+    assert list(row.columns) == direct.feature_names(frame)
+
+
+def test_training_frame_drops_unobserved_targets(frame):
+    X, y = direct.training_frame(frame)
+    last = frame.index.max()
+    assert y.notna().all()
+    assert X.index.get_level_values("issue_ts").max() == last - pd.Timedelta(hours=1)
+    assert (X.loc[last - pd.Timedelta(hours=1)].index == [1]).all()
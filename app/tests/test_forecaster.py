@@ -0,0 +1,43 @@
+# tests/test_forecaster.py
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from bench.bench_forecast import QS, TARGET, legacy_forecast
+from bench.synthetic import make_features
+from models import bundle, forecaster
+
+
+@pytest.fixture(scope="module")
+def setup():
+    hist = make_features(years=0.15, seed=3)
+    for c in hist.select_dtypes(include=["bool"]).columns:
+        hist[c] = hist[c].astype(int)
+    features = [c for c in hist.columns if c != TARGET]
+    X, y = hist[features].to_numpy(dtype=np.float32), hist[TARGET].to_numpy()
+    models = {}
+    for q in QS:
+        m = xgb.XGBRegressor(objective="reg:quantileerror", quantile_alpha=q / 100,
+                             n_estimators=20, max_depth=3, n_jobs=1, random_state=0)
+        models[q] = m.fit(X, y)
+    return hist, features, models
+
+
+def test_matches_the_legacy_loop(setup):
+    hist, features, models = setup
+    old = legacy_forecast(hist, models, features)
+    b = bundle.Bundle({q: m.get_booster() for q, m in models.items()}, features, {})
+    new = forecaster.forecast(b, features, forecaster.make_context(hist))
+    assert new.shape == (1, 24, len(QS))
+    np.testing.assert_array_equal(new[0], old.to_numpy())
+
+
+def test_scenarios_share_one_pass(setup):
+    hist, features, models = setup
+    b = bundle.Bundle({q: m.get_booster() for q, m in models.items()}, features, {})
+    ctx = forecaster.make_context(hist)
+    base = forecaster.forecast(b, features, ctx)[0]
+    wind = np.stack([ctx.exog["wind_mw"], ctx.exog["wind_mw"] * 2])
+    both = forecaster.forecast(b, features, ctx, exog={"wind_mw": wind})
+    assert both.shape == (2, 24, len(QS))
+    np.testing.assert_allclose(both[0], base, rtol=1e-6)
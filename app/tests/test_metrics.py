@@ -0,0 +1,32 @@
+# tests/test_metrics.py
+from web import metrics
+
+
+def test_histogram_text():
+    h = metrics.Histogram("req_seconds", "Request latency.", ("route",), buckets=(0.1, 0.5, 1.0))
+    for v in (0.05, 0.1, 0.3, 2.0):
+        h.observe(v, "/a")
+    h.observe(0.7, 'say "hi"')
+    assert h.render() == [
+        "# HELP req_seconds Request latency.",
+        "# TYPE req_seconds histogram",
+        'req_seconds_bucket{route="/a",le="0.1"} 2',
+        'req_seconds_bucket{route="/a",le="0.5"} 3',
+        'req_seconds_bucket{route="/a",le="1.0"} 3',
+        'req_seconds_bucket{route="/a",le="+Inf"} 4',
+        'req_seconds_sum{route="/a"} 2.45',
+        'req_seconds_count{route="/a"} 4',
+        'req_seconds_bucket{route="say \\"hi\\"",le="0.1"} 0',
+        'req_seconds_bucket{route="say \\"hi\\"",le="0.5"} 0',
+        'req_seconds_bucket{route="say \\"hi\\"",le="1.0"} 1',
+        'req_seconds_bucket{route="say \\"hi\\"",le="+Inf"} 1',
+        'req_seconds_sum{route="say \\"hi\\""} 0.7',
+        'req_seconds_count{route="say \\"hi\\""} 1',
+    ]
+
+
+def test_histogram_without_labels():
+    h = metrics.Histogram("jobs", "Jobs.", buckets=(1.0,))
+    h.observe(0.5)
+    assert h.render()[2:] == ['jobs_bucket{le="1.0"} 1', 'jobs_bucket{le="+Inf"} 1',
+                              "jobs_sum 0.5", "jobs_count 1"]
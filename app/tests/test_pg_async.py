@@ -0,0 +1,22 @@
+# tests/test_pg_async.py
+import pytest
+
+from web.pg_async import etag_matches
+
+ETAG = '"abc123"'
+
+
+@pytest.mark.parametrize("header, hit", [
+    (None, False),
+    ("", False),
+    ('"abc123"', True),
+    ('W/"abc123"', True),
+    ('"x", "abc123"', True),
+    ("*", True),
+    ('"abc12"', False),
+    ('"abc1234"', False),
+    ('"xabc123"', False),
+    ("abc123", False),             # unquoted is not an entity tag
+])
+def test_etag_matches(header, hit):
+    assert etag_matches(header, ETAG) is hit
@@ -0,0 +1,58 @@
+# tests/test_quantile_fn.py
+import numpy as np
+import pytest
+
+from models.quantile_fn import QuantileFunction, repair
+
+LEVELS = np.arange(5, 100, 5) / 100
+
+
+@pytest.fixture
+def qf():
+    rng = np.random.default_rng(1)
+    base = rng.normal(60, 20, size=(8, 1))
+    spread = rng.uniform(5, 30, size=(8, 1))
+    return QuantileFunction(LEVELS, base + spread * np.linspace(-1.6, 1.6, len(LEVELS)))
+
+
+def test_knots_are_reproduced(qf):
+    np.testing.assert_allclose(qf.quantile(LEVELS), qf.values, atol=1e-6)
+
+
+@pytest.mark.parametrize("p", [0.001, 0.02, 0.05, 0.137, 0.5, 0.81, 0.95, 0.99, 0.999])
+def test_cdf_inverts_quantile(qf, p):
+    np.testing.assert_allclose(qf.cdf(qf.quantile(p)), p, atol=1e-6)
+
+
+def test_quantile_inverts_cdf(qf):
+    x = np.linspace(qf.values.min() - 30, qf.values.max() + 30, 41)
+    u = qf.cdf(x)
+    inside = (u > 1e-6) & (u < 1 - 1e-6)
+    np.testing.assert_allclose(qf.quantile(np.where(inside, u, 0.5))[inside],
+                               np.broadcast_to(x, u.shape)[inside], rtol=1e-5, atol=1e-4)
+
+
+def test_monotone(qf):
+    p = np.linspace(0.001, 0.999, 200)
+    assert (np.diff(qf.quantile(p), axis=1) >= 0).all()
+    x = np.linspace(-50, 200, 200)
+    assert (np.diff(qf.cdf(x), axis=1) >= 0).all()
+
+
+def test_crossing_quantiles_are_repaired():
+    v = np.array([[3.0, 1.0, 2.0]])
+    np.testing.assert_array_equal(repair(v), [[1.0, 2.0, 3.0]])
+    qf = QuantileFunction([0.1, 0.5, 0.9], v)
+    assert (np.diff(qf.values, axis=1) > 0).all()
+
+
+def test_prob_between(qf):
+    lo, hi = qf.quantile(0.25), qf.quantile(0.75)
+    np.testing.assert_allclose(qf.prob_between(lo, hi), 0.5, atol=1e-6)
+
+
+def test_rejects_bad_input(qf):
+    with pytest.raises(ValueError):
+        qf.quantile(1.0)
+    with pytest.raises(ValueError):
+        QuantileFunction([0.5], [[1.0]])
@@ -0,0 +1,103 @@
+# tests/test_registry.py
+import json
+import os
+
+import pytest
+
+from models import registry
+
+
+@pytest.fixture(autouse=True)
+def reg(tmp_path, monkeypatch):
+    """REG and ART are relative paths, so they resolve under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _register(name, key, files=("model.json",), promote=True):
+    staged = registry.staging_dir(name, key)
+    for f in files:
+        (staged / f).write_text(f"{name}/{key}/{f}")
+    final = registry.commit(name, key, staged, {"feature_version": "fv"})
+    if promote:
+        registry.promote(name, key)
+    return final
+
+
+def test_registry_key_is_a_content_hash():
+    k = registry.registry_key("fv", ["a", "b"], {"depth": 6, "eta": 0.1})
+    assert k == registry.registry_key("fv", ["a", "b"], {"eta": 0.1, "depth": 6})
+    assert len(k) == 16 and int(k, 16) >= 0
+    assert k != registry.registry_key("fv2", ["a", "b"], {"depth": 6, "eta": 0.1})
+    assert k != registry.registry_key("fv", ["b", "a"], {"depth": 6, "eta": 0.1})
+    assert k != registry.registry_key("fv", ["a", "b"], {"depth": 7, "eta": 0.1})
+
+
+def test_file_digest_of_a_directory(reg):
+    d = reg / "d"
+    d.mkdir()
+    (d / "x").write_text("1")
+    before = registry.file_digest(d)
+    assert registry.file_digest(d) == before
+    (d / "x").rename(d / "y")
+    assert registry.file_digest(d) != before
+
+
+def test_commit_moves_the_staged_set_into_place():
+    final = _register("m", "k1", promote=False)
+    assert final == registry.version_dir("m", "k1")
+    assert (final / "model.json").read_text() == "m/k1/model.json"
+    manifest = json.loads((final / "manifest.json").read_text())
+    assert manifest["name"] == "m" and manifest["key"] == "k1" and manifest["feature_version"] == "fv"
+    assert [p.name for p in (registry.REG / "m").iterdir()] == ["k1"]      # no staging dir left
+
+
+def test_commit_keeps_the_first_of_identical_runs():
+    _register("m", "k1", promote=False)
+    staged = registry.staging_dir("m", "k1")
+    (staged / "model.json").write_text("second")
+    assert registry.commit("m", "k1", staged, {}) == registry.version_dir("m", "k1")
+    assert (registry.version_dir("m", "k1") / "model.json").read_text() == "m/k1/model.json"
+    assert not staged.exists()
+
+
+def test_promote_swaps_current_atomically(monkeypatch):
+    _register("m", "k1")
+    _register("m", "k2", promote=False)
+    assert registry.current("m")["key"] == "k1"
+
+    def fail(src, dst):
+        raise OSError("disk full")
+    with monkeypatch.context() as m, pytest.raises(OSError):
+        m.setattr(os, "replace", fail)
+        registry.promote("m", "k2")
+    assert registry.current("m")["key"] == "k1"          # the old pointer is intact
+
+    registry.promote("m", "k2")
+    assert registry.current("m")["key"] == "k2"
+    assert registry.current_dir("m") == registry.version_dir("m", "k2")
+
+
+def test_promote_unknown_version():
+    with pytest.raises(SystemExit):
+        registry.promote("m", "nope")
+
+
+def test_dangling_pointer_is_ignored():
+    _register("m", "k1")
+    (registry.version_dir("m", "k1") / "manifest.json").unlink()
+    assert registry.current("m") is None
+
+
+def test_resolve_prefers_the_newest_promotion_with_the_files():
+    assert registry.resolve(["model.json"]) == registry.ART            # empty registry
+    _register("a", "k1")
+    _register("b", "k2")
+    assert registry.resolve(["model.json"]) == registry.version_dir("b", "k2")
+    registry.promote("a", "k1")
+    assert registry.resolve(["model.json"]) == registry.version_dir("a", "k1")
+    assert registry.resolve(["model.json"], names=["b"]) == registry.version_dir("b", "k2")
+    # a newer set without the requested files is skipped, then artifacts is the fallback
+    _register("c", "k3", files=("other.json",))
+    assert registry.resolve(["model.json"]) == registry.version_dir("a", "k1")
+    assert registry.resolve(["missing.json"]) == registry.ART
@@ -0,0 +1,42 @@
+# tests/test_scoring.py
+import numpy as np
+import pytest
+
+from models import scoring
+
+LEVELS = [0.1, 0.5, 0.9]
+P = [[5.0, 10.0, 15.0], [5.0, 10.0, 15.0], [5.0, 10.0, 15.0]]
+Y = [10.0, 20.0, np.nan]        # the NaN row is ignored
+
+
+def test_score_by_hand():
+    s = scoring.score(Y, P, LEVELS)
+    assert s["n"] == 2
+    assert s["pinball"] == pytest.approx({"q10": 1.0, "q50": 2.5, "q90": 2.5})
+    assert s["pinball_mean"] == pytest.approx(2.0)
+    # weights 0.3, 0.4, 0.3: rows 2 * (0.15 + 0 + 0.15) and 2 * (0.45 + 2 + 1.35)
+    assert s["crps"] == pytest.approx(4.1)
+    assert s["empirical"] == pytest.approx([0.0, 0.5, 0.5])
+    assert s["mae_p50"] == pytest.approx(5.0)
+    assert list(s["intervals"]) == ["10-90"]          # 5-95 and 25-75 are not in LEVELS
+    assert s["intervals"]["10-90"] == pytest.approx({"nominal": 0.8, "coverage": 0.5, "width": 10.0})
+    assert sum(s["pit_histogram"]) == pytest.approx(1.0)
+
+
+def test_score_by_hour():
+    s = scoring.score(Y, P, LEVELS, hours=[3, 3, 7])
+    by = s["by_hour"]
+    assert by["crps"][3] == pytest.approx(4.1)
+    assert by["coverage_10-90"][3] == pytest.approx(0.5)
+    assert np.isnan(by["crps"][7])                    # only the NaN actual fell there
+
+
+def test_crps_weights_cover_unit_interval():
+    w = scoring.crps_weights(np.arange(5, 100, 5) / 100)
+    assert w.sum() == pytest.approx(1.0)
+    assert (w > 0).all()
+
+
+def test_shape_mismatch():
+    with pytest.raises(ValueError):
+        scoring.score([1.0, 2.0], [[1.0, 2.0, 3.0]], LEVELS)
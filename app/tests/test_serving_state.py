@@ -0,0 +1,36 @@
+# tests/test_serving_state.py
+import os
+
+from web import serving_state
+
+
+def _write_models(root, mtime_ns):
+    art = root / "models" / "artifacts"
+    art.mkdir(parents=True, exist_ok=True)
+    for q in serving_state.QUANTILES:
+        p = art / f"xgb_q{q}.json"
+        p.write_text("{}")
+        os.utime(p, ns=(mtime_ns, mtime_ns))
+    return art
+
+
+def test_artifacts_retrain_changes_the_fingerprint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    art = _write_models(tmp_path, 10**18)
+    before = serving_state.fingerprint()
+    assert before[0] == str(serving_state.registry.ART)
+    assert before[1] == 10**18
+    assert serving_state.fingerprint() == before
+    p = art / "xgb_q50.json"
+    p.write_text("{}")
+    os.utime(p, ns=(10**18 + 1, 10**18 + 1))
+    assert serving_state.fingerprint() != before
+
+
+def test_bundle_is_the_marker_when_present(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    art = _write_models(tmp_path, 10**18)
+    b = art / serving_state.bundle.BUNDLE_FILE
+    b.write_bytes(b"")
+    os.utime(b, ns=(5, 5))
+    assert serving_state.fingerprint()[1] == 5
@@ -1,61 +1,187 @@
 # web/app_api.py
-from fastapi import FastAPI
-import pandas as pd
-import xgboost as xgb
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pathlib import Path
-import os, psycopg2
+import os
+import time
+import asyncpg
 
-app = FastAPI(title="Energy Forecast API")
+from models import shap_store
+from pipeline import profiling
+from web import export, metrics, pg_async, scenarios
+from web.serving_state import StateHolder
+
+# loaded once at import: with `gunicorn --preload` the workers inherit it copy-on-write
+state = StateHolder(poll_seconds=float(os.getenv("EPFD_RELOAD_SECONDS", "30")))
+state.preload()
+pool = pg_async.Pool()
+next24h = pg_async.VersionedCache(pg_async.NEXT24H_SQL, pg_async.VERSION_SQL,
+                                  ttl=float(os.getenv("EPFD_CACHE_SECONDS", "5")))
+
+@asynccontextmanager
+async def lifespan(app):
+    # threads do not survive fork, so each worker starts its own watcher
+    state.start()
+    yield
+    state.stop()
+    await pool.close()
+
+app = FastAPI(title="Energy Forecast API", lifespan=lifespan)
+
+@app.middleware("http")
+async def observe_latency(request: Request, call_next):
+    # labelled by route template (/export/{table}), not the raw path, to bound cardinality;
+    # streamed bodies are timed to the first byte
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - t0, request.method,
+                                        getattr(route, "path", "unmatched"), status)
 
 ART = Path("models/artifacts")
 FEA = Path("data/features/hourly.parquet")
 TARGET = "price_eur_mwh"
 
-def load_recent(days=7):
-    df = pd.read_parquet(FEA)
+def current_snapshot():
+    snap = state.get()
+    if snap is None:
+        raise HTTPException(status_code=503, detail=state.error or "Model state not loaded.")
+    return snap
 
-    # ensure datetime index
-    if "ts_utc" in df.columns:
-        df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
-        df = df.set_index("ts_utc")
-    else:
-        # assume index already is datetime
-        df.index = pd.to_datetime(df.index, utc=True)
-
-    df = df.sort_index()
-    return df.last(f"{days}D")
+if profiling.ENABLED:
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        # opt-in per request; the report covers the handler, not a streamed body
+        if "x-profile" not in request.headers:
+            return await call_next(request)
+        with profiling.Session(f"api{request.url.path}", modes=profiling.API_MODES) as prof:
+            response = await call_next(request)
+        if prof.dir is not None:
+            response.headers["X-Profile-Report"] = prof.dir.as_posix()
+        return response
 
 @app.get("/predict")
 def predict_next24h():
-    df = load_recent(180)
-    features = [c for c in df.columns if c != TARGET]
-
-    preds = {}
-    for q in range(5, 100, 5):
-        fname = ART / f"xgb_q{q}.json"
-        if not fname.exists(): continue
-        m = xgb.XGBRegressor(); m.load_model(fname.as_posix())
-        X_last = df[features].iloc[[-1]].astype(float)
-        preds[f"q{q}"] = float(m.predict(X_last)[0])
-
-    return {"latest_timestamp": str(df.index[-1]), "forecast_next_hour": preds}
-
-DB = dict(
-    host=os.getenv("POSTGRES_HOST","epfd-postgres"),
-    dbname=os.getenv("POSTGRES_DB","epfd"),
-    user=os.getenv("POSTGRES_USER","epfd"),
-    password=os.getenv("POSTGRES_PASSWORD","epfd")
-)
+    snap = current_snapshot()
+    return {"latest_timestamp": snap.latest_ts, "forecast_next_hour": snap.next_hour()}
 
-@app.get("/predictions/next24h")
-def predictions_next24h():
-    sql = """
-      SELECT ts_utc, y_p10, y_p50, y_p90
-      FROM energy.predictions_hourly
-      WHERE ts_utc >= now() AT TIME ZONE 'UTC'
-      ORDER BY ts_utc ASC
-      LIMIT 24;
+@app.get("/predict/distribution")
+def predict_distribution(p: list[float] = Query([]), below: list[float] = Query([])):
+    """Next-24h quantiles at arbitrary levels p and P(price <= x) for x in `below`."""
+    snap = current_snapshot()
+    qf = snap.distribution()
+    try:
+        Q = qf.quantile(p) if p else None
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    C = qf.cdf(below) if below else None
+    return {"ts_utc": [str(t) for t in snap.context().future_idx],
+            "quantiles": {str(v): Q[:, j].round(3).tolist() for j, v in enumerate(p)} if p else {},
+            "cdf": {str(v): C[:, j].round(5).tolist() for j, v in enumerate(below)} if below else {}}
+
+@app.post("/predict/scenarios")
+def predict_scenarios(req: scenarios.ScenarioRequest):
+    """Recursive 24h forecast for a grid of exogenous paths, streamed as NDJSON."""
+    snap = current_snapshot()
+    try:
+        lines = scenarios.stream(snap, req)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+@app.get("/export/{table}")
+def export_rows(table: str, start: str | None = None, end: str | None = None,
+                format: str = "arrow", source: str = "parquet"):
+    """Stream rows in [start, end) as Arrow IPC (default), NDJSON or CSV.
+
+    Features come from the parquet store unless source=postgres; predictions
+    only live in Postgres.
     """
-    with psycopg2.connect(**DB) as conn:
-        df = pd.read_sql(sql, conn, parse_dates=["ts_utc"])
-    return {"rows": df.to_dict(orient="records")}
+    if table not in export.PG_SQL:
+        raise HTTPException(status_code=404, detail=f"Unknown table {table!r}")
+    from_pg = table == "predictions" or source == "postgres"
+    try:
+        export.time_range(start, end)
+        if from_pg:
+            enc = export.Encoder(format, export.PG_SCHEMAS[table])
+            body = export.stream_postgres(enc, pool, table, start, end)
+        else:
+            schema, frags, flt = export.parquet_plan(start, end)
+            enc = export.Encoder(format, schema)
+            body = export.stream_parquet(enc, frags, flt)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except SystemExit as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    name = f"{table}.{'arrows' if format == 'arrow' else format}"
+    return StreamingResponse(body, media_type=enc.media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{name}"'})
+
+@app.get("/explain/{model}")
+def explain(model: str, start: str | None = None, end: str | None = None, top: int = 10):
+    """Stored SHAP contributions of `model` (baseline, q5 .. q95) for [start, end), top features by mean |value|."""
+    try:
+        lo, hi = export.time_range(start, end)
+        sv = shap_store.load(model, lo, hi)
+    except (SystemExit, ValueError) as e:
+        raise HTTPException(status_code=404 if isinstance(e, SystemExit) else 422, detail=str(e))
+    bias = sv.pop("bias") if "bias" in sv else None
+    keep = sv.abs().mean().nlargest(top).index if len(sv) else []
+    return {"model": model, "version": shap_store.current_version(model),
+            "ts_utc": [str(t) for t in sv.index],
+            "bias": [] if bias is None else bias.round(4).tolist(),
+            "contribs": {c: sv[c].round(4).tolist() for c in keep}}
+
+@app.get("/rollups/{kind}")
+async def rollups(kind: str, grain: str = "day", start: str | None = None, end: str | None = None):
+    """Precomputed aggregates: features / errors at day|week|month grain, or hourly price profiles."""
+    if kind not in pg_async.ROLLUP_SQL:
+        raise HTTPException(status_code=404, detail=f"Unknown rollup {kind!r}; have {list(pg_async.ROLLUP_SQL)}")
+    if grain not in pg_async.GRAINS:
+        raise HTTPException(status_code=422, detail=f"grain must be one of {pg_async.GRAINS}")
+    try:
+        lo, hi = export.time_range(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        rows = await pg_async.fetch_rollup(pool, kind, grain, lo.date(), hi.date())
+    except (OSError, asyncpg.PostgresError) as e:
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {e}")
+    return {"kind": kind, "grain": None if kind == "profile" else grain, "rows": rows}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Request latency and model inference histograms (Prometheus text format, this worker)."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/state")
+def serving_state():
+    snap = state.get()
+    return {"loaded": snap is not None, "error": state.error,
+            "models": snap and snap.key[0], "features_rows": snap and len(snap.tail),
+            "latest_timestamp": snap and snap.latest_ts, "loaded_at": snap and snap.loaded_at,
+            "conformal": bool(snap and snap.calibrator is not None)}
+
+@app.post("/state/reload")
+def reload_state():
+    swapped = state.refresh(force=True)
+    if not swapped and state.error:
+        raise HTTPException(status_code=503, detail=state.error)
+    return serving_state()
+
+@app.get("/predictions/next24h")
+async def predictions_next24h(request: Request):
+    try:
+        etag, body = await next24h.get(pool)
+    except (OSError, asyncpg.PostgresError) as e:
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {e}")
+    headers = {"ETag": etag, "Cache-Control": f"max-age={int(next24h.ttl)}"}
+    if pg_async.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -2,7 +2,8 @@
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-import matplotlib.pyplot as plt
+
+from web import data
 
 ART = Path("models/artifacts")
 
@@ -13,37 +14,70 @@ st.markdown("Probabilistic forecasts with XGBoost quantile regression.")
 
 # Sidebar
 page = st.sidebar.radio(
-    "Navigation", ["Latest Data", "Forecast (Fan)", "Explainability", "Calibration"])
+    "Navigation", ["Latest Data", "Aggregates", "Forecast (Fan)", "Explainability", "Calibration", "Pipeline"])
 
 if page == "Latest Data":
-    st.header("Recent features & prices")
-    fea = Path("data/features/hourly.parquet")
-    if fea.exists():
-        df = pd.read_parquet(fea)
-
-        # ensure datetime index
-        if "ts_utc" in df.columns:
-            df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
-            df = df.set_index("ts_utc")
-        else:
-            # assume index already is datetime
-            df.index = pd.to_datetime(df.index, utc=True)
-
-        df = df.sort_index().last("7D")
-        st.line_chart(df[["price_eur_mwh", "load_mw", "wind_mw", "solar_mw"]])
+    st.header("Features & prices")
+    version = data.features_version()
+    if version is not None:
+        first, last = data.time_bounds(version)
+        picked = st.sidebar.date_input(
+            "Range (UTC)", ((last - pd.Timedelta(days=7)).date(), last.date()),
+            min_value=first.date(), max_value=last.date())
+        lo, hi = picked if len(picked) == 2 else (picked[0], picked[0])
+        cols = st.sidebar.multiselect(
+            "Columns", data.feature_columns(version),
+            default=["price_eur_mwh", "load_mw", "wind_mw", "solar_mw"])
+        points = st.sidebar.slider("Points per series", 200, 5000, data.POINTS, step=100)
+        method = st.sidebar.selectbox("Downsampling", ["lttb", "minmax"])
+        end = pd.Timestamp(hi) + pd.Timedelta(days=1)
+        df = data.series(pd.Timestamp(lo), end, tuple(cols), points, method, version)
+        st.line_chart(df)
+        raw = data.load_features(pd.Timestamp(lo), end, tuple(cols), version)     # cached
+        st.caption(f"{len(df):,} of {len(raw):,} rows plotted")
     else:
         st.error("Features parquet not found. Run `make build-features`.")
 
+elif page == "Aggregates":
+    st.header("Aggregates (precomputed rollups)")
+    grain = st.sidebar.selectbox("Grain", ["day", "week", "month"], index=1)
+    years = st.sidebar.slider("Years back", 1, 10, 2)
+    end = pd.Timestamp.now(tz="UTC").normalize() + pd.Timedelta(days=1)
+    start = end - pd.DateOffset(years=years)
+    version = data.rollup_version("features")
+    if version is None:
+        st.error("No rollups in Postgres. Run `make migrate load-features`.")
+    else:
+        feats = data.rollup("features", grain, start, end, version).set_index("bucket")
+        st.subheader("Price (EUR/MWh)")
+        st.line_chart(feats[["price_avg", "price_min", "price_max"]])
+        st.subheader("Renewables share (p10 / mean / p90)")
+        st.line_chart(feats[["renewables_p10", "renewables_avg", "renewables_p90"]])
+        errs = data.rollup("errors", grain, start, end, data.rollup_version("errors"))
+        if len(errs):
+            st.subheader("Forecast error vs actual")
+            st.line_chart(errs.set_index("bucket")[["mae_p50", "bias_p50", "coverage_10_90"]])
+        prof = data.rollup("profile", grain, start, end, data.rollup_version("profile"))
+        if len(prof):
+            st.subheader("Hourly price profile by month")
+            st.line_chart(prof.pivot(index="hour", columns="month", values="price_avg"))
+
 elif page == "Forecast (Fan)":
     st.header("Next 24h Forecast (Fan Chart)")
-    fan_csv = ART / "predictions_fan.csv"
     fan_png = ART / "predictions_fan.png"
-    if fan_csv.exists():
-        df = pd.read_csv(fan_csv, parse_dates=["ts_utc"], index_col="ts_utc")
+    df = data.fan(data.file_version(data.FAN_CSV))
+    if df is not None:
         st.line_chart(df[["q50"]])
         st.dataframe(df)
     if fan_png.exists():
         st.image(fan_png, caption="Fan forecast (p05–p95 intervals)")
+    pv = data.predictions_version()
+    if pv is not None:
+        st.subheader("Stored predictions")
+        days = st.sidebar.slider("Stored predictions: days back", 1, 365, 7)
+        now = pd.Timestamp.now(tz="UTC").ceil("h")
+        stored = data.predictions(now - pd.Timedelta(days=days), now + pd.Timedelta(days=2), pv)
+        st.line_chart(data.downsample(stored))
 
 elif page == "Explainability":
     st.header("Feature Importance & SHAP")
@@ -62,3 +96,24 @@ elif page == "Calibration":
         st.image(cal, caption="Quantile calibration (last 30d)")
     else:
         st.error("Calibration plot missing. Run `make calibrate-quantiles-full`.")
+
+elif page == "Pipeline":
+    st.header("Pipeline stage telemetry")
+    days = st.sidebar.slider("Days back", 1, 90, 14)
+    runs = data.pipeline_metrics(days)
+    if runs is None or not len(runs):
+        st.error("No rows in energy.pipeline_metrics. Run `make migrate` and the pipeline.")
+    else:
+        stages = sorted(runs["stage"].unique())
+        picked = st.sidebar.multiselect("Stages", stages, default=stages)
+        runs = runs[runs["stage"].isin(picked)]
+        for col, title in [("wall_s", "Wall time (s)"), ("peak_rss_mb", "Peak RSS (MB)"),
+                           ("rows_out", "Rows out")]:
+            st.subheader(title)
+            st.line_chart(runs.pivot_table(index="started_at", columns="stage", values=col))
+        failed = runs[~runs["ok"]]
+        if len(failed):
+            st.subheader("Failed stages")
+            st.dataframe(failed[["started_at", "run_id", "stage", "error"]])
+        st.subheader("Latest run per stage")
+        st.dataframe(runs.groupby("stage").last().drop(columns=["error"]))
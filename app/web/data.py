@@ -0,0 +1,235 @@
+# web/data.py
+"""Cached, range-aware data access for the dashboard.
+
+Loaders take a cheap version token (file mtime/size, or max(created_at) in
+Postgres) as an argument, so st.cache_data serves repeated interactions
+from memory and a new build or insert invalidates them. Range reads only
+open the year=/month= partitions they overlap, and long series are
+downsampled on the server to a pixel budget (LTTB or min/max per bucket)
+before they reach the browser.
+"""
+from __future__ import annotations
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import psycopg2
+import pyarrow.dataset as ds
+import streamlit as st
+
+from models import data_iter
+from web.pg_async import DB, VERSION_SQL
+
+ART = Path("models/artifacts")
+FAN_CSV = ART / "predictions_fan.csv"
+POINTS = 2000
+PG_SQL = """
+  SELECT ts_utc, y_p10, y_p50, y_p90
+  FROM energy.predictions_hourly
+  WHERE ts_utc >= %s AND ts_utc < %s
+  ORDER BY ts_utc
+"""
+METRICS_SQL = """
+  SELECT run_id, stage, started_at, wall_s, cpu_s, peak_rss_mb, rows_in, rows_out,
+         bytes_read, bytes_written, ok, error
+  FROM energy.pipeline_metrics
+  WHERE started_at >= %s
+  ORDER BY started_at
+"""
+ROLLUP_TABLES = {"features": "energy.features_rollup", "errors": "energy.forecast_error_rollup",
+                 "profile": "energy.price_hour_profile"}
+
+
+def file_version(path: Path) -> tuple | None:
+    """(mtime_ns, size) of a file, or the newest/total over the parquet files of a directory."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    if path.is_dir():
+        stats = [p.stat() for p in path.rglob("*.parquet")]
+        return (max((s.st_mtime_ns for s in stats), default=0), sum(s.st_size for s in stats))
+    s = path.stat()
+    return (s.st_mtime_ns, s.st_size)
+
+
+def features_version() -> tuple | None:
+    return file_version(data_iter.default_source())
+
+
+def _utc(value) -> pd.Timestamp:
+    t = pd.Timestamp(value)
+    return t.tz_localize("UTC") if t.tz is None else t.tz_convert("UTC")
+
+
+def month_filter(lo: pd.Timestamp, hi: pd.Timestamp):
+    """Partition-key expression for the (UTC) months overlapping [lo, hi)."""
+    y, m = ds.field("year"), ds.field("month")
+    last = hi - pd.Timedelta(microseconds=1)
+    after = (y > lo.year) | ((y == lo.year) & (m >= lo.month))
+    before = (y < last.year) | ((y == last.year) & (m <= last.month))
+    return after & before
+
+
+def _frame(tbl) -> pd.DataFrame:
+    df = tbl.to_pandas()
+    df = df.set_index(pd.DatetimeIndex(pd.to_datetime(df.pop("ts_utc"), utc=True), name="ts_utc"))
+    df = df.sort_index()
+    for c in df.select_dtypes(include=["bool"]).columns:
+        df[c] = df[c].astype(int)
+    return df
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def time_bounds(version) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """First and last feature timestamp (reads only the ts_utc column)."""
+    ts = data_iter.open_dataset().to_table(columns=["ts_utc"]).column(0)
+    idx = pd.to_datetime(ts.to_pandas(), utc=True)
+    return idx.min(), idx.max()
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def feature_columns(version) -> list[str]:
+    return data_iter.feature_columns(data_iter.open_dataset(), target="")
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_features(start, end, columns: tuple[str, ...], version) -> pd.DataFrame:
+    """Feature/price columns for [start, end), pruned to the overlapping partitions."""
+    lo, hi = _utc(start), _utc(end)
+    source = data_iter.default_source()
+    dataset = data_iter.open_dataset(source)
+    flt = (ds.field("ts_utc") >= lo.to_pydatetime()) & (ds.field("ts_utc") < hi.to_pydatetime())
+    if Path(source).is_dir():
+        flt = month_filter(lo, hi) & flt
+    return _frame(dataset.to_table(columns=["ts_utc", *columns], filter=flt))
+
+
+def _buckets(n: int, n_out: int) -> np.ndarray:
+    """Bucket id per point for n points into n_out equal-count buckets."""
+    return np.minimum((np.arange(n) * n_out) // n, n_out - 1)
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the min and max of each of n_out // 2 buckets (keeps spikes exactly)."""
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    b = _buckets(n, max(n_out // 2, 1))
+    order = np.lexsort((y, b))                    # by bucket, then value
+    first = np.r_[True, b[order][1:] != b[order][:-1]]
+    last = np.r_[b[order][1:] != b[order][:-1], True]
+    return np.unique(np.concatenate([order[first], order[last]]))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: n_out indices that keep the visual shape."""
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)      # n_out - 2 inner buckets
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def downsample(df: pd.DataFrame, points: int = POINTS, method: str = "lttb") -> pd.DataFrame:
+    """At most about `points` rows per column; the kept rows are the union over columns."""
+    if len(df) <= points:
+        return df
+    x = df.index.as_unit("ns").asi8.astype(float)
+    keep = []
+    for c in df.columns:
+        y = df[c].to_numpy(dtype=float)
+        ok = np.flatnonzero(~np.isnan(y))
+        sel = (lttb_indices(x[ok], y[ok], points) if method == "lttb"
+               else minmax_indices(y[ok], points))
+        keep.append(ok[sel])
+    return df.iloc[np.unique(np.concatenate(keep))] if keep else df.iloc[:0]
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def series(start, end, columns: tuple[str, ...], points: int, method: str, version) -> pd.DataFrame:
+    """Downsampled columns for [start, end); the raw range read is cached separately."""
+    return downsample(load_features(start, end, columns, version), points, method)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def fan(version) -> pd.DataFrame | None:
+    if version is None:
+        return None
+    return pd.read_csv(FAN_CSV, parse_dates=["ts_utc"], index_col="ts_utc")
+
+
+def _pg():
+    return psycopg2.connect(host=DB["host"], dbname=DB["database"], user=DB["user"],
+                            password=DB["password"], connect_timeout=2)
+
+
+@st.cache_data(show_spinner=False, ttl=30)
+def predictions_version() -> str | None:
+    """max(created_at) of stored predictions (rechecked at most every 30 s); None without a DB."""
+    try:
+        with _pg() as conn, conn.cursor() as cur:
+            cur.execute(VERSION_SQL)
+            v = cur.fetchone()[0]
+    except Exception:
+        return None
+    return v and v.isoformat()
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def predictions(start, end, version) -> pd.DataFrame:
+    with _pg() as conn, conn.cursor() as cur:
+        cur.execute(PG_SQL, (_utc(start).to_pydatetime(), _utc(end).to_pydatetime()))
+        rows = cur.fetchall()
+    df = pd.DataFrame(rows, columns=["ts_utc", "y_p10", "y_p50", "y_p90"])
+    df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
+    return df.set_index("ts_utc").astype(float)
+
+
+@st.cache_data(show_spinner=False, ttl=30)
+def rollup_version(kind: str) -> str | None:
+    """max(refreshed_at) of one rollup table; None without a DB."""
+    try:
+        with _pg() as conn, conn.cursor() as cur:
+            cur.execute(f"SELECT max(refreshed_at) FROM {ROLLUP_TABLES[kind]}")
+            v = cur.fetchone()[0]
+    except Exception:
+        return None
+    return v and v.isoformat()
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def rollup(kind: str, grain: str, start, end, version) -> pd.DataFrame:
+    """Precomputed aggregates for buckets starting in [start, end) (see db/rollups.sql)."""
+    key = "month" if kind == "profile" else "bucket"
+    where = f"{key} >= %s AND {key} < %s" + ("" if kind == "profile" else " AND grain = %s")
+    args = (_utc(start).date(), _utc(end).date()) + (() if kind == "profile" else (grain,))
+    with _pg() as conn, conn.cursor() as cur:
+        cur.execute(f"SELECT * FROM {ROLLUP_TABLES[kind]} WHERE {where} ORDER BY {key}", args)
+        cols = [d[0] for d in cur.description]
+        rows = cur.fetchall()
+    return pd.DataFrame(rows, columns=cols).drop(columns=["refreshed_at"])
+
+
+@st.cache_data(show_spinner=False, ttl=60)
+def pipeline_metrics(days: int) -> pd.DataFrame | None:
+    """Stage telemetry rows (pipeline/telemetry.py) of the last `days` days; None without a DB."""
+    since = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=days)
+    try:
+        with _pg() as conn, conn.cursor() as cur:
+            cur.execute(METRICS_SQL, (since.to_pydatetime(),))
+            cols = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+    except Exception:
+        return None
+    df = pd.DataFrame(rows, columns=cols)
+    df["started_at"] = pd.to_datetime(df["started_at"], utc=True)
+    return df
@@ -0,0 +1,137 @@
+# web/export.py
+"""Bulk export of features/predictions as streamed record batches.
+
+Arrow IPC stream by default; NDJSON and CSV encode the same batches. Rows
+are read batch by batch (parquet fragments in time order, or a server-side
+Postgres cursor), so server memory stays at about one batch whatever the
+range.
+"""
+from __future__ import annotations
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+
+from models import data_iter
+
+BATCH_ROWS = 65_536
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+PG_FEATURES = pa.schema([
+    ("ts_utc", pa.timestamp("us", tz="UTC")), ("price_eur_mwh", pa.float64()),
+    ("load_mw", pa.float64()), ("wind_mw", pa.float64()), ("solar_mw", pa.float64()),
+    ("renewables_share", pa.float64()), ("hour", pa.int16()), ("dow", pa.int16()),
+    ("is_weekend", pa.bool_()),
+])
+PG_PREDICTIONS = pa.schema([
+    ("ts_utc", pa.timestamp("us", tz="UTC")), ("y_p10", pa.float64()),
+    ("y_p50", pa.float64()), ("y_p90", pa.float64()),
+    ("created_at", pa.timestamp("us", tz="UTC")),
+])
+# NUMERIC columns are cast so they arrive as floats, not Decimals
+PG_SQL = {
+    "features": """
+      SELECT ts_utc, price_eur_mwh::float8, load_mw::float8, wind_mw::float8,
+             solar_mw::float8, renewables_share::float8, hour, dow, is_weekend
+      FROM energy.features_hourly
+      WHERE ts_utc >= $1 AND ts_utc < $2 ORDER BY ts_utc""",
+    "predictions": """
+      SELECT ts_utc, y_p10, y_p50, y_p90, created_at
+      FROM energy.predictions_hourly
+      WHERE ts_utc >= $1 AND ts_utc < $2 ORDER BY ts_utc""",
+}
+PG_SCHEMAS = {"features": PG_FEATURES, "predictions": PG_PREDICTIONS}
+
+
+def _utc(value, default) -> pd.Timestamp:
+    t = pd.Timestamp(value or default)
+    return t.tz_localize("UTC") if t.tz is None else t.tz_convert("UTC")
+
+
+def time_range(start: str | None, end: str | None) -> tuple[pd.Timestamp, pd.Timestamp]:
+    lo, hi = _utc(start, "1970-01-01"), _utc(end, "2100-01-01")
+    if hi <= lo:
+        raise ValueError("end must be after start")
+    return lo, hi
+
+
+class _Sink:
+    """File-like buffer the Arrow/CSV writers append to; drained after each batch."""
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, b) -> int:
+        self.parts.append(bytes(b))
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        out = b"".join(self.parts)
+        self.parts.clear()
+        return out
+
+
+class Encoder:
+    def __init__(self, fmt: str, schema: pa.Schema):
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"format must be one of {sorted(MEDIA_TYPES)}")
+        self.fmt, self.schema, self.sink = fmt, schema, _Sink()
+        self.media_type = MEDIA_TYPES[fmt]
+        self.writer = (pa.ipc.new_stream(self.sink, schema) if fmt == "arrow"
+                       else pacsv.CSVWriter(self.sink, schema) if fmt == "csv" else None)
+
+    def write(self, batch: pa.RecordBatch) -> bytes:
+        if self.writer is not None:
+            self.writer.write_batch(batch)
+            return self.sink.take()
+        return batch.to_pandas().to_json(orient="records", lines=True,
+                                         date_format="iso").encode()
+
+    def close(self) -> bytes:
+        if self.writer is not None:
+            self.writer.close()
+        return self.sink.take()
+
+
+def parquet_plan(start=None, end=None, path=None):
+    """(schema, fragments in time order, filter) for the feature store."""
+    dataset = data_iter.open_dataset(path)
+    lo, hi = time_range(start, end)
+    flt = (ds.field("ts_utc") >= lo.to_pydatetime()) & (ds.field("ts_utc") < hi.to_pydatetime())
+    cols = [f.name for f in dataset.schema
+            if f.name not in data_iter.PARTITION_KEYS and not f.name.startswith("__")]
+    # hive paths list month=10 before month=2, so order fragments by their keys
+    frags = sorted(dataset.get_fragments(filter=flt),
+                   key=lambda f: tuple(ds.get_partition_keys(f.partition_expression).get(k, 0)
+                                       for k in data_iter.PARTITION_KEYS))
+    schema = pa.schema([dataset.schema.field(c) for c in cols])
+    return schema, frags, flt
+
+
+def stream_parquet(enc: Encoder, frags, flt, batch_rows=BATCH_ROWS):
+    for frag in frags:
+        for batch in frag.to_batches(columns=enc.schema.names, filter=flt, batch_size=batch_rows):
+            if batch.num_rows:
+                yield enc.write(batch)
+    yield enc.close()
+
+
+async def stream_postgres(enc: Encoder, pool, table: str, start=None, end=None,
+                          batch_rows=BATCH_ROWS):
+    lo, hi = time_range(start, end)
+    conn_pool = await pool.get()
+    async with conn_pool.acquire() as conn, conn.transaction():
+        cur = await conn.cursor(PG_SQL[table], lo.to_pydatetime(), hi.to_pydatetime())
+        while rows := await cur.fetch(batch_rows):
+            cols = list(zip(*rows))
+            yield enc.write(pa.RecordBatch.from_arrays(
+                [pa.array(c, type=f.type) for c, f in zip(cols, enc.schema)], schema=enc.schema))
+    yield enc.close()
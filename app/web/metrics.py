@@ -0,0 +1,97 @@
+# web/metrics.py
+"""Prometheus text-format metrics for the API (no client library needed).
+
+Histograms are cumulative-bucket, thread-safe and per process: under
+gunicorn each worker exposes its own series, so scrape the workers
+individually or sum with `sum by (le, ...)` across instances.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+import bisect
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    esc = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return ",".join(f'{n}="{v}"' for n, v in zip(names, esc))
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.doc, self.labels, self.buckets = name, doc, labels, tuple(buckets)
+        self._series: dict[tuple, list] = {}        # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.setdefault(label_values, [0] * len(self.buckets) + [0.0, 0])
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *label_values)
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for values, s in sorted(series.items()):
+            base = _labels(self.labels, values)
+            sep = "," if base else ""
+            acc = 0
+            for le, n in zip(self.buckets, s):
+                acc += n
+                out.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {acc}')
+            out.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {s[-1]}')
+            tail = f"{{{base}}}" if base else ""
+            out.append(f"{self.name}_sum{tail} {s[-2]}")
+            out.append(f"{self.name}_count{tail} {s[-1]}")
+        return out
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labels: tuple[str, ...] = ()):
+        self.name, self.doc, self.labels = name, doc, labels
+        self._series: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, by: float = 1.0) -> None:
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0.0) + by
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = dict(self._series)
+        for values, v in sorted(series.items()):
+            base = _labels(self.labels, values)
+            out.append(f"{self.name}{{{base}}} {v}" if base else f"{self.name} {v}")
+        return out
+
+
+REQUEST_LATENCY = Histogram("epfd_http_request_duration_seconds",
+                            "HTTP request latency by route template.", ("method", "route", "status"))
+INFERENCE = Histogram("epfd_model_inference_seconds",
+                      "Model scoring time (next_hour, distribution, scenarios, snapshot_build).",
+                      ("kind",))
+SNAPSHOT_SWAPS = Counter("epfd_snapshot_swaps_total", "Model/feature snapshots swapped in.")
+REGISTRY = [REQUEST_LATENCY, INFERENCE, SNAPSHOT_SWAPS]
+
+
+def render() -> str:
+    return "\n".join(line for m in REGISTRY for line in m.render()) + "\n"
@@ -0,0 +1,124 @@
+# web/pg_async.py
+"""Pooled asyncpg access and a versioned response cache for stored predictions."""
+from __future__ import annotations
+from datetime import datetime, timezone
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+
+import asyncpg
+
+DB = dict(
+    host=os.getenv("POSTGRES_HOST", "epfd-postgres"),
+    database=os.getenv("POSTGRES_DB", "epfd"),
+    user=os.getenv("POSTGRES_USER", "epfd"),
+    password=os.getenv("POSTGRES_PASSWORD", "epfd"),
+)
+
+NEXT24H_SQL = """
+  SELECT ts_utc, y_p10, y_p50, y_p90
+  FROM energy.predictions_hourly
+  WHERE ts_utc >= now() AT TIME ZONE 'UTC'
+  ORDER BY ts_utc ASC
+  LIMIT 24;
+"""
+VERSION_SQL = "SELECT max(created_at) FROM energy.predictions_hourly"
+
+# day/week/month rollups maintained by energy.refresh_rollups (db/rollups.sql)
+GRAINS = ("day", "week", "month")
+ROLLUP_SQL = {
+    "features": """SELECT * FROM energy.features_rollup
+                   WHERE grain = $1 AND bucket >= $2 AND bucket < $3 ORDER BY bucket""",
+    "errors": """SELECT * FROM energy.forecast_error_rollup
+                 WHERE grain = $1 AND bucket >= $2 AND bucket < $3 ORDER BY bucket""",
+    "profile": """SELECT * FROM energy.price_hour_profile
+                  WHERE month >= $1 AND month < $2 ORDER BY month, hour""",
+}
+
+
+class Pool:
+    """One asyncpg pool per worker, opened on first use inside the running loop."""
+
+    def __init__(self, min_size=1, max_size=int(os.getenv("EPFD_PG_POOL", "4"))):
+        self.min_size, self.max_size = min_size, max_size
+        self._pool: asyncpg.Pool | None = None
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> asyncpg.Pool:
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        **DB, min_size=self.min_size, max_size=self.max_size)
+        return self._pool
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+_ENTITY_TAG = re.compile(r'\*|(?:W/)?"[^"]*"')
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match semantics: `*` or any listed entity tag equal to etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = _ENTITY_TAG.findall(if_none_match)
+    return "*" in tags or etag.removeprefix("W/") in (t.removeprefix("W/") for t in tags)
+
+
+class VersionedCache:
+    """Serialized response + ETag keyed by (max(created_at), current UTC hour).
+
+    The hour is part of the key because the query window moves with now().
+    Within `ttl` seconds of the last check the DB is not touched at all.
+    """
+
+    def __init__(self, sql: str, version_sql: str, ttl: float = 5.0):
+        self.sql, self.version_sql, self.ttl = sql, version_sql, ttl
+        self.key = None
+        self.etag: str | None = None
+        self.body: bytes | None = None
+        self._checked = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def fresh(self) -> bool:
+        return (self.body is not None and time.monotonic() - self._checked < self.ttl
+                and self.key[1] == _hour())
+
+    async def get(self, pool: Pool) -> tuple[str, bytes]:
+        if self.fresh():
+            return self.etag, self.body
+        async with self._lock:          # one refresh per worker, others wait for it
+            if self.fresh():
+                return self.etag, self.body
+            conn_pool = await pool.get()
+            version = await conn_pool.fetchval(self.version_sql)
+            key = (version, _hour())
+            if key != self.key:
+                rows = await conn_pool.fetch(self.sql)
+                self.body = json.dumps({"rows": [_record(r) for r in rows]}).encode()
+                self.etag = '"' + hashlib.sha1(repr(key).encode()).hexdigest()[:20] + '"'
+                self.key = key
+            self._checked = time.monotonic()
+            return self.etag, self.body
+
+
+async def fetch_rollup(pool: Pool, kind: str, grain: str, lo, hi) -> list[dict]:
+    """Rows of one rollup table for buckets starting in [lo, hi) (dates)."""
+    args = (lo, hi) if kind == "profile" else (grain, lo, hi)
+    conn_pool = await pool.get()
+    return [dict(r) for r in await conn_pool.fetch(ROLLUP_SQL[kind], *args)]
+
+
+def _hour() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H")
+
+
+def _record(r) -> dict:
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in r.items()}
@@ -0,0 +1,103 @@
+# web/scenarios.py
+"""What-if scenarios for the next 24h: grids over exogenous paths.
+
+Each exogenous column gets a list of variants (scales of the baseline hour
+profile, MW offsets to it, or explicit 24h paths). The scenario set is the
+cartesian product of all variants; columns left out keep the baseline.
+"""
+from __future__ import annotations
+import itertools
+import json
+import numpy as np
+from pydantic import BaseModel, Field
+
+from models import bundle, forecaster
+from web.metrics import INFERENCE
+
+MAX_SCENARIOS = 50_000
+MEDIAN = 50
+
+
+class Variants(BaseModel):
+    scale: list[float] = Field(default_factory=list, description="Multipliers of the baseline path")
+    offset: list[float] = Field(default_factory=list, description="MW added to the baseline path")
+    paths: list[list[float]] = Field(default_factory=list, description="Explicit hourly paths")
+
+
+class ScenarioRequest(BaseModel):
+    wind_mw: Variants | None = None
+    solar_mw: Variants | None = None
+    load_mw: Variants | None = None
+    quantiles: list[int] | None = Field(None, description="Subset of served quantiles to return")
+    chunk_size: int = Field(1000, ge=1, le=MAX_SCENARIOS)
+
+
+def _variants(base: np.ndarray, v: Variants, horizon: int) -> tuple[list, np.ndarray]:
+    labels, rows = [], []
+    for s in v.scale:
+        labels.append({"scale": s})
+        rows.append(base * s)
+    for o in v.offset:
+        labels.append({"offset": o})
+        rows.append(base + o)
+    for i, p in enumerate(v.paths):
+        if len(p) != horizon:
+            raise ValueError(f"paths[{i}] has {len(p)} values, expected {horizon}")
+        labels.append({"path": i})
+        rows.append(np.asarray(p, dtype=float))
+    if not rows:
+        return [{"baseline": True}], base[None, :]
+    return labels, np.maximum(np.vstack(rows), 0.0)
+
+
+def expand(ctx: forecaster.Context, req: ScenarioRequest):
+    """(labels per column, variant index grid (S, n_cols), {col: (n_variants, h)})."""
+    cols = [c for c in forecaster.EXOG if getattr(req, c) is not None]
+    missing = [c for c in cols if c not in ctx.exog]
+    if missing:
+        raise ValueError(f"no baseline for {missing} in the feature data")
+    labels, options = {}, {}
+    for c in cols:
+        labels[c], options[c] = _variants(ctx.exog[c], getattr(req, c), ctx.horizon)
+    n = int(np.prod([len(labels[c]) for c in cols])) if cols else 1
+    if n > MAX_SCENARIOS:
+        raise ValueError(f"{n} scenarios requested, limit is {MAX_SCENARIOS}")
+    grid = np.array(list(itertools.product(*(range(len(labels[c])) for c in cols))),
+                    dtype=int).reshape(n, len(cols))
+    return cols, labels, grid, options
+
+
+def stream(snap, req: ScenarioRequest):
+    """Validate eagerly, then return a generator of NDJSON lines: one header,
+    then one line per scenario, scored chunk by chunk."""
+    ctx = snap.context()
+    cols, labels, grid, options = expand(ctx, req)
+    models = snap.models
+    unknown = sorted(set(req.quantiles or []) - set(models.quantiles))
+    if unknown:
+        raise ValueError(f"quantiles {unknown} are not served (have {models.quantiles})")
+    if req.quantiles:
+        # score only what was asked for, plus the median that drives the recursion
+        wanted = set(req.quantiles) | {MEDIAN}
+        models = bundle.Bundle({q: b for q, b in models.boosters.items() if q in wanted},
+                               models.features, models.meta)
+    qs = models.quantiles
+    keep = [qs.index(q) for q in (req.quantiles or qs)]
+    header = {"issued_from": snap.latest_ts, "n_scenarios": len(grid),
+              "ts_utc": [str(t) for t in ctx.future_idx], "quantiles": [qs[i] for i in keep]}
+
+    def lines():
+        yield json.dumps(header) + "\n"
+        for lo in range(0, len(grid), req.chunk_size):
+            g = grid[lo:lo + req.chunk_size]
+            exog = {c: options[c][g[:, j]] for j, c in enumerate(cols)}
+            with INFERENCE.time("scenarios"):
+                out = snap.calibrate(forecaster.forecast(models, snap.features, ctx, exog=exog),
+                                     ctx.future_idx, qs)
+            out = np.round(out[:, :, keep].transpose(0, 2, 1), 2)      # (S, Q, h)
+            yield "".join(
+                json.dumps({"scenario": lo + i,
+                            "params": {c: labels[c][g[i, j]] for j, c in enumerate(cols)},
+                            "values": out[i].tolist()}) + "\n"
+                for i in range(len(g)))
+    return lines()
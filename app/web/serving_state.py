@@ -0,0 +1,195 @@
+# web/serving_state.py
+"""Resident model + feature state for the API.
+
+A snapshot (models, recent feature tail, fingerprint) is built once and
+swapped as a whole when the registry pointer or the features parquet
+changes, so a request always sees one consistent set. Snapshots are
+built at import time: under a pre-forking server (gunicorn --preload) the
+workers share the loaded pages copy-on-write.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+import gc
+import threading
+import numpy as np
+import pandas as pd
+
+from models import bundle, conformal, forecaster, quantile_fn, registry
+from web.metrics import INFERENCE, SNAPSHOT_SWAPS
+
+FEA = Path("data/features/hourly.parquet")
+TARGET = "price_eur_mwh"
+QUANTILES = tuple(range(5, 100, 5))
+DIRECT_QUANTILES = (QUANTILES, (10, 50, 90))     # full set, else the small one
+TAIL_DAYS = 180
+
+
+def _model_marker(quantiles, prefix: str = "xgb_q") -> tuple:
+    """(model dir, mtime of its registry pointer, bundle or newest model file) for a quantile set."""
+    files = [f"{prefix}{q}.json" for q in quantiles]
+    model_dir = registry.resolve(files)
+    ptr = registry.REG / model_dir.parent.name / "current.json"
+    for marker in (ptr, model_dir / bundle.BUNDLE_FILE):
+        if marker.exists():
+            return str(model_dir), marker.stat().st_mtime_ns
+    # models/artifacts without a bundle: a retrain rewrites the JSON files in place
+    mtimes = [p.stat().st_mtime_ns for p in (model_dir / f for f in files) if p.exists()]
+    return str(model_dir), max(mtimes, default=None)
+
+
+def fingerprint(with_direct: bool = False) -> tuple:
+    """Cheap stat-only key: which model set is current + features file + conformal offsets
+    (+ the direct multi-horizon set when served)."""
+    f_stat = FEA.stat() if FEA.exists() else None
+    c_stat = conformal.STATE.stat() if conformal.STATE.exists() else None
+    key = (*_model_marker(QUANTILES),
+           f_stat and (f_stat.st_mtime_ns, f_stat.st_size),
+           c_stat and c_stat.st_mtime_ns)
+    if with_direct:
+        key += tuple(_model_marker(qs, "direct_q") for qs in DIRECT_QUANTILES)
+    return key
+
+
+def read_tail(days=TAIL_DAYS) -> pd.DataFrame:
+    df = pd.read_parquet(FEA)
+    if "ts_utc" in df.columns:
+        df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
+        df = df.set_index("ts_utc")
+    else:
+        df.index = pd.to_datetime(df.index, utc=True)
+    df = df.sort_index()
+    for c in df.select_dtypes(include=["bool"]).columns:
+        df[c] = df[c].astype(int)
+    df = df.select_dtypes(include=["number"])
+    return df.loc[df.index >= df.index.max() - pd.Timedelta(days=days)]
+
+
+@dataclass
+class Snapshot:
+    key: tuple
+    models: bundle.Bundle
+    tail: pd.DataFrame
+    features: list[str]
+    x_last: np.ndarray                    # (1, F) float32, last feature row
+    loaded_at: str
+    calibrator: conformal.Calibrator | None = None
+    direct: bundle.Bundle | None = None   # direct multi-horizon set, when loaded
+    _next_hour: dict | None = field(default=None, repr=False)
+    _context: forecaster.Context | None = field(default=None, repr=False)
+    _qf: quantile_fn.QuantileFunction | None = field(default=None, repr=False)
+
+    @property
+    def latest_ts(self) -> str:
+        return str(self.tail.index[-1])
+
+    def next_hour(self) -> dict:
+        # deterministic for a snapshot -> scored once, then served from memory
+        if self._next_hour is None:
+            with INFERENCE.time("next_hour"):
+                p = self.calibrate(self.models.predict(self.x_last), self.tail.index[-1:])[0]
+            self._next_hour = {f"q{q}": float(v) for q, v in zip(self.models.quantiles, p)}
+        return self._next_hour
+
+    def calibrate(self, P: np.ndarray, index: pd.DatetimeIndex, quantiles=None) -> np.ndarray:
+        """Conformal offsets for the hours in `index` (P is (..., len(index), Q)), else just repair."""
+        if self.calibrator is None:
+            return quantile_fn.repair(P)
+        return self.calibrator.apply(P, conformal.berlin_hours(index), quantiles)
+
+    def context(self) -> forecaster.Context:
+        """Recursive-forecast context (history buffers, exog baseline) for the next 24h."""
+        if self._context is None:
+            self._context = forecaster.make_context(self.tail)
+        return self._context
+
+    def distribution(self) -> quantile_fn.QuantileFunction:
+        """Continuous distribution per hour of the recursive 24h forecast."""
+        if self._qf is None:
+            ctx = self.context()
+            with INFERENCE.time("distribution"):
+                fan = self.calibrate(forecaster.forecast(self.models, self.features, ctx)[0],
+                                     ctx.future_idx)
+            self._qf = quantile_fn.QuantileFunction(np.array(self.models.quantiles) / 100, fan)
+        return self._qf
+
+
+def load_direct(nthread: int | None = None) -> bundle.Bundle | None:
+    for qs in DIRECT_QUANTILES:
+        try:
+            return bundle.load_quantiles(qs, nthread=nthread, prefix="direct_q")
+        except SystemExit:
+            continue
+    return None
+
+
+def build_snapshot(key=None, nthread: int | None = None, with_direct: bool = False) -> Snapshot:
+    key = key or fingerprint(with_direct)
+    if not FEA.exists():
+        raise SystemExit(f"Missing {FEA}. Run `make build-features` first.")
+    models = bundle.load_quantiles(QUANTILES, nthread=nthread)
+    tail = read_tail()
+    features = models.features or [c for c in tail.columns if c != TARGET]
+    x_last = np.ascontiguousarray(tail.reindex(columns=features).iloc[[-1]], dtype=np.float32)
+    return Snapshot(key, models, tail, features, x_last,
+                    datetime.now(timezone.utc).isoformat(), conformal.load_for(models),
+                    load_direct(nthread) if with_direct else None)
+
+
+class StateHolder:
+    """Holds the current Snapshot; a watcher thread swaps it when inputs change."""
+
+    def __init__(self, poll_seconds: float = 30.0, nthread: int | None = None,
+                 with_direct: bool = False):
+        self.poll_seconds = poll_seconds
+        self.nthread = nthread
+        self.with_direct = with_direct
+        self._snap: Snapshot | None = None
+        self._error: str | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def get(self) -> Snapshot | None:
+        return self._snap
+
+    @property
+    def error(self) -> str | None:
+        return self._error
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuild if the fingerprint moved; returns True when a new snapshot was swapped in."""
+        with self._lock:
+            key = fingerprint(self.with_direct)
+            if not force and self._snap is not None and self._snap.key == key:
+                return False
+            try:
+                with INFERENCE.time("snapshot_build"):
+                    snap = build_snapshot(key, self.nthread, self.with_direct)
+            except SystemExit as e:         # keep serving the previous snapshot
+                self._error = str(e)
+                return False
+            self._snap, self._error = snap, None
+            SNAPSHOT_SWAPS.inc()
+            return True
+
+    def preload(self) -> None:
+        self.refresh(force=True)
+        gc.freeze()     # keep loaded objects out of GC passes so forked pages stay shared
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception as e:          # never let the watcher die
+                self._error = f"reload failed: {e!r}"
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="state-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()